@@ -4,19 +4,11 @@ Application principale - Système de Triage Intelligent aux Urgences.
 
 import sys
 import json
-import io
 import time
-import pickle
-import numpy as np
-from contextlib import redirect_stdout
 from pathlib import Path
 from typing import Optional, Dict
 
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from datetime import datetime
 from dotenv import find_dotenv, load_dotenv
 
 ROOT_DIR = Path(__file__).resolve().parent.parent
@@ -24,17 +16,10 @@ sys.path.insert(0, str(ROOT_DIR))
 
 load_dotenv(find_dotenv())
 
-from src.llm.llm_factory import LLMFactory
-from src.agents.patient_generator import PatientGenerator
-from src.agents.patient_simulator import PatientSimulator
-from src.agents.nurse_agent import NurseAgent
-from src.models.conversation import ConversationHistory
-from src.rag.chatbot import TriageChatbotAPI
-from src.rag.predictor import MLTriagePredictor
-from src.rag.vector_store import VectorStore, RAGRetriever
-from src.simulation_workflow import SimulationWorkflow
-from src.monitoring.metrics_tracker import get_tracker
-from src.monitoring.cost_calculator import get_calculator
+# Les dépendances lourdes (pandas, plotly, agents, chatbot, génération) sont
+# importées dans les pages qui les utilisent : chaque rerun Streamlit ne paie
+# que l'import de la page affichée.
+from src.registry import get_registry
 
 # ---------------------------------------------------------------------------
 # Config globale
@@ -281,6 +266,12 @@ def _reset_simulation():
 
 
 def _start_simulation(pathology_description: str):
+    from src.llm.llm_factory import LLMFactory
+    from src.agents.patient_generator import PatientGenerator
+    from src.agents.patient_simulator import PatientSimulator
+    from src.agents.nurse_agent import NurseAgent
+    from src.models.conversation import ConversationHistory
+
     try:
         if st.session_state.llm is None:
             with st.spinner("Initialisation du LLM Mistral..."):
@@ -578,23 +569,22 @@ def page_simulation():
 # ===========================================================================
 
 def page_chat_interactif():
+    from src.rag.chatbot import TriageChatbotAPI
+
     st.title("💬 Chatbot de Triage des Urgences")
     st.markdown("*Assistant ML pour aide à la décision — joue le rôle de l'infirmier*")
 
     if "chatbot" not in st.session_state:
+        # Modèles partagés par toutes les sessions (chargés une fois par processus)
+        registry = _start_registry()
         retriever = None
         with st.spinner("Chargement RAG..."):
             try:
-                vector_db_path = ROOT_DIR / "data" / "vector_db"
-                vector_store = VectorStore(
-                    persist_directory=str(vector_db_path), collection_name="triage_medical"
-                )
-                retriever = RAGRetriever(vector_store=vector_store)
-                st.session_state.predictor = MLTriagePredictor(rag_retriever=retriever)
+                retriever = registry.retriever()
                 st.success("RAG chargé avec succès")
             except Exception as e:
                 st.warning(f"RAG non chargé: {e}")
-                st.session_state.predictor = MLTriagePredictor()
+            st.session_state.predictor = registry.predictor(with_rag=retriever is not None)
 
         st.session_state.chatbot = TriageChatbotAPI(retriever=retriever)
         st.session_state.messages = []
@@ -743,7 +733,11 @@ def page_chat_interactif():
             user_input = st.chat_input("Votre message...")
             if user_input:
                 st.session_state.messages.append({"role": "user", "content": user_input})
-                response = bot.chat(user_input)
+                with st.chat_message("user"):
+                    st.markdown(user_input)
+                # Affichage au fil des tokens (premier fragment dès le début de la génération)
+                with st.chat_message("assistant"):
+                    response = st.write_stream(bot.chat_stream(user_input))
                 st.session_state.messages.append({"role": "assistant", "content": response})
                 st.rerun()
 
@@ -820,6 +814,18 @@ Le bot vous guidera étape par étape.
 # ===========================================================================
 
 def page_generation():
+    import io
+    import pickle
+    from contextlib import redirect_stdout
+
+    import numpy as np
+    import pandas as pd
+
+    from src.llm.llm_factory import LLMFactory
+    from src.simulation_workflow import SimulationWorkflow
+    from src.batch_generation import BatchGenerator
+    from src.monitoring.metrics_tracker import get_tracker
+
     st.title("🎲 Génération de Conversations")
     st.markdown("*Générez des conversations automatiques pour constituer un dataset de triage médical.*")
 
@@ -877,26 +883,16 @@ def page_generation():
             status_text = st.empty()
             try:
                 llm = LLMFactory.create("mistral", "mistral-large-latest")
-                workflow = SimulationWorkflow(llm, max_turns=max_turns)
-                total_duration = 0
-                for i in range(10):
-                    status_text.text(f"Génération {i+1}/10...")
-                    progress_bar.progress((i + 1) / 10)
-                    log_stream = io.StringIO()
-                    start_time = time.time()
-                    with redirect_stdout(log_stream):
-                        workflow.run_simulation()
-                    duration = time.time() - start_time
-                    total_duration += duration
-                    st.session_state.conversations.append(workflow.export_for_ml())
-                    workflow.reset()
-                    try:
-                        tracker = get_tracker()
-                        tracker.track_latency("Generation", "conversation", duration)
-                        tracker.track_api_call("mistral", "mistral-large-latest", 500, 300, duration, True)
-                    except Exception:
-                        pass
-                st.success(f"10 conversations générées en {total_duration:.1f}s!")
+                generator = BatchGenerator(llm, max_turns=max_turns, workers=5)
+                failed = 0
+                for event in generator.iter_run(10, resume=False):
+                    status_text.text(f"Génération {event['done']}/{event['total']}...")
+                    progress_bar.progress(event["done"] / event["total"])
+                    if event["ok"]:
+                        st.session_state.conversations.append(event["record"])
+                    else:
+                        failed += 1
+                st.success(f"{10 - failed} conversations générées en {event['elapsed']:.1f}s!")
                 progress_bar.empty()
                 status_text.empty()
                 st.rerun()
@@ -1119,6 +1115,15 @@ def page_generation():
 # ===========================================================================
 
 def page_monitoring():
+    from datetime import datetime
+
+    import pandas as pd
+    import plotly.express as px
+    import plotly.graph_objects as go
+
+    from src.monitoring.metrics_tracker import get_tracker
+    from src.monitoring.cost_calculator import get_calculator
+
     st.title("📊 Monitoring du Système")
     st.markdown("*Suivi des coûts API, performances et statistiques de prédiction*")
 
@@ -1143,8 +1148,8 @@ def page_monitoring():
                 st.warning("Cliquez à nouveau pour confirmer")
 
     api_stats = tracker.get_api_stats()
-    cost_data = calculator.calculate_total_cost(tracker.api_calls)
-    days_elapsed = max(1, (datetime.now() - datetime.fromisoformat(tracker.api_calls[0]["timestamp"])).days) if tracker.api_calls else 1
+    cost_data = tracker.get_cost_stats()
+    days_elapsed = max(1, (datetime.now() - datetime.fromisoformat(cost_data["first_timestamp"])).days) if cost_data["first_timestamp"] else 1
     monthly_estimate = calculator.estimate_monthly_cost(cost_data["total_cost"], days_elapsed)
 
     mc1, mc2, mc3, mc4 = st.columns(4)
@@ -1182,19 +1187,10 @@ def page_monitoring():
 
     with c2:
         st.subheader("Évolution des Coûts")
-        if tracker.api_calls:
-            costs_over_time = []
-            cumulative_cost = 0
-            for call in tracker.api_calls:
-                if call.get("service") == "mistral":
-                    cumulative_cost += calculator.calculate_mistral_cost(
-                        call.get("model", "mistral-small-latest"),
-                        call["tokens_input"],
-                        call["tokens_output"],
-                    )["cost_total"]
-                costs_over_time.append({"timestamp": datetime.fromisoformat(call["timestamp"]), "cost": cumulative_cost})
-            df_cost = pd.DataFrame(costs_over_time)
-            fig2 = px.line(df_cost, x="timestamp", y="cost", title="Coût Cumulé")
+        if cost_data["daily"]:
+            df_cost = pd.DataFrame(cost_data["daily"])
+            df_cost["date"] = pd.to_datetime(df_cost["date"])
+            fig2 = px.line(df_cost, x="date", y="cumulative_cost", title="Coût Cumulé (par jour)", markers=True)
             fig2.update_layout(height=300, showlegend=False)
             st.plotly_chart(fig2, use_container_width=True)
         else:
@@ -1209,17 +1205,20 @@ def page_monitoring():
         with lc1:
             st.subheader("Latences par Composant")
             df_lat = pd.DataFrame([
-                {"Composant": comp, "Moyenne (s)": f"{s['avg']:.3f}", "Min (s)": f"{s['min']:.3f}", "Max (s)": f"{s['max']:.3f}", "Appels": s["count"]}
+                {"Composant": comp, "Moyenne (s)": f"{s['avg']:.3f}", "p50 (s)": f"{s['p50']:.3f}", "p95 (s)": f"{s['p95']:.3f}", "p99 (s)": f"{s['p99']:.3f}", "Max (s)": f"{s['max']:.3f}", "Appels": s["count"]}
                 for comp, s in latency_stats.items()
             ])
             st.dataframe(df_lat, use_container_width=True, hide_index=True)
         with lc2:
-            st.subheader("Distribution des Latences")
-            latency_data = [{"Composant": l["component"], "Durée (s)": l["duration"]} for l in tracker.latencies]
-            if latency_data:
-                fig3 = px.box(pd.DataFrame(latency_data), x="Composant", y="Durée (s)", title="Distribution")
-                fig3.update_layout(height=300)
-                st.plotly_chart(fig3, use_container_width=True)
+            st.subheader("Percentiles des Latences")
+            latency_data = [
+                {"Composant": comp, "Percentile": p, "Durée (s)": s[p]}
+                for comp, s in latency_stats.items()
+                for p in ("p50", "p95", "p99")
+            ]
+            fig3 = px.bar(pd.DataFrame(latency_data), x="Composant", y="Durée (s)", color="Percentile", barmode="group", title="p50 / p95 / p99")
+            fig3.update_layout(height=300)
+            st.plotly_chart(fig3, use_container_width=True)
     else:
         st.info("Aucune donnée de latence disponible")
 
@@ -1245,46 +1244,73 @@ def page_monitoring():
             st.write(f"**Confiance moyenne**: {pred_stats['avg_confidence']*100:.1f}%")
         with pc3:
             st.subheader("Dernières Prédictions")
-            for pred in tracker.predictions[-5:][::-1]:
+            for pred in tracker.get_recent_predictions(5):
                 ts = datetime.fromisoformat(pred["timestamp"]).strftime("%H:%M:%S")
                 st.write(f"**{ts}** - {pred['severity']} ({pred['confidence']*100:.0f}%)")
     else:
         st.info("Aucune prédiction disponible")
 
+    st.divider()
+    st.subheader("Modèles résidents")
+    registry = _start_registry()
+    resident = registry.memory_report()
+    if resident:
+        reg_stats = registry.get_stats()
+        r1, r2, r3 = st.columns(3)
+        r1.metric("Modèles chargés", reg_stats["resident"])
+        r2.metric("Mémoire estimée", f"{reg_stats['estimated_mb']:.0f} MB")
+        if reg_stats["process_rss_mb"]:
+            r3.metric("RSS processus", f"{reg_stats['process_rss_mb']:.0f} MB")
+        st.dataframe(pd.DataFrame(resident), use_container_width=True, hide_index=True)
+    else:
+        st.info("Aucun modèle chargé (préchargement en cours ou aucune session ouverte)")
+
     st.divider()
     with st.expander("Détails Techniques"):
-        t1, t2, t3 = st.tabs(["Appels API", "Latences", "Prédictions"])
-        with t1:
-            if tracker.api_calls:
-                df_api = pd.DataFrame(tracker.api_calls)
-                df_api["timestamp"] = pd.to_datetime(df_api["timestamp"])
-                st.dataframe(df_api, use_container_width=True, hide_index=True)
-            else:
-                st.info("Aucun appel API enregistré")
-        with t2:
-            if tracker.latencies:
-                df_lat2 = pd.DataFrame(tracker.latencies)
-                df_lat2["timestamp"] = pd.to_datetime(df_lat2["timestamp"])
-                st.dataframe(df_lat2, use_container_width=True, hide_index=True)
-            else:
-                st.info("Aucune latence enregistrée")
-        with t3:
-            if tracker.predictions:
-                df_pred = pd.DataFrame([{
-                    "Timestamp": p["timestamp"], "Gravité": p["severity"],
-                    "Âge": p["patient"]["age"], "Sexe": p["patient"]["sex"],
-                    "Symptômes": ", ".join(p["symptoms"]),
-                    "Drapeaux": len(p["red_flags"]),
-                    "Confiance": f"{p['confidence']*100:.0f}%",
-                } for p in tracker.predictions])
-                st.dataframe(df_pred, use_container_width=True, hide_index=True)
-            else:
-                st.info("Aucune prédiction enregistrée")
+        # Les événements bruts ne sont lus sur disque que sur demande
+        if not st.checkbox("Charger les événements bruts", value=False):
+            st.info("Les statistiques ci-dessus proviennent des agrégats ; cochez pour afficher l'historique complet.")
+        else:
+            t1, t2, t3 = st.tabs(["Appels API", "Latences", "Prédictions"])
+            with t1:
+                if tracker.api_calls:
+                    df_api = pd.DataFrame(tracker.api_calls)
+                    df_api["timestamp"] = pd.to_datetime(df_api["timestamp"])
+                    st.dataframe(df_api, use_container_width=True, hide_index=True)
+                else:
+                    st.info("Aucun appel API enregistré")
+            with t2:
+                if tracker.latencies:
+                    df_lat2 = pd.DataFrame(tracker.latencies)
+                    df_lat2["timestamp"] = pd.to_datetime(df_lat2["timestamp"])
+                    st.dataframe(df_lat2, use_container_width=True, hide_index=True)
+                else:
+                    st.info("Aucune latence enregistrée")
+            with t3:
+                if tracker.predictions:
+                    df_pred = pd.DataFrame([{
+                        "Timestamp": p["timestamp"], "Gravité": p["severity"],
+                        "Âge": p["patient"]["age"], "Sexe": p["patient"]["sex"],
+                        "Symptômes": ", ".join(p["symptoms"]),
+                        "Drapeaux": len(p["red_flags"]),
+                        "Confiance": f"{p['confidence']*100:.0f}%",
+                    } for p in tracker.predictions])
+                    st.dataframe(df_pred, use_container_width=True, hide_index=True)
+                else:
+                    st.info("Aucune prédiction enregistrée")
 
     st.divider()
     st.caption("Note: Les coûts sont estimés selon les tarifs Mistral officiels.")
 
 
+@st.cache_resource(show_spinner=False)
+def _start_registry():
+    """Registre des modèles du processus, préchargé une seule fois au démarrage."""
+    registry = get_registry()
+    registry.warm_up(background=True)
+    return registry
+
+
 # ===========================================================================
 # NAVIGATION
 # ===========================================================================
@@ -1309,4 +1335,5 @@ with st.sidebar:
     selected = st.radio("Navigation", list(pages.keys()), label_visibility="collapsed")
     st.markdown("---")
 
+_start_registry()
 pages[selected]()
@@ -6,6 +6,11 @@ Analyse une conversation et extrait :
 - Constantes vitales
 - Antécédents
 - Durée des symptômes
+
+Deux modes :
+- extract_patient_info : relit toute la conversation (extraction finale)
+- extract_incremental : n'envoie que les nouveaux messages et fusionne le
+  delta avec le patient déjà extrait (pendant l'entretien)
 """
 
 import json
@@ -21,9 +26,15 @@ class ConversationAnalyzer:
 
     Usage:
         analyzer = ConversationAnalyzer(llm)
-        patient = analyzer.extract_patient_info(conversation)
+        patient = analyzer.extract_incremental(conversation)  # à chaque tour
+        patient = analyzer.extract_patient_info(conversation)  # à la fin
     """
 
+    # Champs liste fusionnés par union, champs simples remplacés si renseignés
+    LIST_FIELDS = ("symptomes_exprimes", "antecedents", "allergies", "traitements_en_cours")
+    SCALAR_FIELDS = ("age", "sexe", "duree_symptomes")
+    CONSTANTES_FIELDS = ("fc", "fr", "spo2", "ta_systolique", "ta_diastolique", "temperature")
+
     def __init__(self, llm_provider: BaseLLMProvider):
         """
         Initialise l'analyseur.
@@ -32,6 +43,13 @@ class ConversationAnalyzer:
             llm_provider: Provider LLM
         """
         self.llm = llm_provider
+        self.reset()
+
+    def reset(self) -> None:
+        """Oublie l'état de l'extraction incrémentale."""
+        self._conversation_id = None
+        self._extracted_count = 0
+        self._patient = None
 
     def get_missing_fields(self, patient: Patient) -> list[str]:
         """Retourne la liste des champs manquants pour le triage."""
@@ -146,31 +164,12 @@ IMPORTANT :
         # Parser le JSON
         try:
             data = self._extract_json_from_response(response)
+            patient = self._build_patient(data)
 
-            # Créer les constantes
-            const_data = data.get("constantes", {})
-            constantes = None
-            if any(const_data.values()):  # Si au moins une constante
-                constantes = Constantes(
-                    fc=const_data.get("fc"),
-                    fr=const_data.get("fr"),
-                    spo2=const_data.get("spo2"),
-                    ta_systolique=const_data.get("ta_systolique"),
-                    ta_diastolique=const_data.get("ta_diastolique"),
-                    temperature=const_data.get("temperature"),
-                )
-
-            # Créer le patient
-            patient = Patient(
-                age=data.get("age"),
-                sexe=data.get("sexe"),
-                symptomes_exprimes=data.get("symptomes_exprimes", []),
-                duree_symptomes=data.get("duree_symptomes"),
-                antecedents=data.get("antecedents", []),
-                allergies=data.get("allergies", []),
-                traitements_en_cours=data.get("traitements_en_cours", []),
-                constantes=constantes,
-            )
+            # L'extraction complète resynchronise l'état incrémental
+            self._conversation_id = conversation.id
+            self._extracted_count = len(conversation.messages)
+            self._patient = patient
 
             return patient
 
@@ -180,6 +179,135 @@ IMPORTANT :
             # Retourner patient vide plutôt que crash
             return Patient()
 
+    def extract_incremental(self, conversation: ConversationHistory) -> Patient:
+        """
+        Met à jour le patient extrait avec les seuls messages ajoutés depuis
+        le dernier appel.
+
+        Le prompt contient le patient déjà connu (JSON compact) et les nouveaux
+        messages : sa taille ne dépend plus de la longueur de la conversation.
+        En cas de réponse illisible, l'état est conservé et les messages seront
+        renvoyés au tour suivant.
+
+        Args:
+            conversation: Historique de conversation
+
+        Returns:
+            Patient: État courant fusionné
+        """
+        # Nouvelle conversation (ou historique vidé) : repartir de zéro
+        if (
+            conversation.id != self._conversation_id
+            or len(conversation.messages) < self._extracted_count
+        ):
+            self.reset()
+            self._conversation_id = conversation.id
+
+        new_messages = conversation.messages[self._extracted_count :]
+        if not new_messages:
+            return self._patient or Patient()
+
+        known = self._patient_to_data(self._patient) if self._patient else {}
+        new_text = "\n".join(f"{msg.role.value}: {msg.content}" for msg in new_messages)
+
+        prompt = f"""Mise à jour d'un dossier de triage aux urgences.
+
+INFORMATIONS DÉJÀ CONNUES (JSON) :
+{json.dumps(known, ensure_ascii=False)}
+
+NOUVEAUX MESSAGES :
+{new_text}
+
+Extrais UNIQUEMENT les informations nouvelles ou corrigées par ces messages
+(symptômes en langage patient, âge, sexe M/F, durée, antécédents, allergies,
+traitements, constantes si mentionnées ou clairement déductibles).
+
+RÉPONDS UNIQUEMENT AU FORMAT JSON, null ou [] pour ce qui ne change pas :
+
+{{"age": null, "sexe": null, "symptomes_exprimes": [], "duree_symptomes": null,
+ "antecedents": [], "allergies": [], "traitements_en_cours": [],
+ "constantes": {{"fc": null, "fr": null, "spo2": null, "ta_systolique": null, "ta_diastolique": null, "temperature": null}}}}
+"""
+
+        response = self.llm.generate(
+            messages=[{"role": "user", "content": prompt}], temperature=0.3, max_tokens=400
+        )
+
+        try:
+            delta = self._extract_json_from_response(response)
+            patient = self._build_patient(self._merge_data(known, delta))
+        except Exception as e:
+            print(f"[ERREUR] Extraction incrementale : {e}")
+            print(f"Réponse LLM : {response[:200]}...")
+            return self._patient or Patient()
+
+        self._patient = patient
+        self._extracted_count = len(conversation.messages)
+        return patient
+
+    def _build_patient(self, data: dict) -> Patient:
+        """Construit un Patient depuis le JSON d'extraction."""
+        # Créer les constantes
+        const_data = data.get("constantes") or {}
+        constantes = None
+        if any(const_data.values()):  # Si au moins une constante
+            constantes = Constantes(
+                fc=const_data.get("fc"),
+                fr=const_data.get("fr"),
+                spo2=const_data.get("spo2"),
+                ta_systolique=const_data.get("ta_systolique"),
+                ta_diastolique=const_data.get("ta_diastolique"),
+                temperature=const_data.get("temperature"),
+            )
+
+        # Créer le patient
+        return Patient(
+            age=data.get("age"),
+            sexe=data.get("sexe"),
+            symptomes_exprimes=data.get("symptomes_exprimes") or [],
+            duree_symptomes=data.get("duree_symptomes"),
+            antecedents=data.get("antecedents") or [],
+            allergies=data.get("allergies") or [],
+            traitements_en_cours=data.get("traitements_en_cours") or [],
+            constantes=constantes,
+        )
+
+    def _patient_to_data(self, patient: Patient) -> dict:
+        """Patient -> dict au format du JSON d'extraction (champs renseignés seulement)."""
+        data = {field: getattr(patient, field) for field in self.SCALAR_FIELDS}
+        data.update({field: list(getattr(patient, field)) for field in self.LIST_FIELDS})
+        if patient.constantes:
+            data["constantes"] = {
+                field: getattr(patient.constantes, field) for field in self.CONSTANTES_FIELDS
+            }
+        return {k: v for k, v in data.items() if v not in (None, [], {})}
+
+    def _merge_data(self, known: dict, delta: dict) -> dict:
+        """Fusionne un delta d'extraction dans les données connues."""
+        merged = dict(known)
+
+        for field in self.SCALAR_FIELDS:
+            if delta.get(field) not in (None, "", "null"):
+                merged[field] = delta[field]
+
+        for field in self.LIST_FIELDS:
+            items = list(known.get(field, []))
+            seen = {str(item).strip().lower() for item in items}
+            for item in delta.get(field) or []:
+                key = str(item).strip().lower()
+                if key and key not in seen:
+                    items.append(item)
+                    seen.add(key)
+            merged[field] = items
+
+        constantes = dict(known.get("constantes", {}))
+        for field, value in (delta.get("constantes") or {}).items():
+            if field in self.CONSTANTES_FIELDS and value is not None:
+                constantes[field] = value
+        merged["constantes"] = constantes
+
+        return merged
+
     def _extract_json_from_response(self, response: str) -> dict:
         """Extrait JSON de la réponse."""
         # Nettoyer markdown
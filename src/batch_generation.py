@@ -0,0 +1,275 @@
+"""
+Génération de conversations en lot (N simulations en parallèle)
+
+Chaque simulation tourne dans un thread du pool avec son propre
+SimulationWorkflow ; tous partagent le même provider, derrière une limite de
+débit globale. Chaque enregistrement export_for_ml() est ajouté au fichier
+JSONL dès qu'il est prêt : une génération interrompue reprend là où elle
+s'est arrêtée (les case_id déjà présents sont ignorés).
+
+Usage:
+    python -m src.batch_generation -n 1000 -o data/generated/conversations.jsonl \\
+        --workers 8 --rate 5 --parquet
+"""
+
+import argparse
+import json
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional
+
+from src.llm.base_llm import BaseLLMProvider
+from src.llm.rate_limit import RateLimitedProvider, RateLimiter
+from src.simulation_workflow import SimulationWorkflow
+
+
+class BatchGenerator:
+    """Exécute N simulations indépendantes avec un pool de workers borné."""
+
+    def __init__(
+        self,
+        llm_provider: BaseLLMProvider,
+        max_turns: int = 8,
+        workers: int = 4,
+        rate_limit: Optional[float] = None,
+        output_path: Optional[str] = None,
+        track: bool = True,
+    ):
+        """
+        Args:
+            llm_provider: Provider partagé par toutes les simulations
+            max_turns: Nombre max de questions par conversation
+            workers: Simulations menées en parallèle
+            rate_limit: Appels LLM par seconde, tous workers confondus (None = illimité)
+            output_path: Fichier JSONL de sortie (None = pas d'écriture)
+            track: Enregistrer les durées dans le MetricsTracker
+        """
+        if workers < 1:
+            raise ValueError("workers doit être >= 1")
+
+        if rate_limit:
+            llm_provider = RateLimitedProvider(llm_provider, RateLimiter(rate_limit))
+
+        self.llm = llm_provider
+        self.max_turns = max_turns
+        self.workers = workers
+        self.output_path = Path(output_path) if output_path else None
+        self.track = track
+
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Reprise
+    # ------------------------------------------------------------------
+
+    def completed_case_ids(self) -> set:
+        """case_id déjà présents dans le fichier de sortie."""
+        done = set()
+        if not self.output_path or not self.output_path.exists():
+            return done
+
+        with open(self.output_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    done.add(json.loads(line)["case_id"])
+                except (json.JSONDecodeError, KeyError):
+                    continue  # ligne tronquée par une interruption
+        return done
+
+    # ------------------------------------------------------------------
+    # Exécution
+    # ------------------------------------------------------------------
+
+    def _workflow(self) -> SimulationWorkflow:
+        """Un SimulationWorkflow par thread (les agents ont un état par conversation)."""
+        workflow = getattr(self._local, "workflow", None)
+        if workflow is None:
+            workflow = SimulationWorkflow(self.llm, max_turns=self.max_turns, verbose=False)
+            self._local.workflow = workflow
+        return workflow
+
+    def _run_case(self, case_id: int, pathology: Optional[str]) -> Dict:
+        """Une simulation complète -> enregistrement export_for_ml enrichi."""
+        workflow = self._workflow()
+        start = time.time()
+        try:
+            result = workflow.run_simulation(pathology=pathology)
+            record = workflow.export_for_ml()
+            record.update(
+                {
+                    "case_id": case_id,
+                    "completeness": result["completeness"]["score"],
+                    "duration": time.time() - start,
+                    "generated_at": datetime.now().isoformat(),
+                }
+            )
+            return record
+        finally:
+            workflow.reset()
+
+    def _write(self, record: Dict):
+        if not self.output_path:
+            return
+        with self._write_lock:
+            with open(self.output_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+
+    def _track(self, duration: float):
+        if not self.track:
+            return
+        try:
+            from src.monitoring.metrics_tracker import get_tracker
+
+            tracker = get_tracker()
+            tracker.track_latency("Generation", "conversation", duration)
+            tracker.track_api_call(
+                "mistral", getattr(self.llm, "model_name", ""), 500, 300, duration, True
+            )
+        except Exception:
+            pass
+
+    def iter_run(
+        self, n: int, pathologies: Optional[List[str]] = None, resume: bool = True
+    ) -> Iterator[Dict]:
+        """
+        Lance les simulations et produit un événement à chaque fin de cas.
+
+        Args:
+            n: Nombre total de cas (case_id 0..n-1)
+            pathologies: Pathologies imposées, réparties en boucle (None = aléatoires)
+            resume: Ignorer les case_id déjà présents dans le fichier de sortie
+
+        Yields:
+            {"case_id", "ok", "record" | "error", "done", "total", "elapsed"}
+        """
+        if self.output_path:
+            self.output_path.parent.mkdir(parents=True, exist_ok=True)
+
+        done_ids = self.completed_case_ids() if resume else set()
+        todo = [i for i in range(n) if i not in done_ids]
+        cases = iter(todo)
+        total = len(todo)
+        finished = 0
+        start = time.time()
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            pending = {}
+            while True:
+                # Au plus 2 cas en attente par worker
+                for case_id in cases:
+                    pathology = pathologies[case_id % len(pathologies)] if pathologies else None
+                    pending[executor.submit(self._run_case, case_id, pathology)] = case_id
+                    if len(pending) >= self.workers * 2:
+                        break
+
+                if not pending:
+                    return
+
+                completed, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in completed:
+                    case_id = pending.pop(future)
+                    finished += 1
+                    event = {
+                        "case_id": case_id,
+                        "done": finished,
+                        "total": total,
+                        "elapsed": time.time() - start,
+                    }
+                    try:
+                        record = future.result()
+                    except Exception as e:
+                        event.update({"ok": False, "error": str(e)})
+                    else:
+                        self._write(record)
+                        self._track(record["duration"])
+                        event.update({"ok": True, "record": record})
+                    yield event
+
+    def run(
+        self,
+        n: int,
+        pathologies: Optional[List[str]] = None,
+        resume: bool = True,
+        progress_callback: Optional[Callable[[Dict], None]] = None,
+    ) -> Dict:
+        """Exécute le lot complet et retourne un résumé."""
+        summary = {"requested": n, "generated": 0, "failed": 0, "errors": [], "elapsed": 0.0}
+
+        for event in self.iter_run(n, pathologies, resume):
+            if event["ok"]:
+                summary["generated"] += 1
+            else:
+                summary["failed"] += 1
+                summary["errors"].append({"case_id": event["case_id"], "error": event["error"]})
+            summary["elapsed"] = event["elapsed"]
+            if progress_callback:
+                progress_callback(event)
+
+        summary["skipped"] = n - summary["generated"] - summary["failed"]
+        return summary
+
+
+def export_parquet(jsonl_path: str, parquet_path: Optional[str] = None) -> str:
+    """Convertit le JSONL produit en Parquet (nécessite pyarrow ou fastparquet)."""
+    import pandas as pd
+
+    parquet_path = parquet_path or str(Path(jsonl_path).with_suffix(".parquet"))
+    df = pd.read_json(jsonl_path, lines=True)
+    df.to_parquet(parquet_path, index=False)
+    return parquet_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Génération de conversations en lot")
+    parser.add_argument("-n", "--num", type=int, default=10, help="Nombre de conversations")
+    parser.add_argument("-o", "--output", default="data/generated/conversations.jsonl")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--rate", type=float, default=None, help="Appels LLM max par seconde")
+    parser.add_argument("--max-turns", type=int, default=8)
+    parser.add_argument("--provider", default="mistral")
+    parser.add_argument("--model", default="mistral-large-latest")
+    parser.add_argument("--pathologies", default=None, help="Fichier texte, une pathologie par ligne")
+    parser.add_argument("--no-resume", action="store_true", help="Ignorer le fichier existant")
+    parser.add_argument("--no-track", action="store_true", help="Ne pas alimenter le monitoring")
+    parser.add_argument("--parquet", action="store_true", help="Exporter aussi en Parquet")
+    args = parser.parse_args()
+
+    from src.llm.llm_factory import LLMFactory
+
+    pathologies = None
+    if args.pathologies:
+        with open(args.pathologies, "r", encoding="utf-8") as f:
+            pathologies = [line.strip() for line in f if line.strip()]
+
+    generator = BatchGenerator(
+        LLMFactory.create(args.provider, args.model),
+        max_turns=args.max_turns,
+        workers=args.workers,
+        rate_limit=args.rate,
+        output_path=args.output,
+        track=not args.no_track,
+    )
+
+    def progress(event: Dict):
+        status = "OK" if event["ok"] else f"ERREUR: {event['error']}"
+        print(f"[{event['done']}/{event['total']}] cas {event['case_id']} - {status} "
+              f"({event['elapsed']:.0f}s)")
+
+    summary = generator.run(
+        args.num, pathologies, resume=not args.no_resume, progress_callback=progress
+    )
+    print(
+        f"\n[OK] {summary['generated']} generee(s), {summary['failed']} echec(s), "
+        f"{summary['skipped']} deja presente(s) en {summary['elapsed']:.0f}s -> {args.output}"
+    )
+
+    if args.parquet:
+        print(f"[OK] Parquet : {export_parquet(args.output)}")
+
+
+if __name__ == "__main__":
+    main()
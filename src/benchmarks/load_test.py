@@ -0,0 +1,457 @@
+"""
+Test de charge : sessions de triage simultanées sur un seul processus.
+
+Chaque session est un TriageChatbotAPI qui déroule une conversation scriptée
+(identité -> symptômes -> constantes -> questions de suivi) puis une
+prédiction MLTriagePredictor.predict. Le LLM est le provider factice
+(latence configurable, aucun appel réseau) ; la recherche RAG et le modèle
+ML sont ceux du registre (index et modèle locaux). Les sessions tournent
+dans des threads, comme les sessions Streamlit d'un même serveur.
+
+Pour chaque niveau de concurrence : débit, latence des tours
+(p50/p95/p99), premier fragment en streaming, prédiction, et temps par
+composant relevé par les spans de src.monitoring.tracing. La montée en
+charge donne la courbe de saturation ; comparé à une référence, le script
+échoue (code 1) en cas de régression.
+
+Usage:
+    python -m src.benchmarks.load_test --concurrency 1,2,4,8,16 --stream
+    python -m src.benchmarks.load_test --save-baseline data/benchmarks/load_baseline.json
+    python -m src.benchmarks.load_test --baseline data/benchmarks/load_baseline.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# Conversations scriptées (messages du patient, dans l'ordre)
+SCRIPTS = [
+    [
+        "Marie, 67 ans, femme",
+        "J'ai mal à la poitrine et je suis essoufflée",
+        "37.8°C",
+        "118 bpm",
+        "95/60",
+        "89%",
+        "26/min",
+        "Depuis ce matin, ça serre dans la poitrine",
+        "Non, pas d'antécédent cardiaque",
+    ],
+    [
+        "Paul, 34 ans, homme",
+        "Mal à la tête et de la fièvre depuis hier",
+        "39.2°C",
+        "96 bpm",
+        "125/80",
+        "98%",
+        "18/min",
+        "Un peu de raideur dans la nuque",
+        "Non",
+    ],
+    [
+        "Lina, 25 ans, femme",
+        "J'ai de la toux et mal à la gorge",
+        "38.1°C",
+        "88 bpm",
+        "110/70",
+        "97%",
+        "20/min",
+        "Depuis trois jours",
+        "Non, rien d'autre",
+    ],
+]
+
+# Composants suivis dans la ventilation (spans de src.monitoring.tracing)
+COMPONENTS = [
+    "chat.turn",
+    "chat.extract",
+    "rag.chunks",
+    "rag.retrieve",
+    "lexical.search",
+    "vector.search",
+    "embedding.encode",
+    "prompt.assemble",
+    "llm.generate",
+    "llm.stream",
+    "predict",
+    "predict.score",
+    "predict.rag",
+]
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """Percentile par rang le plus proche (q entre 0 et 100), None si vide."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def _latency_stats(values_s: List[float]) -> Dict:
+    """Résumé d'une série de durées (secondes) en millisecondes."""
+    ms = [v * 1000 for v in values_s]
+
+    def fmt(value):
+        return round(value, 1) if value is not None else None
+
+    return {
+        "count": len(ms),
+        "mean_ms": fmt(sum(ms) / len(ms)) if ms else None,
+        "p50_ms": fmt(percentile(ms, 50)),
+        "p95_ms": fmt(percentile(ms, 95)),
+        "p99_ms": fmt(percentile(ms, 99)),
+        "max_ms": fmt(max(ms)) if ms else None,
+    }
+
+
+class LoadTest:
+    """Déroule des sessions de triage en parallèle et mesure chaque niveau de charge."""
+
+    def __init__(
+        self,
+        ttft: float = 0.3,
+        token_delay: float = 0.02,
+        stream: bool = False,
+        think_time: float = 0.0,
+        use_rag: bool = True,
+        predict: bool = True,
+        trace: bool = True,
+        max_questions: int = 10,
+    ):
+        """
+        Args:
+            ttft: Délai simulé avant le premier token du LLM (s)
+            token_delay: Délai simulé entre deux tokens (s)
+            stream: Tours en streaming (chat_stream, mesure du premier fragment)
+            think_time: Pause entre deux messages d'un patient (s)
+            use_rag: Recherche RAG réelle (registre) ; sinon sans retriever
+            predict: Prédiction ML en fin de conversation
+            trace: Ventilation par composant via les spans
+            max_questions: Passé au chatbot (au moins la longueur des scripts)
+        """
+        self.stream = stream
+        self.think_time = think_time
+        self.trace = trace
+        self.max_questions = max_questions
+
+        from src.llm.llm_factory import LLMFactory
+
+        # Provider partagé par les sessions, comme le provider Mistral en production
+        self.llm = LLMFactory.create(
+            "fake", "fake-model", cache_mode="off", ttft=ttft, token_delay=token_delay
+        )
+        self.config = {
+            "ttft_s": ttft,
+            "token_delay_s": token_delay,
+            "stream": stream,
+            "think_time_s": think_time,
+        }
+
+        self.retriever = None
+        self.predictor = None
+        self._load_stack(use_rag, predict)
+        self.config["rag"] = self.retriever is not None
+        self.config["predict"] = self.predictor is not None
+
+    def _load_stack(self, use_rag: bool, predict: bool) -> None:
+        """Charge index et modèle via le registre (hors mesure), puis les réchauffe."""
+        from src.registry import get_registry
+
+        registry = get_registry()
+        if use_rag:
+            try:
+                self.retriever = registry.retriever()
+                self.retriever.retrieve_with_scores("douleur thoracique", top_k=3)
+            except Exception as e:
+                print(f"[WARN] RAG indisponible, sessions sans recherche ({e})")
+                self.retriever = None
+        if predict:
+            try:
+                self.predictor = registry.predictor(with_rag=self.retriever is not None)
+            except Exception as e:
+                print(f"[WARN] Modele ML indisponible, sessions sans prediction ({e})")
+                self.predictor = None
+
+    def _new_chatbot(self):
+        from src.rag.chatbot import TriageChatbotAPI
+
+        # Messages de démarrage du chatbot inutiles ici (une instance par session)
+        with contextlib.redirect_stdout(io.StringIO()):
+            return TriageChatbotAPI(
+                retriever=self.retriever,
+                llm_provider=self.llm,
+                max_questions=self.max_questions,
+            )
+
+    def run_session(self, script: List[str], chatbot) -> Dict:
+        """Une conversation complète : latences des tours, du premier fragment et de la prédiction."""
+        turns, ttfts, errors = [], [], 0
+        chatbot.start()
+
+        for i, message in enumerate(script):
+            if i and self.think_time:
+                time.sleep(self.think_time)
+            start = time.perf_counter()
+            try:
+                if self.stream:
+                    first = None
+                    for _ in chatbot.chat_stream(message):
+                        if first is None:
+                            first = time.perf_counter() - start
+                    ttfts.append(first if first is not None else time.perf_counter() - start)
+                else:
+                    chatbot.chat(message)
+            except Exception as e:
+                errors += 1
+                print(f"[ERREUR] Tour en echec : {e}")
+                continue
+            turns.append(time.perf_counter() - start)
+
+        prediction = None
+        if self.predictor is not None:
+            start = time.perf_counter()
+            try:
+                self.predictor.predict(chatbot.get_summary())
+                prediction = time.perf_counter() - start
+            except Exception as e:
+                errors += 1
+                print(f"[ERREUR] Prediction en echec : {e}")
+
+        return {"turns": turns, "ttfts": ttfts, "prediction": prediction, "errors": errors}
+
+    def run_level(self, concurrency: int, sessions: int) -> Dict:
+        """
+        `sessions` conversations exécutées par `concurrency` sessions simultanées.
+
+        Returns:
+            {"concurrency", "sessions", "turns", "errors", "wall_s",
+             "turns_per_s", "sessions_per_s", "turn", "ttft", "prediction", "components"}
+        """
+        from src.monitoring import metrics_tracker
+        from src.monitoring.tracing import Tracer, load_spans, set_tracer
+
+        sessions = max(sessions, concurrency)
+        chatbots = [self._new_chatbot() for _ in range(sessions)]
+        scripts = [SCRIPTS[i % len(SCRIPTS)] for i in range(sessions)]
+
+        # Métriques et traces du test isolées de celles du projet
+        workdir = tempfile.mkdtemp(prefix="load_test_")
+        trace_file = os.path.join(workdir, "traces.jsonl")
+        tracker = metrics_tracker.MetricsTracker(data_dir=workdir, storage="jsonl")
+        previous_tracker = metrics_tracker.set_tracker(tracker)
+        previous_tracer = set_tracer(Tracer(trace_file, enabled=self.trace))
+
+        start = time.perf_counter()
+        try:
+            with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="session") as pool:
+                results = list(pool.map(self.run_session, scripts, chatbots))
+        finally:
+            wall = time.perf_counter() - start
+            tracer = set_tracer(previous_tracer)
+            metrics_tracker.set_tracker(previous_tracker)
+            tracer.flush()
+            tracker.close()
+
+        spans = load_spans(trace_file) if os.path.exists(trace_file) else []
+        turns = [t for r in results for t in r["turns"]]
+        predictions = [r["prediction"] for r in results if r["prediction"] is not None]
+
+        return {
+            "concurrency": concurrency,
+            "sessions": sessions,
+            "turns": len(turns),
+            "errors": sum(r["errors"] for r in results),
+            "wall_s": round(wall, 3),
+            "turns_per_s": round(len(turns) / wall, 2) if wall else 0.0,
+            "sessions_per_s": round(sessions / wall, 3) if wall else 0.0,
+            "turn": _latency_stats(turns),
+            "ttft": _latency_stats([t for r in results for t in r["ttfts"]]),
+            "prediction": _latency_stats(predictions),
+            "components": self._breakdown(spans, len(turns)),
+        }
+
+    @staticmethod
+    def _breakdown(spans: List[Dict], turns: int) -> Dict[str, Dict]:
+        """Temps propre par composant : total, moyenne par appel et par tour."""
+        from src.monitoring.tracing import summarize
+
+        breakdown = {}
+        for entry in summarize(spans):
+            if entry["name"] not in COMPONENTS:
+                continue
+            breakdown[entry["name"]] = {
+                "count": entry["count"],
+                "self_ms": entry["self_ms"],
+                "mean_ms": entry["mean_ms"],
+                "self_ms_per_turn": round(entry["self_ms"] / turns, 2) if turns else None,
+            }
+        return breakdown
+
+    def ramp(self, levels: List[int], sessions_per_worker: int = 2) -> List[Dict]:
+        """Mesure chaque niveau de concurrence, dans l'ordre croissant."""
+        results = []
+        for concurrency in sorted(levels):
+            print(f"[INFO] {concurrency} session(s) simultanee(s)...")
+            results.append(self.run_level(concurrency, concurrency * sessions_per_worker))
+        return results
+
+
+def saturation_point(levels: List[Dict], min_gain: float = 0.1) -> Optional[int]:
+    """
+    Concurrence au-delà de laquelle le débit ne progresse plus.
+
+    Premier niveau dont le suivant gagne moins de `min_gain` (relatif) en
+    tours/s ; None si le débit progresse encore au dernier niveau mesuré.
+    """
+    for current, following in zip(levels, levels[1:]):
+        if following["turns_per_s"] < current["turns_per_s"] * (1 + min_gain):
+            return current["concurrency"]
+    return None
+
+
+def compare(
+    levels: List[Dict],
+    baseline: Dict,
+    tolerance: float = 0.25,
+    slack_ms: float = 20.0,
+) -> List[str]:
+    """
+    Régressions par rapport à une référence, niveau par niveau.
+
+    Un niveau régresse si son p95 de tour dépasse référence * (1 + tolerance)
+    + slack_ms, si son débit passe sous référence * (1 - tolerance), ou s'il
+    produit des erreurs absentes de la référence.
+    """
+    reference = {level["concurrency"]: level for level in baseline.get("levels", [])}
+    regressions = []
+    for level in levels:
+        ref = reference.get(level["concurrency"])
+        if not ref:
+            continue
+        c = level["concurrency"]
+        p95, ref_p95 = level["turn"]["p95_ms"], ref["turn"]["p95_ms"]
+        if p95 is not None and ref_p95 is not None:
+            limit = ref_p95 * (1 + tolerance) + slack_ms
+            if p95 > limit:
+                regressions.append(
+                    f"x{c}: p95 {p95:.0f} ms > {limit:.0f} ms (reference {ref_p95:.0f} ms)"
+                )
+        floor = ref["turns_per_s"] * (1 - tolerance)
+        if level["turns_per_s"] < floor:
+            regressions.append(
+                f"x{c}: {level['turns_per_s']:.1f} tours/s < {floor:.1f} "
+                f"(reference {ref['turns_per_s']:.1f})"
+            )
+        if level["errors"] > ref.get("errors", 0):
+            regressions.append(f"x{c}: {level['errors']} erreur(s)")
+    return regressions
+
+
+def _ms(value: Optional[float]) -> str:
+    return f"{value:.0f}" if value is not None else "-"
+
+
+def print_report(report: Dict) -> None:
+    levels = report["levels"]
+    print(
+        f"\n{'sessions':>8} {'tours/s':>8} {'p50':>7} {'p95':>7} {'p99':>7}"
+        f" {'ttft95':>7} {'pred95':>7} {'err':>4}"
+    )
+    print("-" * 64)
+    for level in levels:
+        print(
+            f"{level['concurrency']:>8} {level['turns_per_s']:>8.1f}"
+            f" {_ms(level['turn']['p50_ms']):>7} {_ms(level['turn']['p95_ms']):>7}"
+            f" {_ms(level['turn']['p99_ms']):>7} {_ms(level['ttft']['p95_ms']):>7}"
+            f" {_ms(level['prediction']['p95_ms']):>7} {level['errors']:>4}"
+        )
+    print("(latences en ms)")
+
+    last = levels[-1]
+    if last["components"]:
+        print(f"\nTemps propre par tour et par composant (x{last['concurrency']}) :")
+        ranked = sorted(
+            last["components"].items(), key=lambda item: item[1]["self_ms"], reverse=True
+        )
+        for name, c in ranked:
+            print(
+                f"  {name:<20} {c['self_ms_per_turn']:>8.1f} ms/tour"
+                f"  ({c['count']} appels, {c['mean_ms']:.1f} ms/appel)"
+            )
+
+    saturation = report.get("saturation")
+    if saturation is not None:
+        print(f"\n[INFO] Debit plafonne a partir de {saturation} session(s) simultanee(s)")
+    else:
+        print("\n[INFO] Pas de saturation du debit sur les niveaux mesures")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Test de charge des sessions de triage")
+    parser.add_argument("--concurrency", default="1,2,4,8,16", help="Niveaux, ex: 1,2,4,8")
+    parser.add_argument("--sessions-per-worker", type=int, default=2)
+    parser.add_argument("--ttft", type=float, default=0.3, help="Premier token simulé (s)")
+    parser.add_argument("--token-delay", type=float, default=0.02, help="Délai entre tokens (s)")
+    parser.add_argument("--think-time", type=float, default=0.0, help="Pause entre messages (s)")
+    parser.add_argument("--stream", action="store_true", help="Tours en streaming")
+    parser.add_argument("--no-rag", action="store_true", help="Sans recherche RAG")
+    parser.add_argument("--no-predict", action="store_true", help="Sans prédiction ML")
+    parser.add_argument("--no-trace", action="store_true", help="Sans ventilation par composant")
+    parser.add_argument("--output", default=None, help="Écrire le rapport en JSON")
+    parser.add_argument("--baseline", default=None, help="Référence JSON à comparer")
+    parser.add_argument("--save-baseline", default=None, help="Enregistrer le rapport comme référence")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Dégradation relative tolérée")
+    parser.add_argument("--slack-ms", type=float, default=20.0, help="Marge absolue (bruit de mesure)")
+    args = parser.parse_args()
+
+    levels = [int(c) for c in args.concurrency.split(",") if c.strip()]
+    test = LoadTest(
+        ttft=args.ttft,
+        token_delay=args.token_delay,
+        stream=args.stream,
+        think_time=args.think_time,
+        use_rag=not args.no_rag,
+        predict=not args.no_predict,
+        trace=not args.no_trace,
+    )
+    results = test.ramp(levels, sessions_per_worker=args.sessions_per_worker)
+    report = {
+        "config": test.config,
+        "levels": results,
+        "saturation": saturation_point(results),
+    }
+    print_report(report)
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2, ensure_ascii=False)
+            print(f"\n[OK] Rapport enregistre : {path}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("config") != report["config"]:
+            print("[WARN] Configuration differente de la reference, comparaison indicative")
+        regressions = compare(results, baseline, args.tolerance, args.slack_ms)
+        if regressions:
+            print("\n[ERREUR] Regressions sous charge :")
+            for line in regressions:
+                print(f"  - {line}")
+            sys.exit(1)
+        print("\n[OK] Aucune regression par rapport a la reference")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+"""
+Benchmark du démarrage : temps d'import par module.
+
+Chaque cible est importée dans un interpréteur neuf avec `-X importtime` ;
+on relève le temps cumulé de la cible, les modules les plus coûteux et les
+dépendances lourdes chargées (chromadb, torch, mistralai...). Comparé à une
+référence, le script échoue (code 1) si une cible ralentit au-delà de la
+tolérance ou si elle charge une dépendance lourde qu'elle ne chargeait pas.
+
+Usage:
+    python -m src.benchmarks.startup --save-baseline data/benchmarks/startup_baseline.json
+    python -m src.benchmarks.startup --baseline data/benchmarks/startup_baseline.json
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+ROOT_DIR = Path(__file__).parent.parent.parent
+
+DEFAULT_TARGETS = [
+    "src",
+    "src.llm",
+    "src.rag",
+    "src.monitoring",
+    "src.registry",
+    "src.rag.chatbot",
+    "src.rag.predictor",
+    "src.rag.vector_store",
+    "src.simulation_workflow",
+]
+
+# Dépendances dont l'apparition dans une cible est signalée
+HEAVY_PACKAGES = [
+    "chromadb",
+    "torch",
+    "sentence_transformers",
+    "transformers",
+    "mistralai",
+    "httpx",
+    "sklearn",
+    "joblib",
+    "pandas",
+    "plotly",
+    "numpy",
+    "streamlit",
+]
+
+
+def parse_importtime(stderr: str) -> List[Dict]:
+    """
+    Lignes `import time: self [us] | cumulative | imported package`.
+
+    Returns:
+        [{"module", "self_us", "cumulative_us", "depth"}] dans l'ordre de sortie
+    """
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            self_us, cumulative_us, raw_name = line[len("import time:"):].split("|", 2)
+            entries.append(
+                {
+                    "module": raw_name.strip(),
+                    "self_us": int(self_us),
+                    "cumulative_us": int(cumulative_us),
+                    # Indentation : un niveau = 2 espaces après le premier
+                    "depth": (len(raw_name) - len(raw_name.lstrip()) - 1) // 2,
+                }
+            )
+        except ValueError:
+            continue
+    return entries
+
+
+def _importtime(code: str, python: str) -> tuple:
+    """Exécute `code` avec -X importtime : (processus, durée murale en ms)."""
+    env = {**os.environ, "PYTHONPATH": str(ROOT_DIR), "PYTHONDONTWRITEBYTECODE": "1"}
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [python, "-X", "importtime", "-c", code],
+        cwd=str(ROOT_DIR),
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    return proc, (time.perf_counter() - start) * 1000
+
+
+_interpreter_modules: Dict[str, set] = {}
+
+
+def _startup_modules(python: str) -> set:
+    """Modules importés par l'interpréteur seul (site, .pth...), exclus des mesures."""
+    if python not in _interpreter_modules:
+        proc, _ = _importtime("pass", python)
+        _interpreter_modules[python] = {e["module"] for e in parse_importtime(proc.stderr)}
+    return _interpreter_modules[python]
+
+
+def measure_target(target: str, python: str = sys.executable) -> Dict:
+    """Importe `target` dans un interpréteur neuf et résume le coût."""
+    proc, wall_ms = _importtime(f"import {target}", python)
+
+    startup = _startup_modules(python)
+    entries = [e for e in parse_importtime(proc.stderr) if e["module"] not in startup]
+    loaded = {e["module"] for e in entries}
+    target_entry = next((e for e in reversed(entries) if e["module"] == target), None)
+
+    result = {
+        "ok": proc.returncode == 0,
+        "wall_ms": round(wall_ms, 1),
+        "import_ms": (
+            round(target_entry["cumulative_us"] / 1000, 1)
+            if target_entry and proc.returncode == 0
+            else None
+        ),
+        "modules": len(entries),
+        "heavy": [pkg for pkg in HEAVY_PACKAGES if pkg in loaded],
+        "top": [
+            [e["module"], round(e["cumulative_us"] / 1000, 1)]
+            for e in sorted(
+                (e for e in entries if e["depth"] <= 1 and e["module"] != target),
+                key=lambda e: e["cumulative_us"],
+                reverse=True,
+            )[:10]
+        ],
+    }
+    if proc.returncode != 0:
+        result["error"] = (proc.stderr.strip().splitlines() or ["?"])[-1]
+    return result
+
+
+def run(targets: List[str], repeat: int = 3) -> Dict[str, Dict]:
+    """Mesure chaque cible `repeat` fois et garde le meilleur temps (moins de bruit)."""
+    results = {}
+    for target in targets:
+        runs = [measure_target(target) for _ in range(repeat)]
+        timed = [r for r in runs if r["import_ms"] is not None]
+        results[target] = min(timed, key=lambda r: r["import_ms"]) if timed else runs[0]
+    return results
+
+
+def compare(
+    results: Dict[str, Dict],
+    baseline: Dict[str, Dict],
+    tolerance: float = 0.25,
+    slack_ms: float = 20.0,
+) -> List[str]:
+    """
+    Régressions par rapport à la référence.
+
+    Une cible régresse si son temps d'import dépasse
+    référence * (1 + tolerance) + slack_ms, si elle charge une dépendance
+    lourde absente de la référence, ou si son import échoue désormais.
+    """
+    regressions = []
+    for target, result in results.items():
+        ref = baseline.get(target)
+        if not ref or not ref.get("ok"):
+            continue
+        if not result.get("ok"):
+            regressions.append(f"{target}: import en echec ({result.get('error')})")
+            continue
+        if result.get("import_ms") is not None and ref.get("import_ms") is not None:
+            limit = ref["import_ms"] * (1 + tolerance) + slack_ms
+            if result["import_ms"] > limit:
+                regressions.append(
+                    f"{target}: {result['import_ms']:.0f} ms > {limit:.0f} ms "
+                    f"(reference {ref['import_ms']:.0f} ms)"
+                )
+        new_heavy = sorted(set(result.get("heavy", [])) - set(ref.get("heavy", [])))
+        if new_heavy:
+            regressions.append(f"{target}: nouvelles dependances lourdes {new_heavy}")
+    return regressions
+
+
+def print_report(results: Dict[str, Dict]) -> None:
+    print(f"\n{'Cible':<28} {'import':>9} {'modules':>8}  dependances lourdes")
+    print("-" * 80)
+    for target, r in results.items():
+        import_ms = f"{r['import_ms']:.0f} ms" if r["import_ms"] is not None else "echec"
+        print(f"{target:<28} {import_ms:>9} {r['modules']:>8}  {', '.join(r['heavy']) or '-'}")
+        if not r["ok"]:
+            print(f"{'':<28} [ERREUR] {r.get('error')}")
+        for module, ms in r["top"][:3]:
+            print(f"{'':<28}   {module:<36} {ms:>7.0f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Temps d'import des modules du projet")
+    parser.add_argument("targets", nargs="*", default=DEFAULT_TARGETS)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--baseline", default=None, help="Référence JSON à comparer")
+    parser.add_argument("--save-baseline", default=None, help="Enregistrer les mesures comme référence")
+    parser.add_argument("--output", default=None, help="Écrire les mesures en JSON")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Ralentissement relatif toléré")
+    parser.add_argument("--slack-ms", type=float, default=20.0, help="Marge absolue (bruit de mesure)")
+    args = parser.parse_args()
+
+    results = run(args.targets, repeat=args.repeat)
+    print_report(results)
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(results, f, indent=2, ensure_ascii=False)
+            print(f"\n[OK] Mesures enregistrees : {path}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance, args.slack_ms)
+        if regressions:
+            print("\n[ERREUR] Regressions du demarrage :")
+            for line in regressions:
+                print(f"  - {line}")
+            sys.exit(1)
+        print("\n[OK] Aucune regression par rapport a la reference")
+
+
+if __name__ == "__main__":
+    main()
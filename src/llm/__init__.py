@@ -1,5 +1,27 @@
-from .base_llm import BaseLLMProvider
-from .mistral_provider import MistralProvider
-from .llm_factory import LLMFactory
+"""
+Providers LLM. Les sous-modules sont importés au premier accès (PEP 562) :
+`import src.llm` ne charge ni mistralai ni httpx.
+"""
 
-_all__ = ["BaseLLMProvider", "MistralProvider", "LLMFactory"]
+import importlib
+
+_LAZY = {
+    "BaseLLMProvider": ".base_llm",
+    "MistralProvider": ".mistral_provider",
+    "LLMFactory": ".llm_factory",
+    "FakeLLMProvider": ".fake_provider",
+}
+
+__all__ = ["BaseLLMProvider", "MistralProvider", "LLMFactory", "FakeLLMProvider"]
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        value = getattr(importlib.import_module(_LAZY[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
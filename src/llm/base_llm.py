@@ -8,7 +8,7 @@ JUSTIFIER: Pourquoi une abstraction?
 """
 
 from abc import ABC, abstractmethod
-from typing import Optional
+from typing import Callable, Iterator, Optional
 
 
 class BaseLLMProvider(ABC):
@@ -103,6 +103,75 @@ class BaseLLMProvider(ABC):
         """
         pass
 
+    def stream(
+        self,
+        messages: list[dict],
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        on_complete: Optional[Callable[[dict], None]] = None,
+        **kwargs,
+    ) -> Iterator[str]:
+        """
+        Génère une réponse morceau par morceau.
+
+        Par défaut, un seul morceau (réponse complète de generate_with_metadata) :
+        les providers disposant d'un endpoint de streaming la surchargent.
+
+        Args:
+            on_complete: Appelé en fin de flux avec les métadonnées de
+                generate_with_metadata, plus "ttft_ms" (délai du premier morceau)
+
+        Yields:
+            Fragments de texte dans l'ordre de génération
+        """
+        result = self.generate_with_metadata(
+            messages, temperature=temperature, max_tokens=max_tokens, **kwargs
+        )
+        yield result["response"]
+        if on_complete is not None:
+            on_complete({**result, "ttft_ms": result.get("latency_ms", 0.0)})
+
+    async def agenerate(
+        self,
+        messages: list[dict],
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        **kwargs,
+    ) -> str:
+        """
+        Version asynchrone de generate.
+
+        Par défaut, exécute generate dans un thread : les providers disposant
+        d'un client HTTP asynchrone la surchargent.
+        """
+        import asyncio  # déjà chargé dans une boucle : pas de coût à l'import du module
+
+        return await asyncio.to_thread(
+            self.generate, messages, temperature=temperature, max_tokens=max_tokens, **kwargs
+        )
+
+    async def agenerate_with_metadata(
+        self,
+        messages: list[dict],
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        **kwargs,
+    ) -> dict:
+        """Version asynchrone de generate_with_metadata (même format de retour)."""
+        import asyncio
+
+        return await asyncio.to_thread(
+            self.generate_with_metadata,
+            messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            **kwargs,
+        )
+
+    async def aclose(self) -> None:
+        """Libère les ressources asynchrones (connexions HTTP)."""
+        return None
+
     def calculate_cost(self, input_tokens: int, output_tokens: int) -> float:
         """
         Calcule le coût d'une requête.
@@ -0,0 +1,127 @@
+"""
+Provider LLM local, sans réseau, pour les tests et benchmarks.
+
+Réponses déterministes (écho du dernier message utilisateur ou fonction
+fournie), tokens comptés comme pour Mistral, latence simulée : délai avant
+le premier fragment puis délai entre fragments en streaming.
+
+Usage:
+    llm = LLMFactory.create("fake", "fake-model", ttft=0.3, token_delay=0.02)
+    for token in llm.stream(messages):
+        ...
+"""
+
+import time
+from typing import Callable, Iterator, Optional
+
+from .base_llm import BaseLLMProvider
+from .tokenizer import get_token_counter
+
+
+def _echo(messages: list[dict]) -> str:
+    """Réponse par défaut : question reformulée à partir du dernier message utilisateur."""
+    for message in reversed(messages):
+        if message.get("role") == "user":
+            return f"Pouvez-vous préciser : {message.get('content', '')[:120]} ?"
+    return "Pouvez-vous préciser ?"
+
+
+class FakeLLMProvider(BaseLLMProvider):
+    """Provider factice : même interface que MistralProvider, coût nul."""
+
+    def __init__(
+        self,
+        model_name: str = "fake-model",
+        api_key: str = "",
+        temperature: float = 0.7,
+        **kwargs,
+    ) -> None:
+        """
+        Args:
+            model_name: Nom affiché du modèle
+            api_key: Ignorée
+            temperature: Ignorée (réponses déterministes)
+            **kwargs:
+                responder: Fonction messages -> texte (défaut: écho)
+                ttft: Délai avant le premier fragment en secondes (défaut 0)
+                token_delay: Délai entre deux fragments en secondes (défaut 0)
+                max_tokens: Tokens max en sortie (défaut 1000)
+        """
+        self.model_name = model_name
+        self.temperature = temperature
+        self.max_tokens = kwargs.get("max_tokens", 1000)
+        self.responder: Callable[[list[dict]], str] = kwargs.get("responder") or _echo
+        self.ttft = kwargs.get("ttft", 0.0)
+        self.token_delay = kwargs.get("token_delay", 0.0)
+        self.calls = 0
+
+    def _tokens(self, messages: list[dict], max_tokens: Optional[int]) -> list[str]:
+        """Fragments de la réponse (un mot par fragment), tronqués à max_tokens."""
+        words = self.responder(messages).split(" ")
+        words = words[: max_tokens or self.max_tokens]
+        return [w + " " for w in words[:-1]] + words[-1:]
+
+    def _metadata(self, messages: list[dict], response: str, start: float, ttft: float) -> dict:
+        input_tokens = sum(self.count_tokens(m.get("content") or "") for m in messages)
+        output_tokens = self.count_tokens(response)
+        return {
+            "response": response,
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+            "cost": 0.0,
+            "latency_ms": (time.time() - start) * 1000,
+            "ttft_ms": ttft * 1000,
+        }
+
+    def generate(self, messages, temperature=None, max_tokens=None, **kwargs) -> str:
+        return self.generate_with_metadata(messages, temperature, max_tokens, **kwargs)["response"]
+
+    def generate_with_metadata(self, messages, temperature=None, max_tokens=None, **kwargs) -> dict:
+        start = time.time()
+        self.calls += 1
+        tokens = self._tokens(messages, max_tokens)
+        time.sleep(self.ttft + self.token_delay * max(len(tokens) - 1, 0))
+        result = self._metadata(messages, "".join(tokens), start, time.time() - start)
+        result.pop("ttft_ms")
+        return result
+
+    def stream(
+        self,
+        messages: list[dict],
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        on_complete: Optional[Callable[[dict], None]] = None,
+        **kwargs,
+    ) -> Iterator[str]:
+        start = time.time()
+        self.calls += 1
+        tokens = self._tokens(messages, max_tokens)
+        ttft = None
+
+        time.sleep(self.ttft)
+        for i, token in enumerate(tokens):
+            if i and self.token_delay:
+                time.sleep(self.token_delay)
+            if ttft is None:
+                ttft = time.time() - start
+            yield token
+
+        if on_complete is not None:
+            on_complete(self._metadata(messages, "".join(tokens), start, ttft or 0.0))
+
+    def count_tokens(self, text: str) -> int:
+        """Même compteur que MistralProvider."""
+        return get_token_counter().count(text)
+
+    def get_cost_per_token(self) -> dict:
+        return {"input": 0.0, "output": 0.0}
+
+    def get_model_info(self) -> dict:
+        return {
+            "name": self.model_name,
+            "provider": "fake",
+            "context_window": 32000,
+            "supports_function_calling": False,
+            "supports_json_mode": False,
+        }
@@ -1,24 +1,56 @@
+import importlib
+import os
+from typing import Optional
+
 from src.llm.base_llm import BaseLLMProvider
-from .mistral_provider import MistralProvider
+from .response_cache import CachedLLMProvider, cache_from_env
 
 
 class LLMFactory:
     """Factory pour créer le bon provider LLM."""
 
-    _providers: dict[str, type] = {
-        "mistral": MistralProvider,
+    # Classe du provider, ou "module:Classe" importé au premier create()
+    _providers: dict[str, object] = {
+        "mistral": "src.llm.mistral_provider:MistralProvider",
+        "fake": "src.llm.fake_provider:FakeLLMProvider",
     }
 
     @classmethod
-    def create(cls, provider: str, model_name: str, api_key: str = "", **kwargs) -> BaseLLMProvider:
-        """Crée le provider approprié."""
+    def create(
+        cls,
+        provider: str,
+        model_name: str,
+        api_key: str = "",
+        cache_mode: Optional[str] = None,
+        **kwargs,
+    ) -> BaseLLMProvider:
+        """
+        Crée le provider approprié.
+
+        Args:
+            cache_mode: "off", "live", "record" ou "replay" (défaut: LLM_CACHE_MODE, sinon "off")
+        """
         if provider not in cls._providers:
             raise ValueError(
                 f"Provider '{provider}' non supporté. Disponibles: {list(cls._providers.keys())}"
             )
 
+        cache_mode = (cache_mode or os.getenv("LLM_CACHE_MODE") or "off").lower()
+
+        # En replay, aucun appel réseau : la clé API n'est pas nécessaire
+        if cache_mode == "replay" and not (api_key or os.getenv("MISTRAL_API_KEY")):
+            api_key = "replay-only"
+
         provider_class = cls._providers[provider]
-        return provider_class(model_name=model_name, api_key=api_key, **kwargs)
+        if isinstance(provider_class, str):
+            module_name, class_name = provider_class.split(":")
+            provider_class = getattr(importlib.import_module(module_name), class_name)
+            cls._providers[provider] = provider_class
+        llm = provider_class(model_name=model_name, api_key=api_key, **kwargs)
+
+        if cache_mode == "off":
+            return llm
+        return CachedLLMProvider(llm, cache_from_env(), mode=cache_mode)
 
     @classmethod
     def get_available_providers(cls) -> list[str]:
@@ -26,12 +58,12 @@ class LLMFactory:
         return list(cls._providers.keys())
 
     @classmethod
-    def register_provider(cls, name: str, provider_class: type) -> None:
-        """Enregistre un nouveau provider."""
+    def register_provider(cls, name: str, provider_class) -> None:
+        """Enregistre un nouveau provider (classe ou chemin "module:Classe")."""
         cls._providers[name] = provider_class
 
     @classmethod
     def get_default_model(cls, provider: str) -> str:
         """Retourne le modèle par défaut."""
-        defaults = {"openai": "gpt-3.5-turbo", "mistral": "mistral-small-latest"}
+        defaults = {"openai": "gpt-3.5-turbo", "mistral": "mistral-small-latest", "fake": "fake-model"}
         return defaults.get(provider, "")
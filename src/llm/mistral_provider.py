@@ -3,14 +3,21 @@ Implémentation du provider Mistral AI.
 
 JUSTIFIER: Pourquoi Mistral?
 - API simple et rapide
+
+Chemin asynchrone (agenerate): appels HTTP directs via httpx, un pool de
+connexions partagé par boucle asyncio, un sémaphore limitant les requêtes en
+vol, timeout par requête et retries avec backoff exponentiel sur 429/5xx.
 """
 
-from typing import Optional
+from typing import Callable, Iterator, Optional
+import asyncio
+import random
 import time
 import os
-from mistralai import Mistral
+import weakref
 from dotenv import load_dotenv
 from .base_llm import BaseLLMProvider
+from .tokenizer import get_token_counter
 
 # Charger variables d'environnement
 load_dotenv()
@@ -25,6 +32,20 @@ MISTRAL_PRICING = {
 }
 
 
+DEFAULT_BASE_URL = "https://api.mistral.ai"
+
+# Codes HTTP pour lesquels une nouvelle tentative a du sens
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class MistralAPIError(RuntimeError):
+    """Erreur renvoyée par l'API Mistral (après épuisement des retries)."""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
 class MistralProvider(BaseLLMProvider):
     """Provider pour l'API Mistral AI."""
 
@@ -42,18 +63,40 @@ class MistralProvider(BaseLLMProvider):
             model_name: Nom du modèle Mistral
             api_key: Clé API (ou depuis .env)
             temperature: Créativité (0-1)
+            **kwargs:
+                max_tokens: Tokens max en sortie (défaut 1000)
+                base_url: URL de l'API (défaut MISTRAL_BASE_URL ou api.mistral.ai)
+                max_concurrency: Requêtes asynchrones simultanées max (défaut 8)
+                max_retries: Nouvelles tentatives sur 429/5xx/erreur réseau (défaut 4)
+                timeout: Timeout par requête en secondes (défaut 60)
+                backoff_base: Délai initial du backoff exponentiel en secondes (défaut 0.5)
+                backoff_max: Délai max entre deux tentatives en secondes (défaut 20)
         """
         self.model_name = model_name
         self.temperature = temperature
         self.max_tokens = kwargs.get("max_tokens", 1000)
 
+        self.base_url = (
+            kwargs.get("base_url") or os.getenv("MISTRAL_BASE_URL") or DEFAULT_BASE_URL
+        ).rstrip("/")
+        self.max_concurrency = int(
+            kwargs.get("max_concurrency") or os.getenv("MISTRAL_MAX_CONCURRENCY") or 8
+        )
+        self.max_retries = kwargs.get("max_retries", 4)
+        self.timeout = kwargs.get("timeout", 60.0)
+        self.backoff_base = kwargs.get("backoff_base", 0.5)
+        self.backoff_max = kwargs.get("backoff_max", 20.0)
+
         # Récupérer la clé API
         self.api_key = api_key or os.getenv("MISTRAL_API_KEY")
         if not self.api_key:
             raise ValueError(" MISTRAL_API_KEY non trouvée !")
 
-        # Initialiser le client Mistral
-        self.client = Mistral(api_key=self.api_key)
+        # Client Mistral (SDK) créé au premier appel synchrone
+        self._client = None
+
+        # Client HTTP et sémaphore asynchrones, un couple par boucle asyncio
+        self._async_state: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
 
     def generate(
         self,
@@ -119,13 +162,210 @@ class MistralProvider(BaseLLMProvider):
             print(f" Erreur Mistral: {e}")
             raise
 
+    def stream(
+        self,
+        messages: list[dict],
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        on_complete: Optional[Callable[[dict], None]] = None,
+        **kwargs,
+    ) -> Iterator[str]:
+        """Génère une réponse en streaming (SSE), fragment par fragment."""
+        start_time = time.time()
+        ttft_ms = None
+        parts = []
+        usage = None
+
+        try:
+            events = self.client.chat.stream(
+                model=self.model_name,
+                messages=messages,
+                temperature=temperature or self.temperature,
+                max_tokens=max_tokens or self.max_tokens,
+            )
+            with events:
+                for event in events:
+                    chunk = event.data
+                    # L'usage n'est présent que dans le dernier événement
+                    if chunk.usage is not None:
+                        usage = chunk.usage
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta.content
+                    if not isinstance(delta, str) or not delta:
+                        continue
+                    if ttft_ms is None:
+                        ttft_ms = (time.time() - start_time) * 1000
+                    parts.append(delta)
+                    yield delta
+
+        except Exception as e:
+            print(f" Erreur Mistral: {e}")
+            raise
+
+        if on_complete is None:
+            return
+
+        response = "".join(parts)
+        if usage is not None:
+            input_tokens, output_tokens = usage.prompt_tokens, usage.completion_tokens
+        else:
+            input_tokens = sum(self.count_tokens(m.get("content") or "") for m in messages)
+            output_tokens = self.count_tokens(response)
+
+        on_complete(
+            {
+                "response": response,
+                "input_tokens": input_tokens,
+                "output_tokens": output_tokens,
+                "total_tokens": input_tokens + output_tokens,
+                "cost": self.calculate_cost(input_tokens, output_tokens),
+                "latency_ms": (time.time() - start_time) * 1000,
+                "ttft_ms": ttft_ms if ttft_ms is not None else (time.time() - start_time) * 1000,
+            }
+        )
+
+    # ------------------------------------------------------------------
+    # Asynchrone
+    # ------------------------------------------------------------------
+
+    async def agenerate(
+        self,
+        messages: list[dict],
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        **kwargs,
+    ) -> str:
+        """Génère une réponse simple (asynchrone)."""
+        data = await self._achat(messages, temperature, max_tokens)
+        return data["choices"][0]["message"]["content"]
+
+    async def agenerate_with_metadata(
+        self,
+        messages: list[dict],
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        **kwargs,
+    ) -> dict:
+        """Génère une réponse avec métadonnées (asynchrone)."""
+        start_time = time.time()
+
+        data = await self._achat(messages, temperature, max_tokens)
+
+        latency_ms = (time.time() - start_time) * 1000
+
+        usage = data.get("usage") or {}
+        input_tokens = usage.get("prompt_tokens", 0)
+        output_tokens = usage.get("completion_tokens", 0)
+
+        return {
+            "response": data["choices"][0]["message"]["content"],
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": usage.get("total_tokens", input_tokens + output_tokens),
+            "cost": self.calculate_cost(input_tokens, output_tokens),
+            "latency_ms": latency_ms,
+        }
+
+    @property
+    def client(self):
+        """Client du SDK mistralai (import différé : inutile en asynchrone ou en replay)."""
+        if self._client is None:
+            from mistralai import Mistral
+
+            self._client = Mistral(
+                api_key=self.api_key,
+                server_url=self.base_url,
+                timeout_ms=int(self.timeout * 1000),
+            )
+        return self._client
+
+    def _get_async_state(self) -> tuple:
+        """Client httpx et sémaphore de la boucle courante (créés au premier appel)."""
+        import httpx
+
+        loop = asyncio.get_running_loop()
+        state = self._async_state.get(loop)
+        if state is None:
+            client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers={
+                    "Authorization": f"Bearer {self.api_key}",
+                    "Content-Type": "application/json",
+                    "Accept": "application/json",
+                },
+                timeout=httpx.Timeout(self.timeout),
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.max_concurrency,
+                ),
+            )
+            state = (client, asyncio.Semaphore(self.max_concurrency))
+            self._async_state[loop] = state
+        return state
+
+    async def _achat(
+        self, messages: list[dict], temperature: Optional[float], max_tokens: Optional[int]
+    ) -> dict:
+        """POST /v1/chat/completions avec limite de concurrence et retries."""
+        import httpx
+
+        client, semaphore = self._get_async_state()
+        payload = {
+            "model": self.model_name,
+            "messages": messages,
+            "temperature": temperature or self.temperature,
+            "max_tokens": max_tokens or self.max_tokens,
+        }
+
+        attempt = 0
+        while True:
+            retry_after = None
+            try:
+                async with semaphore:
+                    response = await client.post("/v1/chat/completions", json=payload)
+
+                if response.status_code < 400:
+                    return response.json()
+
+                error = MistralAPIError(
+                    f"HTTP {response.status_code}: {response.text[:200]}", response.status_code
+                )
+                if response.status_code not in RETRYABLE_STATUS:
+                    raise error
+                retry_after = response.headers.get("Retry-After")
+
+            except httpx.TransportError as e:
+                # Timeouts, connexions refusées/coupées
+                error = MistralAPIError(f"{type(e).__name__}: {e}")
+
+            if attempt >= self.max_retries:
+                print(f" Erreur Mistral: {error}")
+                raise error
+
+            await asyncio.sleep(self._backoff_delay(attempt, retry_after))
+            attempt += 1
+
+    def _backoff_delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """Délai avant la tentative suivante : Retry-After sinon backoff exponentiel avec jitter."""
+        if retry_after:
+            try:
+                return min(float(retry_after), self.backoff_max)
+            except ValueError:
+                pass
+        delay = min(self.backoff_max, self.backoff_base * (2**attempt))
+        return delay * random.uniform(0.5, 1.0)
+
+    async def aclose(self) -> None:
+        """Ferme le client HTTP asynchrone de la boucle courante."""
+        loop = asyncio.get_running_loop()
+        state = self._async_state.pop(loop, None)
+        if state is not None:
+            await state[0].aclose()
+
     def count_tokens(self, text: str) -> int:
-        """
-        Compte approximativement les tokens.
-        Mistral utilise environ 1 token = 4 caractères pour le français.
-        """
-        # Approximation simple
-        return len(text) // 4
+        """Compte les tokens (tokenizer Tekken local si disponible, cache par texte)."""
+        return get_token_counter().count(text)
 
     def get_cost_per_token(self) -> dict:
         """Retourne le coût par token."""
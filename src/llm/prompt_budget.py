@@ -0,0 +1,140 @@
+"""
+Assemblage des prompts sous un budget de tokens d'entrée.
+
+Le prompt est fait de parties fixes (consigne système, contexte patient,
+question) et de parties optionnelles classées : extraits RAG par pertinence,
+historique du plus récent au plus ancien. Les parties optionnelles sont
+ajoutées tant que le budget le permet ; un extrait RAG qui déborde est
+tronqué s'il en reste assez pour être utile, sinon écarté.
+
+Usage:
+    assembler = PromptAssembler(budgets={"followup": 1000}, default_budget=700)
+    prompt = assembler.assemble("followup", system, render_user, chunks=chunks, history=history)
+    llm.generate(prompt["messages"])
+"""
+
+from typing import Callable, Dict, List, Optional
+
+from .tokenizer import MESSAGE_OVERHEAD, TokenCounter, get_token_counter
+
+
+def format_chunk(index: int, chunk: dict) -> str:
+    """Même présentation que RAGRetriever._format_context (extrait sans metadata : tel quel)."""
+    if "metadata" not in chunk:
+        return chunk["content"]
+    metadata = chunk["metadata"] or {}
+    source = metadata.get("title", "Document")
+    section = metadata.get("section", "")
+    return f"[Source {index}: {source} - {section}]\n{chunk['content']}\n"
+
+
+def chunk_rank(chunk: dict) -> float:
+    """Pertinence d'un extrait (score explicite, sinon distance inversée)."""
+    if "relevance_score" in chunk:
+        return chunk["relevance_score"]
+    if "score" in chunk:
+        return chunk["score"]
+    if "distance" in chunk:
+        return 1 / (1 + chunk["distance"])
+    return 0.0
+
+
+class PromptAssembler:
+    """Construit les messages d'une étape en respectant son budget de tokens."""
+
+    def __init__(
+        self,
+        budgets: Optional[Dict[str, int]] = None,
+        default_budget: int = 700,
+        min_chunk_tokens: int = 60,
+        counter: Optional[TokenCounter] = None,
+    ):
+        """
+        Args:
+            budgets: Budget de tokens d'entrée par étape
+            default_budget: Budget des étapes absentes de `budgets`
+            min_chunk_tokens: En dessous, un extrait tronqué n'est pas gardé
+            counter: Compteur de tokens (défaut: compteur partagé)
+        """
+        self.budgets = dict(budgets or {})
+        self.default_budget = default_budget
+        self.min_chunk_tokens = min_chunk_tokens
+        self.counter = counter or get_token_counter()
+
+    def budget_for(self, step: str) -> int:
+        return self.budgets.get(step, self.default_budget)
+
+    def assemble(
+        self,
+        step: str,
+        system: str,
+        render_user: Callable[[str], str],
+        chunks: Optional[List[dict]] = None,
+        history: Optional[List[str]] = None,
+        chunks_header: str = "\n\nContexte médical de référence:\n",
+    ) -> dict:
+        """
+        Args:
+            step: Étape (choix du budget)
+            system: Consigne système (toujours incluse)
+            render_user: Fonction historique formaté -> message utilisateur
+                (historique vide si aucun n'est retenu)
+            chunks: Extraits RAG {content, metadata, distance|relevance_score}
+            history: Lignes d'historique dans l'ordre chronologique
+            chunks_header: Texte précédant les extraits dans la consigne système
+
+        Returns:
+            {"messages", "input_tokens", "budget", "chunks_used", "chunks_dropped",
+             "history_used", "history_dropped", "truncated"} ; les parties fixes
+            sont gardées même si elles dépassent à elles seules le budget
+        """
+        budget = self.budget_for(step)
+        count = self.counter.count
+
+        fixed = count(system) + count(render_user("")) + 2 * MESSAGE_OVERHEAD
+        remaining = budget - fixed
+
+        # Historique : les échanges les plus récents d'abord
+        kept_history: List[str] = []
+        for line in reversed(history or []):
+            cost = count(line) + 1  # saut de ligne
+            if cost > remaining:
+                break
+            kept_history.insert(0, line)
+            remaining -= cost
+
+        # Extraits RAG : les plus pertinents d'abord
+        kept_chunks: List[str] = []
+        truncated: List[str] = []
+        ranked = sorted(chunks or [], key=chunk_rank, reverse=True)
+        if ranked:
+            remaining -= count(chunks_header)
+        for chunk in ranked:
+            text = format_chunk(len(kept_chunks) + 1, chunk)
+            cost = count(text) + 2  # séparateur
+            if cost > remaining:
+                if remaining - 2 < self.min_chunk_tokens:
+                    continue
+                text = self.counter.truncate(text, remaining - 2)
+                cost = count(text) + 2
+                truncated.append(chunk.get("id", f"chunk-{len(kept_chunks) + 1}"))
+            kept_chunks.append(text)
+            remaining -= cost
+
+        if kept_chunks:
+            system = system + chunks_header + "\n---\n".join(kept_chunks)
+
+        messages = [
+            {"role": "system", "content": system},
+            {"role": "user", "content": render_user("\n".join(kept_history))},
+        ]
+        return {
+            "messages": messages,
+            "input_tokens": self.counter.count_messages(messages),
+            "budget": budget,
+            "chunks_used": len(kept_chunks),
+            "chunks_dropped": len(ranked) - len(kept_chunks),
+            "history_used": len(kept_history),
+            "history_dropped": len(history or []) - len(kept_history),
+            "truncated": truncated,
+        }
@@ -0,0 +1,109 @@
+"""
+Limitation de débit des appels LLM (token bucket).
+
+Un même RateLimiter peut être partagé par plusieurs threads et boucles
+asyncio : c'est la limite globale d'un batch de simulations.
+"""
+
+import asyncio
+import threading
+import time
+from typing import Callable, Iterator, Optional
+
+from .base_llm import BaseLLMProvider
+
+
+class RateLimiter:
+    """Token bucket : `rate` requêtes par seconde en moyenne, rafales jusqu'à `burst`."""
+
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        """
+        Args:
+            rate: Requêtes par seconde autorisées
+            burst: Taille du seau (défaut: max(1, rate))
+        """
+        if rate <= 0:
+            raise ValueError("rate doit être > 0")
+
+        self.rate = rate
+        self.burst = burst or max(1, int(rate))
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Réserve un jeton et retourne le délai à attendre avant de l'utiliser."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self) -> None:
+        """Bloque jusqu'à obtention d'un jeton."""
+        delay = self._reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    async def aacquire(self) -> None:
+        """Version asynchrone de acquire."""
+        delay = self._reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class RateLimitedProvider(BaseLLMProvider):
+    """Enveloppe un provider : chaque appel de génération consomme un jeton du limiter."""
+
+    def __init__(self, provider: BaseLLMProvider, limiter: RateLimiter) -> None:
+        self.provider = provider
+        self.limiter = limiter
+        self.model_name = getattr(provider, "model_name", "")
+
+    def generate(self, messages, temperature=None, max_tokens=None, **kwargs) -> str:
+        self.limiter.acquire()
+        return self.provider.generate(messages, temperature, max_tokens, **kwargs)
+
+    def generate_with_metadata(self, messages, temperature=None, max_tokens=None, **kwargs) -> dict:
+        self.limiter.acquire()
+        return self.provider.generate_with_metadata(messages, temperature, max_tokens, **kwargs)
+
+    def stream(
+        self,
+        messages,
+        temperature=None,
+        max_tokens=None,
+        on_complete: Optional[Callable[[dict], None]] = None,
+        **kwargs,
+    ) -> Iterator[str]:
+        self.limiter.acquire()
+        yield from self.provider.stream(
+            messages, temperature, max_tokens, on_complete=on_complete, **kwargs
+        )
+
+    async def agenerate(self, messages, temperature=None, max_tokens=None, **kwargs) -> str:
+        await self.limiter.aacquire()
+        return await self.provider.agenerate(messages, temperature, max_tokens, **kwargs)
+
+    async def agenerate_with_metadata(
+        self, messages, temperature=None, max_tokens=None, **kwargs
+    ) -> dict:
+        await self.limiter.aacquire()
+        return await self.provider.agenerate_with_metadata(
+            messages, temperature, max_tokens, **kwargs
+        )
+
+    async def aclose(self) -> None:
+        await self.provider.aclose()
+
+    def count_tokens(self, text: str) -> int:
+        return self.provider.count_tokens(text)
+
+    def get_cost_per_token(self) -> dict:
+        return self.provider.get_cost_per_token()
+
+    def get_model_info(self) -> dict:
+        return {**self.provider.get_model_info(), "rate_limit": self.limiter.rate}
@@ -0,0 +1,307 @@
+"""
+Cache disque des réponses LLM (SQLite), avec modes record / replay.
+
+Clé = hash de (modèle, messages, température, max_tokens). Modes:
+- "live"   : lit le cache, appelle l'API sur un miss et ne stocke que les
+             appels déterministes (température <= cache_max_temperature)
+- "record" : appelle toujours l'API et stocke toutes les réponses
+- "replay" : ne lit que le cache, CacheMissError sur un miss (aucun appel
+             API : benchmarks hors ligne à coût nul)
+- "off"    : pas de cache
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Iterator, Optional
+
+from .base_llm import BaseLLMProvider
+
+CACHE_MODES = ("off", "live", "record", "replay")
+
+
+class CacheMissError(RuntimeError):
+    """Réponse absente du cache en mode replay."""
+
+
+def make_cache_key(
+    model: str, messages: list[dict], temperature: Optional[float], max_tokens: Optional[int]
+) -> str:
+    """Hash SHA-256 d'une sérialisation canonique de la requête."""
+    payload = json.dumps(
+        {
+            "model": model,
+            "messages": [{"role": m.get("role"), "content": m.get("content")} for m in messages],
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Stockage SQLite des réponses, éviction par TTL et par taille (LRU)."""
+
+    def __init__(
+        self,
+        path: str = "data/llm_cache/responses.sqlite",
+        ttl: Optional[float] = None,
+        max_entries: int = 10_000,
+    ):
+        """
+        Args:
+            path: Fichier SQLite
+            ttl: Durée de vie d'une entrée en secondes (None = illimitée)
+            max_entries: Nombre max d'entrées (les moins récemment lues sont supprimées)
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                model TEXT,
+                data TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )"""
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses(accessed_at)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[dict]:
+        """Réponse en cache (dict de generate_with_metadata) ou None."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None or (self.ttl is not None and now - row[1] > self.ttl):
+                if row is not None:
+                    self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._conn.commit()
+                self.misses += 1
+                return None
+
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+            return json.loads(row[0])
+
+    def put(self, key: str, model: str, data: dict) -> None:
+        """Stocke une réponse puis applique la limite de taille."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, model, data, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, model, json.dumps(data, ensure_ascii=False), now, now),
+            )
+            self._conn.execute(
+                "DELETE FROM responses WHERE key IN ("
+                "SELECT key FROM responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            self._conn.commit()
+
+    def purge_expired(self) -> int:
+        """Supprime les entrées expirées, retourne leur nombre."""
+        if self.ttl is None:
+            return 0
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM responses WHERE created_at < ?", (time.time() - self.ttl,)
+            )
+            self._conn.commit()
+            return cursor.rowcount
+
+    def clear(self) -> None:
+        """Vide le cache."""
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+            self.hits = self.misses = 0
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def get_stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "path": str(self.path),
+            "entries": self.count(),
+            "max_entries": self.max_entries,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+class CachedLLMProvider(BaseLLMProvider):
+    """Enveloppe un provider avec le cache de réponses."""
+
+    def __init__(
+        self,
+        provider: BaseLLMProvider,
+        cache: ResponseCache,
+        mode: str = "live",
+        cache_max_temperature: float = 0.5,
+    ) -> None:
+        """
+        Args:
+            provider: Provider réel
+            cache: Stockage des réponses
+            mode: "live", "record", "replay" ou "off"
+            cache_max_temperature: En mode live, température max des appels mis en cache
+        """
+        if mode not in CACHE_MODES:
+            raise ValueError(f"Mode de cache inconnu: {mode}. Disponibles: {CACHE_MODES}")
+
+        self.provider = provider
+        self.cache = cache
+        self.mode = mode
+        self.cache_max_temperature = cache_max_temperature
+        self.model_name = getattr(provider, "model_name", "")
+
+    def _key(self, messages, temperature, max_tokens) -> tuple:
+        """Clé sur les paramètres effectifs (défauts du provider compris)."""
+        temperature = temperature or getattr(self.provider, "temperature", None)
+        max_tokens = max_tokens or getattr(self.provider, "max_tokens", None)
+        return make_cache_key(self.model_name, messages, temperature, max_tokens), temperature
+
+    def _lookup(self, key: str) -> Optional[dict]:
+        if self.mode in ("live", "replay"):
+            cached = self.cache.get(key)
+            if cached is not None:
+                return {**cached, "cost": 0.0, "latency_ms": 0.0, "cached": True}
+            if self.mode == "replay":
+                raise CacheMissError(f"Réponse absente du cache (mode replay), clé {key[:12]}")
+        return None
+
+    def _store(self, key: str, temperature: Optional[float], result: dict) -> dict:
+        cacheable = self.mode == "record" or (
+            self.mode == "live"
+            and temperature is not None
+            and temperature <= self.cache_max_temperature
+        )
+        if cacheable:
+            self.cache.put(key, self.model_name, result)
+        return {**result, "cached": False}
+
+    def generate_with_metadata(self, messages, temperature=None, max_tokens=None, **kwargs) -> dict:
+        if self.mode == "off":
+            return self.provider.generate_with_metadata(messages, temperature, max_tokens, **kwargs)
+
+        key, effective_temperature = self._key(messages, temperature, max_tokens)
+        cached = self._lookup(key)
+        if cached is not None:
+            return cached
+
+        result = self.provider.generate_with_metadata(messages, temperature, max_tokens, **kwargs)
+        return self._store(key, effective_temperature, result)
+
+    def generate(self, messages, temperature=None, max_tokens=None, **kwargs) -> str:
+        if self.mode == "off":
+            return self.provider.generate(messages, temperature, max_tokens, **kwargs)
+        return self.generate_with_metadata(messages, temperature, max_tokens, **kwargs)["response"]
+
+    def stream(
+        self,
+        messages,
+        temperature=None,
+        max_tokens=None,
+        on_complete: Optional[Callable[[dict], None]] = None,
+        **kwargs,
+    ) -> Iterator[str]:
+        """Une réponse en cache est servie d'un bloc ; un miss est streamé puis stocké."""
+        if self.mode == "off":
+            yield from self.provider.stream(
+                messages, temperature, max_tokens, on_complete=on_complete, **kwargs
+            )
+            return
+
+        key, effective_temperature = self._key(messages, temperature, max_tokens)
+        cached = self._lookup(key)
+        if cached is not None:
+            yield cached["response"]
+            if on_complete is not None:
+                on_complete({**cached, "ttft_ms": 0.0})
+            return
+
+        def store(result: dict) -> None:
+            stored = self._store(
+                key, effective_temperature, {k: v for k, v in result.items() if k != "ttft_ms"}
+            )
+            if on_complete is not None:
+                on_complete({**stored, "ttft_ms": result.get("ttft_ms", 0.0)})
+
+        yield from self.provider.stream(messages, temperature, max_tokens, on_complete=store, **kwargs)
+
+    async def agenerate_with_metadata(
+        self, messages, temperature=None, max_tokens=None, **kwargs
+    ) -> dict:
+        if self.mode == "off":
+            return await self.provider.agenerate_with_metadata(
+                messages, temperature, max_tokens, **kwargs
+            )
+
+        key, effective_temperature = self._key(messages, temperature, max_tokens)
+        cached = self._lookup(key)
+        if cached is not None:
+            return cached
+
+        result = await self.provider.agenerate_with_metadata(
+            messages, temperature, max_tokens, **kwargs
+        )
+        return self._store(key, effective_temperature, result)
+
+    async def agenerate(self, messages, temperature=None, max_tokens=None, **kwargs) -> str:
+        if self.mode == "off":
+            return await self.provider.agenerate(messages, temperature, max_tokens, **kwargs)
+        result = await self.agenerate_with_metadata(messages, temperature, max_tokens, **kwargs)
+        return result["response"]
+
+    async def aclose(self) -> None:
+        await self.provider.aclose()
+
+    def count_tokens(self, text: str) -> int:
+        return self.provider.count_tokens(text)
+
+    def get_cost_per_token(self) -> dict:
+        return self.provider.get_cost_per_token()
+
+    def get_model_info(self) -> dict:
+        return {**self.provider.get_model_info(), "cache_mode": self.mode}
+
+    def get_cache_stats(self) -> dict:
+        return {"mode": self.mode, **self.cache.get_stats()}
+
+
+def cache_from_env() -> ResponseCache:
+    """ResponseCache configuré par LLM_CACHE_PATH / LLM_CACHE_TTL / LLM_CACHE_MAX_ENTRIES."""
+    ttl = os.getenv("LLM_CACHE_TTL")
+    return ResponseCache(
+        path=os.getenv("LLM_CACHE_PATH", "data/llm_cache/responses.sqlite"),
+        ttl=float(ttl) if ttl else None,
+        max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "10000")),
+    )
@@ -0,0 +1,222 @@
+"""
+Serveur local imitant l'API Mistral (/v1/chat/completions, réponses complètes ou SSE).
+
+Permet de tester le provider (concurrence, retries, timeouts) sans clé API
+ni réseau:
+
+    with StubMistralServer(latency=0.2) as server:
+        provider = MistralProvider(api_key="test", base_url=server.url)
+        server.fail_next(2, status=429)
+        ...
+
+Ou en ligne de commande:
+    python -m src.llm.stub_server --port 8089 --latency 0.5
+    MISTRAL_BASE_URL=http://127.0.0.1:8089 streamlit run app/app.py
+"""
+
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Optional
+
+
+def _default_responder(payload: dict) -> str:
+    """Réponse par défaut : écho du dernier message utilisateur."""
+    for message in reversed(payload.get("messages", [])):
+        if message.get("role") == "user":
+            return f"[stub] {message.get('content', '')[:200]}"
+    return "[stub] OK"
+
+
+class StubMistralServer:
+    """Serveur HTTP multi-thread répondant comme l'API chat de Mistral."""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        responder: Optional[Callable[[dict], str]] = None,
+        chunk_delay: float = 0.0,
+    ):
+        """
+        Args:
+            host: Adresse d'écoute
+            port: Port (0 = choisi par l'OS)
+            latency: Délai artificiel par requête (secondes)
+            responder: Fonction payload -> texte de la réponse
+            chunk_delay: Délai entre deux fragments d'une réponse streamée (secondes)
+        """
+        self.latency = latency
+        self.chunk_delay = chunk_delay
+        self.responder = responder or _default_responder
+
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._failures: list = []
+        self._lock = threading.Lock()
+
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def fail_next(self, count: int = 1, status: int = 429, retry_after: Optional[float] = None):
+        """Les `count` prochaines requêtes renvoient `status` (avec Retry-After optionnel)."""
+        with self._lock:
+            self._failures.extend([(status, retry_after)] * count)
+
+    def start(self) -> "StubMistralServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "StubMistralServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _make_handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                body = self.rfile.read(length)
+
+                if self.path.rstrip("/") != "/v1/chat/completions":
+                    self._send(404, {"message": "Not found"})
+                    return
+
+                with stub._lock:
+                    stub.requests += 1
+                    stub.in_flight += 1
+                    stub.max_in_flight = max(stub.max_in_flight, stub.in_flight)
+                    failure = stub._failures.pop(0) if stub._failures else None
+
+                try:
+                    if stub.latency:
+                        time.sleep(stub.latency)
+
+                    if failure:
+                        status, retry_after = failure
+                        headers = {"Retry-After": str(retry_after)} if retry_after is not None else {}
+                        self._send(status, {"message": "stub failure"}, headers)
+                        return
+
+                    payload = json.loads(body or b"{}")
+                    content = stub.responder(payload)
+                    prompt_tokens = sum(len(m.get("content", "")) for m in payload.get("messages", [])) // 4
+                    completion_tokens = len(content) // 4
+                    usage = {
+                        "prompt_tokens": prompt_tokens,
+                        "completion_tokens": completion_tokens,
+                        "total_tokens": prompt_tokens + completion_tokens,
+                    }
+                    if payload.get("stream"):
+                        self._send_stream(payload, content, usage)
+                        return
+                    self._send(
+                        200,
+                        {
+                            "id": f"stub-{stub.requests}",
+                            "object": "chat.completion",
+                            "created": int(time.time()),
+                            "model": payload.get("model", "stub"),
+                            "choices": [
+                                {
+                                    "index": 0,
+                                    "message": {"role": "assistant", "content": content},
+                                    "finish_reason": "stop",
+                                }
+                            ],
+                            "usage": usage,
+                        },
+                    )
+                finally:
+                    with stub._lock:
+                        stub.in_flight -= 1
+
+            def _send(self, status: int, data: dict, headers: Optional[dict] = None):
+                body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _send_stream(self, payload: dict, content: str, usage: dict):
+                """Réponse SSE : un événement par mot, l'usage dans le dernier."""
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                self.close_connection = True
+
+                words = content.split(" ")
+                for i, word in enumerate(words):
+                    last = i == len(words) - 1
+                    chunk = {
+                        "id": f"stub-{stub.requests}",
+                        "object": "chat.completion.chunk",
+                        "created": int(time.time()),
+                        "model": payload.get("model", "stub"),
+                        "choices": [
+                            {
+                                "index": 0,
+                                "delta": {"role": "assistant", "content": word if last else word + " "},
+                                "finish_reason": "stop" if last else None,
+                            }
+                        ],
+                    }
+                    if last:
+                        chunk["usage"] = usage
+                    self.wfile.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode("utf-8"))
+                    self.wfile.flush()
+                    if stub.chunk_delay and not last:
+                        time.sleep(stub.chunk_delay)
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.wfile.flush()
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serveur stub de l'API Mistral")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--chunk-delay", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = StubMistralServer(
+        args.host, args.port, latency=args.latency, chunk_delay=args.chunk_delay
+    )
+    print(f"[OK] Stub Mistral en ecoute sur {server.url}")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,373 @@
+"""
+Aggregates - Statistiques incrémentales des métriques
+
+Les agrégats sont mis à jour à l'ingestion de chaque événement et persistés
+à côté des événements bruts : le dashboard lit des compteurs de taille
+constante au lieu de rebalayer tout l'historique.
+"""
+
+import math
+from collections import deque
+from typing import Dict, List, Optional
+
+from .cost_calculator import get_calculator
+
+
+class RunningStats:
+    """count / sum / min / max maintenus en O(1) par valeur."""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def add(self, value: float):
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def to_dict(self) -> Dict:
+        return {"count": self.count, "sum": self.total, "min": self.min, "max": self.max}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "RunningStats":
+        stats = cls()
+        stats.count = data.get("count", 0)
+        stats.total = data.get("sum", 0.0)
+        stats.min = data.get("min")
+        stats.max = data.get("max")
+        return stats
+
+
+class QuantileSketch:
+    """
+    Histogramme à buckets logarithmiques (type DDSketch).
+
+    Chaque quantile est estimé avec une erreur relative <= relative_accuracy,
+    en mémoire bornée (~1000 buckets entre la microseconde et l'heure à 1 %).
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01):
+        self.relative_accuracy = relative_accuracy
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self.buckets: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+
+    def add(self, value: float):
+        self.count += 1
+        if value <= 0:
+            self.zero_count += 1
+            return
+        index = math.ceil(math.log(value) / self._log_gamma)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Valeur estimée du quantile q (0 <= q <= 1), None si vide."""
+        if self.count == 0:
+            return None
+
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if rank < seen:
+                return 2 * self._gamma ** index / (self._gamma + 1)
+
+        index = max(self.buckets)
+        return 2 * self._gamma ** index / (self._gamma + 1)
+
+    def to_dict(self) -> Dict:
+        return {
+            "relative_accuracy": self.relative_accuracy,
+            "zero_count": self.zero_count,
+            "count": self.count,
+            "buckets": {str(k): v for k, v in self.buckets.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "QuantileSketch":
+        sketch = cls(data.get("relative_accuracy", 0.01))
+        sketch.zero_count = data.get("zero_count", 0)
+        sketch.count = data.get("count", 0)
+        sketch.buckets = {int(k): v for k, v in data.get("buckets", {}).items()}
+        return sketch
+
+
+class MetricsAggregates:
+    """Agrégats des appels API, latences et prédictions."""
+
+    PERCENTILES = (0.5, 0.95, 0.99)
+
+    def __init__(self, recent_size: int = 20):
+        self.recent_size = recent_size
+        self.reset()
+
+    def reset(self):
+        """Remet tous les agrégats à zéro."""
+        self.first_timestamp: Optional[str] = None
+
+        # Appels API
+        self.api_latency = RunningStats()
+        self.api_success = 0
+        self.api_tokens_input = 0
+        self.api_tokens_output = 0
+        self.mistral = {"calls": 0, "tokens_input": 0, "tokens_output": 0, "cost": 0.0}
+        self.embeddings = {"calls": 0, "tokens_input": 0}
+        self.daily_api: Dict[str, Dict] = {}
+
+        # Latences
+        self.latency_stats: Dict[str, RunningStats] = {}
+        self.latency_sketches: Dict[str, QuantileSketch] = {}
+        self.daily_latency: Dict[str, Dict[str, RunningStats]] = {}
+
+        # Prédictions
+        self.prediction_count = 0
+        self.confidence_sum = 0.0
+        self.by_severity: Dict[str, int] = {}
+        self.daily_predictions: Dict[str, Dict[str, int]] = {}
+        self.recent_predictions: deque = deque(maxlen=self.recent_size)
+
+    # ------------------------------------------------------------------
+    # Ingestion
+    # ------------------------------------------------------------------
+
+    def add(self, kind: str, event: Dict):
+        """Met à jour les agrégats avec un événement ("api_calls", "latencies", "predictions")."""
+        timestamp = event.get("timestamp", "")
+        day = timestamp[:10]
+
+        if kind == "api_calls":
+            if self.first_timestamp is None or timestamp < self.first_timestamp:
+                self.first_timestamp = timestamp
+            self._add_api_call(event, day)
+        elif kind == "latencies":
+            self._add_latency(event, day)
+        elif kind == "predictions":
+            self._add_prediction(event, day)
+
+    def _add_api_call(self, call: Dict, day: str):
+        self.api_latency.add(call["latency"])
+        self.api_success += int(bool(call.get("success", True)))
+        self.api_tokens_input += call["tokens_input"]
+        self.api_tokens_output += call["tokens_output"]
+
+        cost = 0.0
+        if call.get("service") == "mistral":
+            cost = get_calculator().calculate_mistral_cost(
+                call.get("model", "mistral-small-latest"),
+                call["tokens_input"],
+                call["tokens_output"],
+            )["cost_total"]
+            self.mistral["calls"] += 1
+            self.mistral["tokens_input"] += call["tokens_input"]
+            self.mistral["tokens_output"] += call["tokens_output"]
+            self.mistral["cost"] += cost
+        elif call.get("service") == "embeddings":
+            self.embeddings["calls"] += 1
+            self.embeddings["tokens_input"] += call["tokens_input"]
+
+        daily = self.daily_api.setdefault(day, {"calls": 0, "mistral_cost": 0.0})
+        daily["calls"] += 1
+        daily["mistral_cost"] += cost
+
+    def _add_latency(self, latency: Dict, day: str):
+        component = latency["component"]
+        duration = latency["duration"]
+
+        if component not in self.latency_stats:
+            self.latency_stats[component] = RunningStats()
+            self.latency_sketches[component] = QuantileSketch()
+        self.latency_stats[component].add(duration)
+        self.latency_sketches[component].add(duration)
+
+        per_day = self.daily_latency.setdefault(day, {})
+        per_day.setdefault(component, RunningStats()).add(duration)
+
+    def _add_prediction(self, prediction: Dict, day: str):
+        severity = prediction["severity"]
+        self.prediction_count += 1
+        self.confidence_sum += prediction["confidence"]
+        self.by_severity[severity] = self.by_severity.get(severity, 0) + 1
+
+        per_day = self.daily_predictions.setdefault(day, {})
+        per_day[severity] = per_day.get(severity, 0) + 1
+
+        self.recent_predictions.append(
+            {
+                "timestamp": prediction["timestamp"],
+                "severity": severity,
+                "confidence": prediction["confidence"],
+            }
+        )
+
+    # ------------------------------------------------------------------
+    # Lecture
+    # ------------------------------------------------------------------
+
+    def api_stats(self) -> Dict:
+        count = self.api_latency.count
+        return {
+            "total_calls": count,
+            "total_tokens_input": self.api_tokens_input,
+            "total_tokens_output": self.api_tokens_output,
+            "avg_latency": self.api_latency.mean,
+            "success_rate": self.api_success / count if count else 0,
+        }
+
+    def latency_stats_by_component(self) -> Dict:
+        result = {}
+        for component, stats in self.latency_stats.items():
+            sketch = self.latency_sketches[component]
+            result[component] = {
+                "avg": stats.mean,
+                "min": stats.min,
+                "max": stats.max,
+                "count": stats.count,
+                **{f"p{int(q * 100)}": sketch.quantile(q) for q in self.PERCENTILES},
+            }
+        return result
+
+    def prediction_stats(self) -> Dict:
+        if not self.prediction_count:
+            return {"total": 0, "by_severity": {}, "avg_confidence": 0}
+        return {
+            "total": self.prediction_count,
+            "by_severity": dict(self.by_severity),
+            "avg_confidence": self.confidence_sum / self.prediction_count,
+        }
+
+    def cost_stats(self) -> Dict:
+        """Même structure que CostCalculator.calculate_total_cost, plus le détail journalier."""
+        calculator = get_calculator()
+
+        mistral_cost = self.mistral["cost"]
+        embedding_cost = 0
+        if self.embeddings["calls"]:
+            avg_tokens = self.embeddings["tokens_input"] / self.embeddings["calls"]
+            embedding_cost = calculator.calculate_embedding_cost(
+                self.embeddings["calls"], int(avg_tokens)
+            )["cost_total"]
+
+        total_cost = mistral_cost + embedding_cost
+
+        daily = []
+        cumulative = 0.0
+        for day in sorted(self.daily_api):
+            cumulative += self.daily_api[day]["mistral_cost"]
+            daily.append(
+                {
+                    "date": day,
+                    "calls": self.daily_api[day]["calls"],
+                    "cost": self.daily_api[day]["mistral_cost"],
+                    "cumulative_cost": cumulative,
+                }
+            )
+
+        return {
+            "total_cost": total_cost,
+            "mistral": {
+                "cost": mistral_cost,
+                "calls": self.mistral["calls"],
+                "tokens_input": self.mistral["tokens_input"],
+                "tokens_output": self.mistral["tokens_output"],
+            },
+            "embeddings": {"cost": embedding_cost, "calls": self.embeddings["calls"]},
+            "breakdown": {
+                "mistral_pct": (mistral_cost / total_cost * 100) if total_cost > 0 else 0,
+                "embeddings_pct": (embedding_cost / total_cost * 100) if total_cost > 0 else 0,
+            },
+            "first_timestamp": self.first_timestamp,
+            "daily": daily,
+        }
+
+    def daily_latency_stats(self) -> List[Dict]:
+        """Une ligne par (jour, composant) : count, avg, min, max."""
+        return [
+            {
+                "date": day,
+                "component": component,
+                "count": stats.count,
+                "avg": stats.mean,
+                "min": stats.min,
+                "max": stats.max,
+            }
+            for day in sorted(self.daily_latency)
+            for component, stats in self.daily_latency[day].items()
+        ]
+
+    # ------------------------------------------------------------------
+    # Persistance
+    # ------------------------------------------------------------------
+
+    def to_dict(self) -> Dict:
+        return {
+            "first_timestamp": self.first_timestamp,
+            "api": {
+                "latency": self.api_latency.to_dict(),
+                "success": self.api_success,
+                "tokens_input": self.api_tokens_input,
+                "tokens_output": self.api_tokens_output,
+                "mistral": self.mistral,
+                "embeddings": self.embeddings,
+                "daily": self.daily_api,
+            },
+            "latencies": {
+                component: {
+                    "stats": stats.to_dict(),
+                    "sketch": self.latency_sketches[component].to_dict(),
+                }
+                for component, stats in self.latency_stats.items()
+            },
+            "daily_latencies": {
+                day: {c: s.to_dict() for c, s in per_day.items()}
+                for day, per_day in self.daily_latency.items()
+            },
+            "predictions": {
+                "count": self.prediction_count,
+                "confidence_sum": self.confidence_sum,
+                "by_severity": self.by_severity,
+                "daily": self.daily_predictions,
+                "recent": list(self.recent_predictions),
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict, recent_size: int = 20) -> "MetricsAggregates":
+        agg = cls(recent_size)
+        agg.first_timestamp = data.get("first_timestamp")
+
+        api = data.get("api", {})
+        agg.api_latency = RunningStats.from_dict(api.get("latency", {}))
+        agg.api_success = api.get("success", 0)
+        agg.api_tokens_input = api.get("tokens_input", 0)
+        agg.api_tokens_output = api.get("tokens_output", 0)
+        agg.mistral.update(api.get("mistral", {}))
+        agg.embeddings.update(api.get("embeddings", {}))
+        agg.daily_api = api.get("daily", {})
+
+        for component, entry in data.get("latencies", {}).items():
+            agg.latency_stats[component] = RunningStats.from_dict(entry["stats"])
+            agg.latency_sketches[component] = QuantileSketch.from_dict(entry["sketch"])
+        agg.daily_latency = {
+            day: {c: RunningStats.from_dict(s) for c, s in per_day.items()}
+            for day, per_day in data.get("daily_latencies", {}).items()
+        }
+
+        predictions = data.get("predictions", {})
+        agg.prediction_count = predictions.get("count", 0)
+        agg.confidence_sum = predictions.get("confidence_sum", 0.0)
+        agg.by_severity = predictions.get("by_severity", {})
+        agg.daily_predictions = predictions.get("daily", {})
+        agg.recent_predictions.extend(predictions.get("recent", []))
+        return agg
@@ -1,28 +1,143 @@
 """
 Metrics Tracker - Suivi des métriques du système
+
+Deux modes de stockage (variable d'environnement METRICS_STORAGE):
+- "json"  : un fichier JSON par type, réécrit à chaque événement (historique)
+- "jsonl" : fichiers JSONL en ajout seul, écrits par un thread d'arrière-plan
+            depuis une file bornée, par lots et à l'arrêt du processus
+
+Dans les deux modes, des agrégats (compteurs, percentiles, cumuls journaliers)
+sont maintenus à l'ingestion : les statistiques ne relisent jamais
+l'historique. Les événements bruts ne sont chargés qu'au premier accès à
+api_calls / latencies / predictions.
+
+aggregates.json est un instantané des fichiers bruts jusqu'à une position
+par fichier (octets en jsonl, nombre d'événements en json). Il est mis à
+jour sous verrou fichier (aggregates.lock) en rattrapant les événements
+écrits depuis cette position, par ce processus ou par un autre (CLI batch,
+workers du service, Streamlit) : plusieurs trackers peuvent partager le même
+dossier en jsonl, et les événements écrits après le dernier instantané (arrêt
+brutal) sont rattrapés au chargement. L'instantané est écrit au plus une fois
+par flush_interval en jsonl, à flush() / close() dans les deux modes. Le mode
+json réécrit le fichier brut entier : il reste réservé à un seul processus.
 """
 
+import atexit
 import json
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
 from pathlib import Path
 from datetime import datetime
 from typing import Dict, List, Optional
 
+from .aggregates import MetricsAggregates
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+STORAGE_MODES = ("json", "jsonl")
+EVENT_KINDS = ("api_calls", "latencies", "predictions")
+
 
 class MetricsTracker:
     """Collecte et stocke les métriques du système."""
 
-    def __init__(self, data_dir: str = "data/monitoring"):
+    def __init__(
+        self,
+        data_dir: str = "data/monitoring",
+        storage: Optional[str] = None,
+        queue_size: int = 10_000,
+        flush_interval: float = 1.0,
+        batch_size: int = 1000,
+        put_timeout: float = 0.05,
+    ):
+        """
+        Args:
+            data_dir: Dossier des fichiers de métriques
+            storage: "json" ou "jsonl" (défaut: METRICS_STORAGE, sinon "json")
+            queue_size: Taille max de la file d'écriture (mode jsonl)
+            flush_interval: Délai max (s) avant écriture d'un lot (mode jsonl)
+            batch_size: Nombre max d'événements écrits par lot (mode jsonl)
+            put_timeout: Attente max (s) si la file est pleine avant d'ignorer l'événement
+        """
         self.data_dir = Path(data_dir)
         self.data_dir.mkdir(parents=True, exist_ok=True)
 
-        self.api_calls_file = self.data_dir / "api_calls.json"
-        self.latencies_file = self.data_dir / "latencies.json"
-        self.predictions_file = self.data_dir / "predictions.json"
-
-        # Charger données existantes
-        self.api_calls = self._load_json(self.api_calls_file, [])
-        self.latencies = self._load_json(self.latencies_file, [])
-        self.predictions = self._load_json(self.predictions_file, [])
+        self.storage = (storage or os.getenv("METRICS_STORAGE") or "json").lower()
+        if self.storage not in STORAGE_MODES:
+            raise ValueError(f"Stockage inconnu: {self.storage}. Disponibles: {STORAGE_MODES}")
+
+        suffix = ".json" if self.storage == "json" else ".jsonl"
+        self.api_calls_file = self.data_dir / f"api_calls{suffix}"
+        self.latencies_file = self.data_dir / f"latencies{suffix}"
+        self.predictions_file = self.data_dir / f"predictions{suffix}"
+        self.aggregates_file = self.data_dir / "aggregates.json"
+        self.lock_file = self.data_dir / "aggregates.lock"
+
+        self._files = {
+            "api_calls": self.api_calls_file,
+            "latencies": self.latencies_file,
+            "predictions": self.predictions_file,
+        }
+        # Événements bruts, chargés à la demande (None = pas encore lus)
+        self._events: Dict[str, Optional[List[Dict]]] = {kind: None for kind in EVENT_KINDS}
+
+        self._lock = threading.RLock()
+        self.dropped_events = 0
+        self.flush_interval = flush_interval
+        self._closed = False
+
+        if self.storage == "jsonl":
+            for filepath in self._files.values():
+                self._migrate_legacy_json(filepath)
+
+        self.aggregates = self._load_aggregates()
+        atexit.register(self.close)
+
+        if self.storage == "json":
+            return
+
+        self.batch_size = batch_size
+        self.put_timeout = put_timeout
+        self._last_snapshot = time.time()
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._writer = threading.Thread(
+            target=self._writer_loop, name="metrics-writer", daemon=True
+        )
+        self._writer.start()
+
+    # ------------------------------------------------------------------
+    # Lecture / persistance
+    # ------------------------------------------------------------------
+
+    @property
+    def api_calls(self) -> List[Dict]:
+        return self._get_events("api_calls")
+
+    @property
+    def latencies(self) -> List[Dict]:
+        return self._get_events("latencies")
+
+    @property
+    def predictions(self) -> List[Dict]:
+        return self._get_events("predictions")
+
+    def _get_events(self, kind: str) -> List[Dict]:
+        """Événements bruts d'un type (lus sur disque au premier accès)."""
+        with self._lock:
+            if self._events[kind] is None:
+                filepath = self._files[kind]
+                if self.storage == "json":
+                    self._events[kind] = self._load_json(filepath, [])
+                else:
+                    self.flush()
+                    self._events[kind] = self._load_jsonl(filepath)
+            return self._events[kind]
 
     def _load_json(self, filepath: Path, default):
         """Charge fichier JSON."""
@@ -39,6 +154,247 @@ class MetricsTracker:
         with open(filepath, "w", encoding="utf-8") as f:
             json.dump(data, f, indent=2, ensure_ascii=False)
 
+    def _load_jsonl(self, filepath: Path) -> List[Dict]:
+        """Charge un fichier JSONL (lignes invalides ignorées)."""
+        events = []
+        if not filepath.exists():
+            return events
+
+        with open(filepath, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    events.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+        return events
+
+    def _migrate_legacy_json(self, filepath: Path):
+        """Convertit l'ancien fichier .json en JSONL s'il n'existe que lui."""
+        legacy_file = filepath.with_suffix(".json")
+        if filepath.exists() or not legacy_file.exists():
+            return
+
+        legacy = self._load_json(legacy_file, [])
+        if legacy:
+            self._append_lines(filepath, legacy)
+            print(f"[INFO] {legacy_file.name} migre en JSONL")
+
+    @staticmethod
+    def _append_lines(filepath: Path, events: List[Dict]):
+        """Ajoute des événements en fin de fichier JSONL."""
+        with open(filepath, "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(e, ensure_ascii=False) + "\n" for e in events))
+
+    @contextmanager
+    def _file_lock(self):
+        """Verrou inter-processus de l'instantané des agrégats."""
+        if fcntl is None:
+            yield
+            return
+        with open(self.lock_file, "a+") as lock:
+            fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+
+    def _read_snapshot(self) -> tuple:
+        """Instantané sur disque : (agrégats, positions), (None, None) si absent ou d'un autre format."""
+        data = self._load_json(self.aggregates_file, None)
+        if not data or data.get("storage") != self.storage or "offsets" not in data:
+            return None, None
+        offsets = {kind: int(data["offsets"].get(kind, 0)) for kind in EVENT_KINDS}
+        return MetricsAggregates.from_dict(data), offsets
+
+    def _catch_up(
+        self, aggregates: MetricsAggregates, offsets: Dict[str, int], keep_events: bool = False
+    ) -> Optional[int]:
+        """
+        Ajoute aux agrégats les événements écrits après `offsets` et avance
+        les positions. None si un fichier a été tronqué ou réécrit (à reconstruire).
+        """
+        added = 0
+        for kind, filepath in self._files.items():
+            if self.storage == "json":
+                events = self._load_json(filepath, [])
+                if len(events) < offsets[kind]:
+                    return None
+                new_events = events[offsets[kind]:]
+                offsets[kind] = len(events)
+            else:
+                if not filepath.exists():
+                    if offsets[kind]:
+                        return None
+                    continue
+                with open(filepath, "rb") as f:
+                    f.seek(0, os.SEEK_END)
+                    if f.tell() < offsets[kind]:
+                        return None
+                    f.seek(offsets[kind])
+                    data = f.read()
+                # Ligne finale incomplète (écriture en cours) : reprise au prochain rattrapage
+                data = data[: data.rfind(b"\n") + 1]
+                offsets[kind] += len(data)
+                new_events = []
+                for line in data.splitlines():
+                    try:
+                        new_events.append(json.loads(line))
+                    except ValueError:
+                        continue
+
+            for event in new_events:
+                aggregates.add(kind, event)
+            added += len(new_events)
+            if keep_events:
+                self._events[kind] = new_events
+        return added
+
+    def _caught_up_snapshot(self, keep_events: bool = False) -> tuple:
+        """
+        Instantané sur disque complété des événements écrits depuis (à appeler
+        sous verrou fichier) : (agrégats, positions, événements ajoutés, reconstruit).
+        """
+        aggregates, offsets = self._read_snapshot()
+        added = None
+        if aggregates is not None:
+            added = self._catch_up(aggregates, offsets)
+        rebuilt = added is None
+        if rebuilt:
+            aggregates = MetricsAggregates()
+            offsets = {kind: 0 for kind in EVENT_KINDS}
+            added = self._catch_up(aggregates, offsets, keep_events=keep_events)
+        return aggregates, offsets, added, rebuilt
+
+    def _load_aggregates(self) -> MetricsAggregates:
+        """Charge l'instantané et rattrape les événements écrits depuis (reconstruction si absent)."""
+        with self._file_lock():
+            aggregates, offsets, added, rebuilt = self._caught_up_snapshot(keep_events=True)
+            if added:
+                action = "reconstruits" if rebuilt else "rattrapes"
+                print(f"[INFO] Agregats de monitoring {action} ({added} evenements)")
+            if rebuilt or added:
+                self._write_aggregates(aggregates, offsets)
+        return aggregates
+
+    def _sync_aggregates(self):
+        """Met à jour l'instantané sur disque avec les événements écrits depuis (tous processus)."""
+        with self._file_lock():
+            aggregates, offsets, added, rebuilt = self._caught_up_snapshot()
+            if rebuilt or added:
+                self._write_aggregates(aggregates, offsets)
+
+    def _write_aggregates(self, aggregates: MetricsAggregates, offsets: Dict[str, int]):
+        """Écrit l'instantané de façon atomique (à appeler sous verrou fichier)."""
+        data = aggregates.to_dict()
+        data["storage"] = self.storage
+        data["offsets"] = offsets
+        tmp = self.aggregates_file.with_name(f"{self.aggregates_file.stem}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+        tmp.replace(self.aggregates_file)
+
+    # ------------------------------------------------------------------
+    # Écriture
+    # ------------------------------------------------------------------
+
+    def _record(self, events: List[Dict], kind: str):
+        """Met à jour les agrégats, puis persiste les événements selon le mode."""
+        if self.storage == "json":
+            with self._lock:
+                for event in events:
+                    self.aggregates.add(kind, event)
+                target = self._get_events(kind)
+                target.extend(events)
+                self._save_json(self._files[kind], target)
+            return
+
+        with self._lock:
+            for event in events:
+                self.aggregates.add(kind, event)
+            if self._events[kind] is not None:
+                self._events[kind].extend(events)
+
+            items = [(self._files[kind], event) for event in events]
+
+            # Instantané des agrégats au plus une fois par flush_interval
+            if time.time() - self._last_snapshot >= self.flush_interval:
+                self._last_snapshot = time.time()
+                items.append((self.aggregates_file, None))
+
+        # Ne pas bloquer l'appelant plus de put_timeout : si la file reste
+        # pleine, l'événement reste en mémoire mais n'est pas persisté
+        for item in items:
+            try:
+                self._queue.put(item, timeout=self.put_timeout)
+            except queue.Full:
+                self.dropped_events += 1
+                if self.dropped_events == 1:
+                    print("[WARN] File d'ecriture des metriques pleine, evenements ignores")
+
+    def _writer_loop(self):
+        """Thread d'écriture : vide la file par lots, regroupés par fichier."""
+        while True:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+
+            batch = [item]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = False
+            snapshot = False
+            by_file: Dict[Path, List[Dict]] = {}
+            for entry in batch:
+                if entry is None:
+                    stop = True
+                    continue
+                filepath, event = entry
+                if filepath == self.aggregates_file:
+                    snapshot = True  # un seul rattrapage par lot
+                else:
+                    by_file.setdefault(filepath, []).append(event)
+
+            try:
+                for filepath, events in by_file.items():
+                    self._append_lines(filepath, events)
+                if snapshot:
+                    self._sync_aggregates()
+            except Exception as e:
+                print(f"[WARN] Ecriture metriques echouee: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+            if stop:
+                return
+
+    def flush(self):
+        """Écrit les événements en file (mode jsonl) puis met à jour l'instantané des agrégats."""
+        if self._closed:
+            return
+        if self.storage == "json":
+            with self._lock:
+                self._sync_aggregates()
+            return
+        with self._lock:
+            self._last_snapshot = time.time()
+        self._queue.put((self.aggregates_file, None))
+        self._queue.join()
+
+    def close(self):
+        """Écrit les événements restants et l'instantané, arrête le thread d'écriture."""
+        if self._closed:
+            return
+        self.flush()
+        self._closed = True
+        if self.storage == "jsonl":
+            self._queue.put(None)
+            self._writer.join(timeout=10)
+
     def track_api_call(
         self,
         service: str,
@@ -58,8 +414,7 @@ class MetricsTracker:
             "latency": latency,
             "success": success,
         }
-        self.api_calls.append(call)
-        self._save_json(self.api_calls_file, self.api_calls)
+        self._record([call], "api_calls")
 
     def track_latency(
         self, component: str, operation: str, duration: float, metadata: Optional[Dict] = None
@@ -72,8 +427,7 @@ class MetricsTracker:
             "duration": duration,
             "metadata": metadata or {},
         }
-        self.latencies.append(latency)
-        self._save_json(self.latencies_file, self.latencies)
+        self._record([latency], "latencies")
 
     def track_prediction(
         self,
@@ -93,84 +447,77 @@ class MetricsTracker:
             "red_flags": red_flags,
             "confidence": confidence,
         }
-        self.predictions.append(prediction)
-        self._save_json(self.predictions_file, self.predictions)
+        self._record([prediction], "predictions")
+
+    def track_predictions(self, predictions: List[Dict]):
+        """
+        Enregistre un lot de prédictions en une seule écriture.
+
+        Args:
+            predictions: dicts avec les arguments de track_prediction
+                (severity, age, sex, symptoms, red_flags, confidence)
+        """
+        timestamp = datetime.now().isoformat()
+        self._record(
+            [
+                {
+                    "timestamp": timestamp,
+                    "severity": p["severity"],
+                    "patient": {"age": p.get("age", 0), "sex": p.get("sex", "?")},
+                    "symptoms": p.get("symptoms", []),
+                    "red_flags": p.get("red_flags", []),
+                    "confidence": p["confidence"],
+                }
+                for p in predictions
+            ],
+            "predictions",
+        )
 
     def get_api_stats(self) -> Dict:
         """Statistiques API."""
-        if not self.api_calls:
-            return {
-                "total_calls": 0,
-                "total_tokens_input": 0,
-                "total_tokens_output": 0,
-                "avg_latency": 0,
-                "success_rate": 0,
-            }
-
-        total_calls = len(self.api_calls)
-        total_tokens_input = sum(c["tokens_input"] for c in self.api_calls)
-        total_tokens_output = sum(c["tokens_output"] for c in self.api_calls)
-        avg_latency = sum(c["latency"] for c in self.api_calls) / total_calls
-        success_rate = sum(1 for c in self.api_calls if c["success"]) / total_calls
-
-        return {
-            "total_calls": total_calls,
-            "total_tokens_input": total_tokens_input,
-            "total_tokens_output": total_tokens_output,
-            "avg_latency": avg_latency,
-            "success_rate": success_rate,
-        }
+        with self._lock:
+            return self.aggregates.api_stats()
 
     def get_latency_stats(self) -> Dict:
-        """Statistiques latences."""
-        if not self.latencies:
-            return {}
-
-        stats = {}
-        for lat in self.latencies:
-            comp = lat["component"]
-            if comp not in stats:
-                stats[comp] = []
-            stats[comp].append(lat["duration"])
-
-        result = {}
-        for comp, durations in stats.items():
-            result[comp] = {
-                "avg": sum(durations) / len(durations),
-                "min": min(durations),
-                "max": max(durations),
-                "count": len(durations),
-            }
-
-        return result
+        """Statistiques latences (avg, min, max, count, p50, p95, p99 par composant)."""
+        with self._lock:
+            return self.aggregates.latency_stats_by_component()
 
     def get_prediction_stats(self) -> Dict:
         """Statistiques prédictions."""
-        if not self.predictions:
-            return {"total": 0, "by_severity": {}, "avg_confidence": 0}
+        with self._lock:
+            return self.aggregates.prediction_stats()
 
-        severity_count = {}
-        for pred in self.predictions:
-            sev = pred["severity"]
-            severity_count[sev] = severity_count.get(sev, 0) + 1
+    def get_cost_stats(self) -> Dict:
+        """Coûts cumulés (même format que CostCalculator.calculate_total_cost) + détail journalier."""
+        with self._lock:
+            return self.aggregates.cost_stats()
 
-        avg_confidence = sum(p["confidence"] for p in self.predictions) / len(self.predictions)
+    def get_daily_latency_stats(self) -> List[Dict]:
+        """Latences agrégées par jour et par composant."""
+        with self._lock:
+            return self.aggregates.daily_latency_stats()
 
-        return {
-            "total": len(self.predictions),
-            "by_severity": severity_count,
-            "avg_confidence": avg_confidence,
-        }
+    def get_recent_predictions(self, n: int = 5) -> List[Dict]:
+        """Dernières prédictions (timestamp, severity, confidence), la plus récente en premier."""
+        with self._lock:
+            return list(self.aggregates.recent_predictions)[-n:][::-1]
 
     def reset(self):
         """Réinitialise toutes les métriques."""
-        self.api_calls = []
-        self.latencies = []
-        self.predictions = []
+        self.flush()
+
+        with self._lock:
+            self._events = {kind: [] for kind in EVENT_KINDS}
+            self.aggregates.reset()
 
-        self._save_json(self.api_calls_file, [])
-        self._save_json(self.latencies_file, [])
-        self._save_json(self.predictions_file, [])
+            with self._file_lock():
+                for filepath in self._files.values():
+                    if self.storage == "json":
+                        self._save_json(filepath, [])
+                    else:
+                        filepath.write_text("", encoding="utf-8")
+                self._write_aggregates(self.aggregates, {kind: 0 for kind in EVENT_KINDS})
 
     def export_csv(self, output_dir: str = "data/monitoring/export"):
         """Export CSV des métriques."""
@@ -237,3 +584,10 @@ def get_tracker() -> MetricsTracker:
     if _tracker is None:
         _tracker = MetricsTracker()
     return _tracker
+
+
+def set_tracker(tracker: MetricsTracker) -> Optional[MetricsTracker]:
+    """Remplace l'instance globale (benchmarks, tests), retourne la précédente."""
+    global _tracker
+    previous, _tracker = _tracker, tracker
+    return previous
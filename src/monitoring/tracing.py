@@ -0,0 +1,333 @@
+"""
+Traces par spans imbriqués (tour de chat -> extraction -> RAG -> LLM -> prédiction).
+
+Un span mesure une étape et porte des attributs (tokens, top_k, hit de
+cache...). Le span courant est suivi par une ContextVar : les spans ouverts
+pendant un autre en deviennent les enfants, y compris dans les threads
+lancés avec `wrap_context`. Les spans d'une trace sont écrits en JSONL à la
+fin du span racine ; un span qui se termine après sa racine (thread de
+préchargement) est écrit dès sa fin.
+
+Désactivé par défaut (TRACING=1 pour activer, TRACE_FILE pour le fichier) :
+`span()` retourne alors un objet inerte partagé, sans horodatage ni écriture.
+
+Usage:
+    with span("chat.turn", step=step) as s:
+        ...
+        s.set(tokens_out=42)
+
+    @traced("rag.retrieve")
+    def retrieve(...): ...
+
+Export pour un flame chart (chrome://tracing, Perfetto, speedscope):
+    python -m src.monitoring.tracing data/monitoring/traces.jsonl --chrome trace.json
+"""
+
+import argparse
+import atexit
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict, defaultdict
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+DEFAULT_TRACE_FILE = "data/monitoring/traces.jsonl"
+
+# Traces terminées mémorisées pour écrire directement leurs spans tardifs
+FINISHED_TRACES_MAX = 10_000
+
+_current: contextvars.ContextVar = contextvars.ContextVar("current_span", default=None)
+
+
+class Span:
+    """Étape mesurée d'une trace."""
+
+    __slots__ = ("tracer", "name", "attrs", "trace_id", "span_id", "parent_id",
+                 "start_ns", "end_ns", "thread", "_token")
+
+    def __init__(self, tracer: "Tracer", name: str, attrs: Dict):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+        parent = _current.get()
+        self.parent_id = parent.span_id if parent is not None else None
+        self.trace_id = parent.trace_id if parent is not None else uuid.uuid4().hex[:16]
+        self.span_id = uuid.uuid4().hex[:16]
+        self.start_ns = 0
+        self.end_ns = 0
+        self.thread = threading.current_thread().name
+        self._token = None
+
+    def set(self, **attrs) -> "Span":
+        """Ajoute des attributs (valeurs sérialisables en JSON)."""
+        self.attrs.update(attrs)
+        return self
+
+    def __enter__(self) -> "Span":
+        self._token = _current.set(self)
+        self.start_ns = time.time_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self.end_ns = time.time_ns()
+        if exc_type is not None:
+            self.attrs["error"] = f"{exc_type.__name__}: {exc}"
+        try:
+            _current.reset(self._token)
+        except ValueError:
+            # Fermé dans un autre contexte (générateur consommé ailleurs)
+            _current.set(None)
+        self.tracer._finish(self)
+        return False
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6
+
+    def to_dict(self) -> Dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_us": self.start_ns // 1000,
+            "duration_ms": round(self.duration_ms, 3),
+            "thread": self.thread,
+            "attrs": self.attrs,
+        }
+
+
+class _NoopSpan:
+    """Span inerte (traçage désactivé)."""
+
+    __slots__ = ()
+
+    def set(self, **attrs) -> "_NoopSpan":
+        return self
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+class Tracer:
+    """Crée les spans et écrit chaque trace terminée dans un fichier JSONL."""
+
+    def __init__(self, path: Optional[str] = None, enabled: Optional[bool] = None):
+        """
+        Args:
+            path: Fichier JSONL (défaut: TRACE_FILE, sinon data/monitoring/traces.jsonl)
+            enabled: Activer le traçage (défaut: TRACING=1)
+        """
+        if enabled is None:
+            enabled = os.getenv("TRACING", "0").lower() in ("1", "true", "yes", "on")
+        self.enabled = enabled
+        self.path = Path(path or os.getenv("TRACE_FILE") or DEFAULT_TRACE_FILE)
+
+        # Spans terminés en attente de la fin de leur racine, par trace
+        self._pending: Dict[str, List[Dict]] = defaultdict(list)
+        # Traces dont la racine est terminée (les plus récentes)
+        self._finished: "OrderedDict[str, None]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.spans_written = 0
+        if self.enabled:
+            atexit.register(self.flush)
+
+    def span(self, name: str, **attrs):
+        if not self.enabled:
+            return _NOOP
+        return Span(self, name, attrs)
+
+    def _finish(self, span: Span) -> None:
+        with self._lock:
+            if span.trace_id in self._finished:
+                # Racine déjà écrite : span tardif écrit seul
+                lines = [span.to_dict()]
+            else:
+                self._pending[span.trace_id].append(span.to_dict())
+                if span.parent_id is not None:
+                    return
+                lines = self._pending.pop(span.trace_id)
+                self._finished[span.trace_id] = None
+                if len(self._finished) > FINISHED_TRACES_MAX:
+                    self._finished.popitem(last=False)
+        self._write(lines)
+
+    def _write(self, lines: List[Dict]) -> None:
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write("".join(json.dumps(line, ensure_ascii=False, default=str) + "\n"
+                                for line in lines))
+            self.spans_written += len(lines)
+        except OSError as e:
+            print(f"[WARN] Trace non ecrite ({e})")
+
+    def flush(self) -> None:
+        """Écrit les spans de traces dont la racine n'est pas terminée (arrêt du processus)."""
+        with self._lock:
+            pending = [line for lines in self._pending.values() for line in lines]
+            self._pending.clear()
+        if pending:
+            self._write(pending)
+
+
+_tracer: Optional[Tracer] = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer() -> Tracer:
+    """Tracer global du processus."""
+    global _tracer
+    if _tracer is None:
+        with _tracer_lock:
+            if _tracer is None:
+                _tracer = Tracer()
+    return _tracer
+
+
+def set_tracer(tracer: Tracer) -> Tracer:
+    """Remplace le tracer global (tests, benchmarks), retourne le précédent."""
+    global _tracer
+    with _tracer_lock:
+        previous, _tracer = _tracer, tracer
+    return previous
+
+
+def span(name: str, **attrs):
+    """Context manager d'un span du tracer global."""
+    return get_tracer().span(name, **attrs)
+
+
+def current_span():
+    """Span en cours (objet inerte hors trace ou traçage désactivé)."""
+    return _current.get() or _NOOP
+
+
+def traced(name: Optional[str] = None, **attrs) -> Callable:
+    """Décorateur : un span par appel (nom par défaut : module.fonction)."""
+
+    def decorator(func):
+        span_name = name or f"{func.__module__.rsplit('.', 1)[-1]}.{func.__name__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            tracer = get_tracer()
+            if not tracer.enabled:
+                return func(*args, **kwargs)
+            with tracer.span(span_name, **attrs):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def wrap_context(func: Callable) -> Callable:
+    """Exécute func dans une copie du contexte courant (span parent conservé dans un thread)."""
+    context = contextvars.copy_context()
+    return functools.partial(context.run, func)
+
+
+# ----------------------------------------------------------------------
+# Lecture et export
+# ----------------------------------------------------------------------
+
+
+def load_spans(path: str) -> List[Dict]:
+    """Spans d'un fichier JSONL (lignes invalides ignorées)."""
+    spans = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                spans.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return spans
+
+
+def to_chrome_trace(spans: List[Dict]) -> Dict:
+    """Format Trace Event (chrome://tracing, Perfetto, speedscope) : un flame chart par thread."""
+    threads: Dict[str, int] = {}
+    events = []
+    for s in spans:
+        tid = threads.setdefault(s.get("thread", "main"), len(threads) + 1)
+        events.append(
+            {
+                "name": s["name"],
+                "ph": "X",
+                "ts": s["start_us"],
+                "dur": max(1, int(s["duration_ms"] * 1000)),
+                "pid": 1,
+                "tid": tid,
+                "args": {**s.get("attrs", {}), "trace_id": s["trace_id"]},
+            }
+        )
+    events += [
+        {"name": "thread_name", "ph": "M", "pid": 1, "tid": tid, "args": {"name": name}}
+        for name, tid in threads.items()
+    ]
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def summarize(spans: List[Dict]) -> List[Dict]:
+    """
+    Temps par nom de span : total, propre (hors enfants) et moyen.
+
+    Returns:
+        [{"name", "count", "total_ms", "self_ms", "mean_ms"}] par temps propre décroissant
+    """
+    children_ms: Dict[str, float] = defaultdict(float)
+    for s in spans:
+        if s.get("parent_id"):
+            children_ms[s["parent_id"]] += s["duration_ms"]
+
+    stats: Dict[str, Dict] = {}
+    for s in spans:
+        entry = stats.setdefault(s["name"], {"name": s["name"], "count": 0, "total_ms": 0.0,
+                                             "self_ms": 0.0})
+        entry["count"] += 1
+        entry["total_ms"] += s["duration_ms"]
+        entry["self_ms"] += max(0.0, s["duration_ms"] - children_ms.get(s["span_id"], 0.0))
+
+    for entry in stats.values():
+        entry["mean_ms"] = entry["total_ms"] / entry["count"]
+        for key in ("total_ms", "self_ms", "mean_ms"):
+            entry[key] = round(entry[key], 3)
+    return sorted(stats.values(), key=lambda e: e["self_ms"], reverse=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Résumé et export des traces")
+    parser.add_argument("trace_file", nargs="?", default=DEFAULT_TRACE_FILE)
+    parser.add_argument("--chrome", default=None, help="Export au format Trace Event (JSON)")
+    args = parser.parse_args()
+
+    spans = load_spans(args.trace_file)
+    traces = {s["trace_id"] for s in spans}
+    print(f"[INFO] {len(spans)} spans, {len(traces)} traces")
+
+    print(f"\n{'Span':<28} {'appels':>7} {'total':>11} {'propre':>11} {'moyen':>10}")
+    print("-" * 72)
+    for e in summarize(spans):
+        print(f"{e['name']:<28} {e['count']:>7} {e['total_ms']:>9.1f}ms "
+              f"{e['self_ms']:>9.1f}ms {e['mean_ms']:>8.2f}ms")
+
+    if args.chrome:
+        with open(args.chrome, "w", encoding="utf-8") as f:
+            json.dump(to_chrome_trace(spans), f, ensure_ascii=False)
+        print(f"\n[OK] Export Trace Event : {args.chrome}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,31 @@
-from .vector_store import VectorStore, RAGRetriever
-from .document_loader import DocumentLoader
+"""
+RAG : base vectorielle, retriever, chargement des documents. Les sous-modules
+sont importés au premier accès (PEP 562) : `import src.rag` ne charge ni
+chromadb ni sentence-transformers.
+"""
+
+import importlib
+
+_LAZY = {
+    "RAGRetriever": ".vector_store",
+    "VectorStore": ".vector_store",
+    "DocumentLoader": ".document_loader",
+}
 
 __all__ = [
     "RAGRetriever",
     "VectorStore",
     "DocumentLoader",
 ]
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        value = getattr(importlib.import_module(_LAZY[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,212 @@
+"""
+Batch Predict - Re-scoring de cas en lot (CSV / JSONL)
+
+Formats d'entrée acceptés:
+- CSV au format du dataset d'entraînement (triage_dataset_v2.csv) :
+  FC, FR, SpO2, TA_sys, TA_dia, Temp, Age, Sexe, 10 colonnes symptômes binaires, label
+- JSONL de résumés chatbot : {"patient_info": {...}, "vitals": {...}, "symptoms": [...], "label": ...}
+
+Usage:
+    python -m src.rag.batch_predict data/models/triage_dataset_v2.csv -o predictions.jsonl
+    python -m src.rag.batch_predict cases.jsonl --rag --min-accuracy 0.85
+"""
+
+import argparse
+import csv
+import json
+import sys
+import time
+from collections import Counter
+from itertools import islice
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from .predictor import MLTriagePredictor
+
+# Colonnes constantes du dataset -> clés des résumés chatbot
+_VITALS_COLUMNS = {
+    "FC": "FC",
+    "FR": "FR",
+    "SpO2": "SpO2",
+    "TA_sys": "TA_systolique",
+    "TA_dia": "TA_diastolique",
+    "Temp": "Temperature",
+}
+
+
+def _to_number(value) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def row_to_summary(row: Dict) -> Dict:
+    """
+    Convertit une ligne du dataset (features binaires) en résumé chatbot.
+
+    Chaque symptôme binaire actif est remplacé par son premier mot-clé, que
+    MLTriagePredictor._encode_symptomes ré-encode à l'identique.
+    """
+    vitals = {}
+    for column, key in _VITALS_COLUMNS.items():
+        value = _to_number(row.get(column))
+        if value is not None:
+            vitals[key] = value
+
+    patient = {}
+    age = _to_number(row.get("Age"))
+    if age is not None:
+        patient["age"] = age
+    sex = _to_number(row.get("Sexe"))
+    if sex is not None:
+        patient["sex"] = "H" if sex == 1 else "F"
+
+    symptoms = [
+        MLTriagePredictor.SYMPTOMES_KEYWORDS[s][0]
+        for s in MLTriagePredictor.SYMPTOMES_CLES
+        if _to_number(row.get(s)) == 1
+    ]
+
+    summary = {"patient_info": patient, "vitals": vitals, "symptoms": symptoms}
+    if row.get("label"):
+        summary["label"] = row["label"]
+    return summary
+
+
+def iter_cases(input_path: str) -> Iterator[Dict]:
+    """Lit les cas d'un fichier CSV ou JSONL, au fil de l'eau."""
+    path = Path(input_path)
+
+    if path.suffix.lower() == ".csv":
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            for row in csv.DictReader(f):
+                yield row_to_summary(row)
+    elif path.suffix.lower() in (".jsonl", ".ndjson"):
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+    else:
+        raise ValueError(f"Format non supporté: {path.suffix} (attendu .csv ou .jsonl)")
+
+
+def run(
+    predictor: MLTriagePredictor,
+    input_path: str,
+    output_path: Optional[str] = None,
+    batch_size: int = 512,
+    track: bool = False,
+    with_justification: bool = False,
+) -> Dict:
+    """
+    Score tous les cas d'un fichier par lots et écrit les résultats en JSONL.
+
+    Returns:
+        Rapport {total, by_severity, labeled, accuracy, confusion, elapsed, cases_per_sec}
+    """
+    by_severity = Counter()
+    confusion = Counter()
+    labeled = correct = total = 0
+    start = time.time()
+
+    out = open(output_path, "w", encoding="utf-8") if output_path else None
+    try:
+        cases = iter_cases(input_path)
+        while True:
+            batch: List[Dict] = list(islice(cases, batch_size))
+            if not batch:
+                break
+
+            results = predictor.predict_batch(batch, track=track)
+
+            for case, result in zip(batch, results):
+                severity = result["severity_level"]
+                label = case.get("label")
+                total += 1
+                by_severity[severity] += 1
+
+                if label:
+                    labeled += 1
+                    correct += int(label == severity)
+                    confusion[f"{label}->{severity}"] += 1
+
+                if out:
+                    record = {
+                        "case_id": case.get("case_id", total - 1),
+                        "label": label,
+                        "severity_level": severity,
+                        "confidence": result["confidence"],
+                        "probabilities": result["probabilities"],
+                        "red_flags": result["red_flags"],
+                    }
+                    if with_justification:
+                        record["justification"] = result["justification"]
+                    out.write(json.dumps(record, ensure_ascii=False) + "\n")
+    finally:
+        if out:
+            out.close()
+
+    elapsed = time.time() - start
+    return {
+        "total": total,
+        "by_severity": dict(by_severity),
+        "labeled": labeled,
+        "accuracy": correct / labeled if labeled else None,
+        "confusion": dict(confusion),
+        "elapsed": elapsed,
+        "cases_per_sec": total / elapsed if elapsed else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-scoring de cas de triage en lot")
+    parser.add_argument("input", help="Fichier .csv (format dataset) ou .jsonl (résumés)")
+    parser.add_argument("-o", "--output", help="Fichier JSONL de sortie")
+    parser.add_argument("--model", default=None, help="Chemin du modèle (.pkl)")
+    parser.add_argument("--batch-size", type=int, default=512)
+    parser.add_argument("--rag", action="store_true", help="Activer l'enrichissement RAG")
+    parser.add_argument("--track", action="store_true", help="Enregistrer dans le monitoring")
+    parser.add_argument("--with-justification", action="store_true")
+    parser.add_argument(
+        "--min-accuracy",
+        type=float,
+        default=None,
+        help="Code de sortie 1 si l'accuracy sur les cas labellisés est inférieure",
+    )
+    args = parser.parse_args()
+
+    rag = None
+    if args.rag:
+        from .vector_store import RAGRetriever, load_vector_store
+
+        rag = RAGRetriever(load_vector_store())
+
+    predictor = MLTriagePredictor(model_path=args.model, rag_retriever=rag)
+    report = run(
+        predictor,
+        args.input,
+        output_path=args.output,
+        batch_size=args.batch_size,
+        track=args.track,
+        with_justification=args.with_justification,
+    )
+
+    print(f"\n[OK] {report['total']} cas scores en {report['elapsed']:.2f}s "
+          f"({report['cases_per_sec']:.0f} cas/s)")
+    print(f"[INFO] Repartition : {report['by_severity']}")
+
+    if report["accuracy"] is not None:
+        print(f"[INFO] Accuracy : {report['accuracy']:.1%} sur {report['labeled']} cas labellises")
+        errors = {k: v for k, v in report["confusion"].items() if k.split("->")[0] != k.split("->")[1]}
+        if errors:
+            print(f"[INFO] Erreurs : {errors}")
+
+        if args.min_accuracy is not None and report["accuracy"] < args.min_accuracy:
+            print(f"[ERREUR] Accuracy sous le seuil ({args.min_accuracy:.1%})")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,25 +2,83 @@
 Chatbot Final - Mistral API ROBUSTE avec Monitoring
 """
 
-import re
 import time
 import os
-from typing import Dict
-from mistralai import Mistral
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import wait as futures_wait
+from typing import Dict, Iterator, List, Optional
 from dotenv import load_dotenv
 
+from ..llm.base_llm import BaseLLMProvider
+from ..llm.llm_factory import LLMFactory
+from ..llm.prompt_budget import PromptAssembler
+from ..monitoring.metrics_tracker import get_tracker
+from ..monitoring.tracing import span, wrap_context
+from .clinical_matcher import get_matcher
+
 load_dotenv()
 
+CHAT_MODEL = "mistral-small-latest"
+
+# Longueur max d'une réponse affichée (au-delà : tronquée avec "...")
+MAX_RESPONSE_CHARS = 200
+
+# Budget de tokens d'entrée par étape (historique + extraits RAG compris)
+PROMPT_BUDGETS = {"followup": 1200}
+DEFAULT_PROMPT_BUDGET = 800
+RAG_TOP_K = 3
+
+# Recherches RAG anticipées, partagées par toutes les sessions du processus
+_prefetch_executor: Optional[ThreadPoolExecutor] = None
+_prefetch_lock = threading.Lock()
+
+
+def _get_prefetch_executor() -> ThreadPoolExecutor:
+    global _prefetch_executor
+    if _prefetch_executor is None:
+        with _prefetch_lock:
+            if _prefetch_executor is None:
+                _prefetch_executor = ThreadPoolExecutor(
+                    max_workers=4, thread_name_prefix="rag-prefetch"
+                )
+    return _prefetch_executor
+
 
 class TriageChatbotAPI:
     """Chatbot Mistral API robuste avec tracking complet."""
 
-    def __init__(self, api_key: str = None, retriever=None, max_questions: int = 5):
+    def __init__(
+        self,
+        api_key: str = None,
+        retriever=None,
+        max_questions: int = 5,
+        llm_provider: BaseLLMProvider = None,
+        prompt_budgets: Dict[str, int] = None,
+    ):
+        """
+        Args:
+            api_key: Clé Mistral (défaut: MISTRAL_API_KEY)
+            retriever: Retriever RAG optionnel
+            max_questions: Nombre de questions avant de conclure
+            llm_provider: Provider déjà construit (sinon créé via LLMFactory,
+                avec le cache de réponses selon LLM_CACHE_MODE)
+            prompt_budgets: Budget de tokens d'entrée par étape (défaut: PROMPT_BUDGETS)
+        """
         self.api_key = api_key or os.getenv("MISTRAL_API_KEY")
         self.retriever = retriever  # RAG retriever
         self.max_questions = max_questions
-        if self.api_key:
-            self.client = Mistral(api_key=self.api_key)
+        self.prompt_assembler = PromptAssembler(
+            budgets={**PROMPT_BUDGETS, **(prompt_budgets or {})},
+            default_budget=DEFAULT_PROMPT_BUDGET,
+        )
+        self.last_prompt: Dict = {}
+
+        if llm_provider is None and (self.api_key or os.getenv("LLM_CACHE_MODE") == "replay"):
+            llm_provider = LLMFactory.create("mistral", CHAT_MODEL, api_key=self.api_key or "")
+        self.llm = llm_provider
+
+        if self.llm:
             self.use_api = True
 
             print("[OK] Mistral API activee")
@@ -41,12 +99,62 @@ class TriageChatbotAPI:
 
     def chat(self, msg: str) -> str:
         """Chat principal avec tracking."""
-        start = time.time()
+        with span("chat.turn", streaming=False) as s:
+            start = time.time()
+            next_step = self._begin_turn(msg)
+            use_api = self._uses_api(next_step)
+            s.set(step=next_step, api=use_api)
+
+            # Générer réponse
+            if use_api:
+                response = self._ask_with_api(next_step)
+            else:
+                response = self._ask_with_rules(next_step)
+
+            self._end_turn(response, start)
+        return response
+
+    def chat_stream(self, msg: str) -> Iterator[str]:
+        """
+        Variante de chat() produisant la réponse fragment par fragment.
+
+        Le premier fragment arrive dès que le LLM commence à répondre ; la
+        réponse complète est ajoutée à l'historique et les latences (premier
+        fragment, totale) et tokens sont enregistrés en fin de flux.
+        """
+        with span("chat.turn", streaming=True) as s:
+            start = time.time()
+            next_step = self._begin_turn(msg)
+            use_api = self._uses_api(next_step)
+            s.set(step=next_step, api=use_api)
+
+            if use_api:
+                fragments = self._stream_with_api(next_step)
+            else:
+                fragments = iter([self._ask_with_rules(next_step)])
+
+            parts = []
+            try:
+                for fragment in fragments:
+                    if not parts:
+                        ttft = time.time() - start
+                        s.set(ttft_ms=round(ttft * 1000, 1))
+                        self._track_latency(ttft, "first_token")
+                    parts.append(fragment)
+                    yield fragment
+            finally:
+                # Flux interrompu par l'appelant : la réponse partielle reste dans l'historique
+                self._end_turn("".join(parts), start)
+
+    def _begin_turn(self, msg: str) -> str:
+        """Enregistre le message patient, extrait les données et retourne l'étape suivante."""
         self.data["messages"].append({"role": "user", "content": msg})
         self.data["question_count"] = self.data.get("question_count", 0) + 1
 
         # Extraire données
-        self._extract(msg)
+        with span("chat.extract") as s:
+            self._extract(msg)
+            s.set(symptoms=len(self.data["symptoms"]), vitals=len(self.data["vitals"]))
 
         # Déterminer étape suivante
         next_step = self._get_next_step()
@@ -54,20 +162,17 @@ class TriageChatbotAPI:
         # Si on a atteint le nombre max de questions et que les infos essentielles sont là
         if self.data["question_count"] >= self.max_questions and next_step not in ("identity",):
             next_step = "done"
+        return next_step
 
-        # Générer réponse
-        if self.use_api and self.data.get("age") and next_step != "identity":
-            response = self._ask_with_api(next_step)
-        else:
-            response = self._ask_with_rules(next_step)
+    def _uses_api(self, step: str) -> bool:
+        return bool(self.use_api and self.data.get("age") and step != "identity")
 
+    def _end_turn(self, response: str, start: float):
         self.data["messages"].append({"role": "assistant", "content": response})
 
         # Track latence
         self._track_latency(time.time() - start)
 
-        return response
-
     def _get_next_step(self) -> str:
         """Détermine prochaine étape unique."""
         if not self.data.get("age") or not self.data.get("sex"):
@@ -96,111 +201,187 @@ class TriageChatbotAPI:
 
         return "done"
 
-    def _ask_with_api(self, step: str) -> str:
-        """Appel Mistral avec enrichissement RAG."""
-        try:
-            # Récupérer contexte RAG si symptômes présents
-            rag_context = ""
-            if self.retriever and self.data.get("symptoms"):
-                try:
-                    query = " ".join(self.data["symptoms"])
-                    # Supporte les deux interfaces (RAGRetriever et Retriever)
-                    if hasattr(self.retriever, "retrieve_context"):
-                        rag_context = self.retriever.retrieve_context(query=query, top_k=3)
-                    elif hasattr(self.retriever, "retrieve_and_format"):
-                        rag_context = self.retriever.retrieve_and_format(
-                            query=query, top_k=3, max_tokens=500
-                        )
-                    else:
-                        rag_context = ""
-                except Exception as e:
-                    print(f"RAG Error: {e}")
-                    rag_context = ""
+    def _build_messages(self, step: str) -> list:
+        """Messages système + utilisateur de l'étape, sous le budget de tokens de l'étape."""
+        # Récupérer contexte RAG si symptômes présents
+        chunks = self._get_chunks()
 
-            # Prompts système
-            prompts = {
-                "symptoms": """Tu es un assistant médical empathique. Le patient a déjà donné son identité.
+        # Prompts système
+        prompts = {
+            "symptoms": """Tu es un assistant médical empathique. Le patient a déjà donné son identité.
 Demande maintenant son symptôme principal de manière naturelle et rassurante.
 Réponds en 1-2 phrases maximum.""",
-                "temperature": """Le patient a décrit ses symptômes.
+            "temperature": """Le patient a décrit ses symptômes.
 Demande maintenant sa température corporelle de manière claire.
 IMPORTANT: L'exemple DOIT inclure l'unité °C pour que le système reconnaisse la valeur.
 Exemple à donner: "38.5°C" ou "38.5 degrés"
 Sois bref et précis.""",
-                "fc": """Demande la fréquence cardiaque (pouls) du patient.
+            "fc": """Demande la fréquence cardiaque (pouls) du patient.
 IMPORTANT: L'exemple DOIT inclure l'unité bpm pour que le système reconnaisse la valeur.
 Exemple à donner: "80 bpm" ou "80 battements par minute"
 Reste concis.""",
-                "ta": """Demande la tension artérielle.
+            "ta": """Demande la tension artérielle.
 Format attendu: deux nombres séparés par un slash (systolique/diastolique).
 Exemple à donner: "120/80"
 Une seule phrase.""",
-                "spo2": """Demande la saturation en oxygène (SpO2).
+            "spo2": """Demande la saturation en oxygène (SpO2).
 IMPORTANT: L'exemple DOIT inclure le symbole % pour que le système reconnaisse la valeur.
 Exemple à donner: "97%" ou "saturation 97"
 Sois direct.""",
-                "fr": """Demande la fréquence respiratoire.
+            "fr": """Demande la fréquence respiratoire.
 IMPORTANT: L'exemple DOIT inclure l'unité /min pour que le système reconnaisse la valeur.
 Exemple à donner: "16/min" ou "16 respirations par minute"
 Concis et clair.""",
-                "followup": """Tu es un assistant médical empathique. Toutes les constantes vitales sont déjà connues.
+            "followup": """Tu es un assistant médical empathique. Toutes les constantes vitales sont déjà connues.
 Pose une question de suivi pertinente pour mieux comprendre la situation clinique du patient :
 durée des symptômes, intensité (sur 10), antécédents médicaux, traitements en cours, allergies, ou contexte d'apparition.
 Adapte ta question aux symptômes déjà décrits. Sois bref et empathique.""",
-                "done": """Toutes les informations sont collectées.
+            "done": """Toutes les informations sont collectées.
 Informe le patient que son dossier est complet et qu'il peut obtenir une prédiction.
 Sois rassurant et professionnel.
 Une phrase courte.""",
-            }
+        }
 
-            system_prompt = prompts.get(step, "Guide le patient avec empathie.")
+        system_prompt = prompts.get(step, "Guide le patient avec empathie.")
 
-            # Ajouter le contexte RAG au prompt si disponible
-            if rag_context:
-                system_prompt += f"""
+        # Contexte des données déjà collectées
+        context = self._build_context()
 
-Contexte médical de référence (utilise ces informations pour guider tes questions):
-{rag_context}"""
+        # Pour followup : passer l'historique réel de la conversation
+        history = []
+        if step == "followup":
+            history = [
+                f"{'Patient' if m['role'] == 'user' else 'Infirmier'}: {m['content']}"
+                for m in self.data["messages"][-10:]
+            ]
 
-            # Contexte des données déjà collectées
-            context = self._build_context()
+        def render_user(history_text: str) -> str:
+            if step != "followup":
+                return f"Contexte patient: {context}\n\nQuelle est ta question ?"
+            return (
+                f"Contexte patient: {context}\n\n"
+                f"Conversation jusqu'ici:\n{history_text}\n\n"
+                f"En tenant compte de tout ce qui précède, pose la prochaine question."
+            )
 
-            # Pour followup : passer l'historique réel de la conversation
-            if step == "followup":
-                history_text = "\n".join(
-                    f"{'Patient' if m['role'] == 'user' else 'Infirmier'}: {m['content']}"
-                    for m in self.data["messages"][-10:]
-                )
-                user_content = (
-                    f"Contexte patient: {context}\n\n"
-                    f"Conversation jusqu'ici:\n{history_text}\n\n"
-                    f"En tenant compte de tout ce qui précède, pose la prochaine question."
-                )
+        # Historique puis extraits RAG les plus pertinents, tant que le budget le permet
+        with span("prompt.assemble", step=step) as s:
+            prompt = self.prompt_assembler.assemble(
+                step,
+                system_prompt,
+                render_user,
+                chunks=chunks,
+                history=history,
+                chunks_header=(
+                    "\n\nContexte médical de référence "
+                    "(utilise ces informations pour guider tes questions):\n"
+                ),
+            )
+            self.last_prompt = {k: v for k, v in prompt.items() if k != "messages"}
+            s.set(**{k: v for k, v in self.last_prompt.items() if k != "truncated"})
+        return prompt["messages"]
+
+    def _prefetch_retrieval(self) -> None:
+        """Lance en arrière-plan la recherche RAG des symptômes courants (si pas déjà en mémoire)."""
+        if not (self.use_api and self.retriever and self.data.get("symptoms")):
+            return
+        key = tuple(self.data["symptoms"])
+        if self._retrieval is not None and self._retrieval[0] == key:
+            return
+        query = " ".join(key)
+        # Contexte copié : les spans de la recherche restent rattachés au tour
+        future = _get_prefetch_executor().submit(
+            wrap_context(lambda: self._retrieve_chunks(query, prefetch=True))
+        )
+        self._retrieval = (key, future)
+        self.retrieval_stats["prefetched"] += 1
+
+    def _get_chunks(self) -> List[Dict]:
+        """
+        Extraits RAG des symptômes courants, mémorisés pour la session.
+
+        La recherche n'est refaite que si la liste des symptômes a changé ;
+        si elle a été anticipée, on attend au plus la fin de celle en cours.
+        """
+        if not (self.retriever and self.data.get("symptoms")):
+            return []
+
+        with span("rag.chunks", top_k=RAG_TOP_K) as s:
+            key = tuple(self.data["symptoms"])
+            if self._retrieval is not None and self._retrieval[0] == key:
+                self.retrieval_stats["hits"] += 1
+                future = self._retrieval[1]
+                s.set(memo_hit=True, pending=not future.done())
             else:
-                user_content = f"Contexte patient: {context}\n\nQuelle est ta question ?"
+                self.retrieval_stats["misses"] += 1
+                s.set(memo_hit=False)
+                future = Future()
+                try:
+                    future.set_result(self._retrieve_chunks(" ".join(key)))
+                except Exception as e:
+                    future.set_exception(e)
+                self._retrieval = (key, future)
+
+            try:
+                chunks = future.result()
+            except Exception as e:
+                print(f"RAG Error: {e}")
+                # Échec non mémorisé : nouvelle tentative au prochain tour
+                if self._retrieval is not None and self._retrieval[1] is future:
+                    self._retrieval = None
+                return []
+            s.set(chunks=len(chunks))
+            return chunks
+
+    def _retrieve_chunks(self, query: str, prefetch: bool = False) -> list:
+        """Extraits RAG avec score (RAGRetriever), ou contexte formaté découpé par source."""
+        with span("rag.retrieve", top_k=RAG_TOP_K, prefetch=prefetch):
+            return self._query_retriever(query)
+
+    def _query_retriever(self, query: str) -> list:
+        # Supporte les deux interfaces (RAGRetriever et Retriever)
+        if hasattr(self.retriever, "retrieve_with_scores"):
+            return self.retriever.retrieve_with_scores(query, top_k=RAG_TOP_K)
+        if hasattr(self.retriever, "retrieve_context"):
+            context = self.retriever.retrieve_context(query=query, top_k=RAG_TOP_K)
+        elif hasattr(self.retriever, "retrieve_and_format"):
+            context = self.retriever.retrieve_and_format(
+                query=query, top_k=RAG_TOP_K, max_tokens=500
+            )
+        else:
+            return []
+        # Déjà formaté : ordre du retriever conservé (rang décroissant)
+        parts = [p for p in context.split("\n---\n") if p.strip()]
+        return [{"content": p, "score": -i} for i, p in enumerate(parts)]
+
+    def _ask_with_api(self, step: str) -> str:
+        """Appel Mistral avec enrichissement RAG."""
+        try:
+            messages = self._build_messages(step)
 
             # Appel API Mistral
             start = time.time()
-            resp = self.client.chat.complete(
-                model="mistral-small-latest",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_content},
-                ],
-                temperature=0.4,
-                max_tokens=100,
-            )
+            with span("llm.generate", step=step) as s:
+                resp = self.llm.generate_with_metadata(
+                    messages=messages,
+                    temperature=0.4,
+                    max_tokens=100,
+                )
+                s.set(
+                    tokens_in=resp.get("input_tokens"),
+                    tokens_out=resp.get("output_tokens"),
+                    cached=bool(resp.get("cached")),
+                )
 
-            # Track API call
-            self._track_api(
-                resp.usage.prompt_tokens, resp.usage.completion_tokens, time.time() - start
-            )
+            # Track API call (une réponse servie par le cache ne coûte rien)
+            if not resp.get("cached"):
+                self._track_api(resp["input_tokens"], resp["output_tokens"], time.time() - start)
 
-            response = resp.choices[0].message.content.strip()
+            response = resp["response"].strip()
 
             # Nettoyer la réponse si trop longue
-            if len(response) > 200:
-                response = response[:200] + "..."
+            if len(response) > MAX_RESPONSE_CHARS:
+                response = response[:MAX_RESPONSE_CHARS] + "..."
 
             return response
 
@@ -208,6 +389,47 @@ Contexte médical de référence (utilise ces informations pour guider tes quest
             print(f"API Error: {e}")
             return self._ask_with_rules(step)
 
+    def _stream_with_api(self, step: str) -> Iterator[str]:
+        """Version streaming de _ask_with_api (même prompt, même troncature)."""
+        emitted = 0
+        truncated = False
+        metadata = {}
+
+        try:
+            messages = self._build_messages(step)
+            start = time.time()
+            with span("llm.stream", step=step) as s:
+                for fragment in self.llm.stream(
+                    messages, temperature=0.4, max_tokens=100, on_complete=metadata.update
+                ):
+                    # Au-delà de la limite, le flux est consommé sans être affiché
+                    # pour que les tokens soient comptés en fin de flux
+                    if truncated:
+                        continue
+                    if not emitted:
+                        fragment = fragment.lstrip()
+                    remaining = MAX_RESPONSE_CHARS - emitted
+                    if len(fragment) > remaining:
+                        fragment, truncated = fragment[:remaining] + "...", True
+                    if fragment:
+                        emitted += len(fragment)
+                        yield fragment
+                s.set(
+                    tokens_in=metadata.get("input_tokens"),
+                    tokens_out=metadata.get("output_tokens"),
+                    ttft_ms=metadata.get("ttft_ms"),
+                    cached=bool(metadata.get("cached")),
+                )
+
+        except Exception as e:
+            print(f"API Error: {e}")
+            if not emitted:
+                yield self._ask_with_rules(step)
+            return
+
+        if metadata and not metadata.get("cached"):
+            self._track_api(metadata["input_tokens"], metadata["output_tokens"], time.time() - start)
+
     def _build_context(self) -> str:
         """Construit contexte pour Mistral."""
         parts = []
@@ -272,16 +494,13 @@ Contexte médical de référence (utilise ces informations pour guider tes quest
         return responses.get(step, "Erreur")
 
     def _extract(self, msg: str):
-        """Extraction robuste."""
+        """Extraction robuste (lexique et constantes précompilés, un seul passage)."""
         ml = msg.lower()
+        found = get_matcher().match(msg)
 
         # Âge
-        if not self.data.get("age"):
-            m = re.search(r"(\d{1,3})\s*ans?", ml)
-            if m:
-                age = int(m.group(1))
-                if 0 < age < 120:
-                    self.data["age"] = age
+        if not self.data.get("age") and found["age"]:
+            self.data["age"] = found["age"]
 
         # Sexe
         if not self.data.get("sex"):
@@ -298,168 +517,42 @@ Contexte médical de référence (utilise ces informations pour guider tes quest
                 if len(first) >= 2 and first[0].isupper():
                     self.data["name"] = first
 
-        # Symptômes - dictionnaire étendu par catégorie médicale
-        symp = {
-            # ══════════════════════════════════════════════════════════
-            # NEUROLOGIQUE
-            # ══════════════════════════════════════════════════════════
-            r"t[eéèê]te|c[ée]phal|migraine": "Céphalée",
-            r"vertige|tournis|[ée]tourdissement": "Vertiges",
-            r"syncope|[ée]vanoui|perte\s*de\s*connaissance": "Syncope",
-            r"convulsion|crise|[ée]pilep": "Convulsions",
-            r"confusion|d[ée]sorient": "Confusion",
-            r"paralys|faiblesse.*(bras|jambe|visage)": "Déficit neurologique",
-            r"trouble.*parole|difficult.*parler": "Trouble de la parole",
-            r"trouble.*vision|voi[rt]\s*flou|double": "Trouble visuel",
-            # ══════════════════════════════════════════════════════════
-            # CARDIOVASCULAIRE
-            # ══════════════════════════════════════════════════════════
-            r"poitrine|thorax|oppression": "Douleur thoracique",
-            r"palpitation|cœur\s*bat|tachycardie": "Palpitations",
-            r"jambe.*gonfl|œd[èe]me|enfl[ée]": "Œdème",
-            # ══════════════════════════════════════════════════════════
-            # RESPIRATOIRE
-            # ══════════════════════════════════════════════════════════
-            r"essouffl[éeè]|dyspn[ée]e|respir.*difficile": "Dyspnée",
-            r"toux": "Toux",
-            r"crachats?|expectoration": "Expectorations",
-            r"[ée]touff|suffoqu": "Détresse respiratoire",
-            # ══════════════════════════════════════════════════════════
-            # DIGESTIF
-            # ══════════════════════════════════════════════════════════
-            r"ventre|abdomen|estomac": "Douleur abdominale",
-            r"naus[ée]e|envie\s*de\s*vomir|mal\s*au\s*cœur": "Nausées",
-            r"vomi|r[ée]gurgit": "Vomissements",
-            r"diarrh[ée]e|selles?\s*liquides?": "Diarrhée",
-            r"constip|bloqu[ée]|transit": "Constipation",
-            r"sang.*selles|rectorragie": "Rectorragie",
-            r"br[uû]lure.*estomac|reflux|acidit": "Reflux gastrique",
-            r"difficult[ée].*avaler|dysphagie": "Dysphagie",
-            # ══════════════════════════════════════════════════════════
-            # URINAIRE
-            # ══════════════════════════════════════════════════════════
-            r"br[uû]l.*urin|cystite": "Brûlures mictionnelles",
-            r"sang.*urine|h[ée]maturie": "Hématurie",
-            r"envie.*fr[ée]quente|pollakiurie": "Pollakiurie",
-            r"difficult[ée].*uriner|r[ée]tention": "Dysurie",
-            # ══════════════════════════════════════════════════════════
-            # MUSCULO-SQUELETTIQUE
-            # ══════════════════════════════════════════════════════════
-            r"dos|lombaire|lumbago|sciatique": "Lombalgie",
-            r"genou": "Gonalgie",
-            r"hanche": "Coxalgie",
-            r"cheville|entorse": "Douleur cheville",
-            r"[ée]paule": "Omalgie",
-            r"nuque|cervical|torticolis": "Cervicalgie",
-            r"articulation|arthr": "Arthralgie",
-            r"fracture|cass[ée]": "Traumatisme osseux",
-            r"bras": "Douleur membre supérieur",
-            r"jambe|mollet": "Douleur membre inférieur",
-            # ══════════════════════════════════════════════════════════
-            # ORL / OPHTALMOLOGIE
-            # ══════════════════════════════════════════════════════════
-            r"gorge|angine|pharyn": "Odynophagie",
-            r"oreille|otite|acouph[èe]ne": "Otalgie",
-            r"nez.*bouch|rhume|sinusite": "Rhinite/Sinusite",
-            r"saign.*nez|[ée]pistaxis": "Épistaxis",
-            r"œil.*rouge|conjonctiv": "Conjonctivite",
-            r"œil.*douleur": "Douleur oculaire",
-            # ══════════════════════════════════════════════════════════
-            # DERMATOLOGIE
-            # ══════════════════════════════════════════════════════════
-            r"[ée]ruption|bouton|rash|plaques?": "Éruption cutanée",
-            r"d[ée]mangeaison|prurit|gratt": "Prurit",
-            r"br[uû]lure(?!.*estomac)": "Brûlure",
-            r"plaie|coupure|blessure": "Plaie",
-            r"abc[èe]s|furoncle": "Abcès",
-            # ══════════════════════════════════════════════════════════
-            # GÉNÉRAL / PSYCHIATRIQUE
-            # ══════════════════════════════════════════════════════════
-            r"fi[eéèê]vre|temp[éeè]rature|frisson": "Fièvre",
-            r"fatigue|[ée]puis[ée]|asth[ée]nie": "Asthénie",
-            r"perte.*poids|amaigri": "Amaigrissement",
-            r"sueur|transpir": "Sueurs",
-            r"insomnie|dort.*mal|sommeil": "Trouble du sommeil",
-            r"anxi[ée]t[ée]|stress|angoiss|panique": "Anxiété",
-            r"allergi|r[ée]action|urticaire": "Réaction allergique",
-            r"d[ée]prim|triste|moral": "Syndrome dépressif",
-        }
-
-        for p, s in symp.items():
-            if s and re.search(p, ml):  # Ignorer les patterns avec valeur vide
-                if s not in self.data["symptoms"]:
-                    self.data["symptoms"].append(s)
-
-        # Température - exiger contexte (°, degré, température, temp)
-        if "Temperature" not in self.data["vitals"]:
-            m = re.search(r"(\d{2}[.,]?\d?)\s*(?:°|degr|temp)", ml)
-            if m:
-                t = float(m.group(1).replace(",", "."))
-                if 35 <= t <= 43:
-                    self.data["vitals"]["Temperature"] = t
-
-        # FC - exiger contexte (bpm, battement, pouls, cardiaque, fc)
-        if "FC" not in self.data["vitals"]:
-            m = re.search(r"(\d{2,3})\s*(?:bpm|battement|pouls|cardiaque|fc)", ml)
-            if m:
-                fc = int(m.group(1))
-                if 30 <= fc <= 220:
-                    self.data["vitals"]["FC"] = fc
-
-        # TA - format explicite avec slash
-        if "TA_systolique" not in self.data["vitals"]:
-            m = re.search(r"(\d{2,3})\s*/\s*(\d{2,3})", ml)
-            if m:
-                self.data["vitals"]["TA_systolique"] = int(m.group(1))
-                self.data["vitals"]["TA_diastolique"] = int(m.group(2))
-
-        # SpO2 - exiger contexte (%, sat, spo, oxygène)
-        if "SpO2" not in self.data["vitals"]:
-            m = re.search(r"(\d{2,3})\s*(?:%|sat|spo|oxyg)", ml)
-            if m:
-                spo2 = int(m.group(1))
-                if 50 <= spo2 <= 100:
-                    self.data["vitals"]["SpO2"] = spo2
-
-        # FR - exiger contexte (respir, /min, fr)
-        if "FR" not in self.data["vitals"]:
-            m = re.search(r"(\d{1,2})\s*(?:respir|/min|fr\b)", ml)
-            if m:
-                fr = int(m.group(1))
-                if 5 <= fr <= 60:
-                    self.data["vitals"]["FR"] = fr
-
-    def _track_latency(self, duration: float):
-        """Track latence chatbot."""
+        # Symptômes - lexique par catégorie médicale (clinical_matcher.SYMPTOM_LEXICON)
+        for s in found["symptoms"]:
+            if s not in self.data["symptoms"]:
+                self.data["symptoms"].append(s)
+
+        # Nouveaux symptômes : recherche RAG lancée pendant la suite du tour
+        self._prefetch_retrieval()
+
+        # Constantes - première lecture plausible de chaque type
+        vitals = self.data["vitals"]
+        for kind, values in found["vitals"].items():
+            if kind == "TA":
+                if "TA_systolique" not in vitals:
+                    vitals["TA_systolique"], vitals["TA_diastolique"] = values[0]
+            elif kind not in vitals:
+                vitals[kind] = values[0]
+
+    def _track_latency(self, duration: float, operation: str = "chat"):
+        """Track latence chatbot (operation: "chat" ou "first_token")."""
         try:
-            import sys
-            from pathlib import Path
-
-            sys.path.insert(0, str(Path(__file__).parent.parent))
-            from src.monitoring.metrics_tracker import get_tracker
-
-            get_tracker().track_latency("Chatbot", "chat", duration)
-        except:
+            get_tracker().track_latency("Chatbot", operation, duration)
+        except Exception:
             pass
 
     def _track_api(self, tokens_in: int, tokens_out: int, latency: float):
         """Track appel API Mistral."""
         try:
-            import sys
-            from pathlib import Path
-
-            sys.path.insert(0, str(Path(__file__).parent.parent))
-            from src.monitoring.metrics_tracker import get_tracker
-
             get_tracker().track_api_call(
                 service="mistral",
-                model="mistral-small-latest",
+                model=CHAT_MODEL,
                 tokens_input=tokens_in,
                 tokens_output=tokens_out,
                 latency=latency,
                 success=True,
             )
-        except:
+        except Exception:
             pass
 
     def is_ready_for_prediction(self) -> bool:
@@ -487,6 +580,36 @@ Contexte médical de référence (utilise ces informations pour guider tes quest
             ],
         }
 
+    def export_state(self, wait: float = 0.0) -> Dict:
+        """
+        État de la conversation, sérialisable en JSON (voir session_store).
+
+        Les extraits RAG déjà obtenus pour les symptômes courants sont inclus :
+        la session rechargée ailleurs ne refait pas la recherche.
+
+        Args:
+            wait: Attente max (s) d'une recherche anticipée encore en cours
+                (tour sans appel LLM) pour l'inclure au lieu de la perdre
+        """
+        state = {"data": self.data}
+        if self._retrieval is not None:
+            symptoms, future = self._retrieval
+            if wait > 0 and not future.done():
+                futures_wait([future], timeout=wait)
+            if future.done() and future.exception() is None:
+                state["retrieval"] = {"symptoms": list(symptoms), "chunks": future.result()}
+        return state
+
+    def load_state(self, state: Dict) -> None:
+        """Reprend une conversation exportée par export_state (remplace l'état courant)."""
+        self.reset()
+        self.data.update(state.get("data", {}))
+        retrieval = state.get("retrieval")
+        if retrieval:
+            future = Future()
+            future.set_result(retrieval["chunks"])
+            self._retrieval = (tuple(retrieval["symptoms"]), future)
+
     def reset(self):
         """Reset complet."""
         self.data = {
@@ -498,3 +621,6 @@ Contexte médical de référence (utilise ces informations pour guider tes quest
             "messages": [],
             "question_count": 0,
         }
+        # Recherche RAG de la session : (symptômes, Future des extraits)
+        self._retrieval = None
+        self.retrieval_stats = {"hits": 0, "misses": 0, "prefetched": 0}
@@ -0,0 +1,319 @@
+"""
+Extraction des symptômes et constantes d'un message patient (texte libre).
+
+Le lexique des symptômes et la grammaire des constantes sont compilés une
+seule fois à l'import. Chaque motif du lexique est indexé par les trigrammes
+par lesquels il peut commencer : un passage sur le message donne ses
+trigrammes, et seuls les motifs dont un trigramme d'entrée est présent sont
+évalués (résultat identique à un re.search par motif, sans les ~70 passes).
+Les constantes sont lues par une seule expression combinée.
+
+Usage:
+    from src.rag.clinical_matcher import get_matcher
+
+    result = get_matcher().match("J'ai 38,5° et le cœur à 110 bpm, mal à la tête")
+    # {"symptoms": ["Céphalée", "Fièvre"], "vitals": {"Temperature": [38.5], "FC": [110]}, "age": None}
+"""
+
+import re
+from typing import Dict, Iterable, List, Optional
+
+# Analyseur interne de re, utilisé volontairement : il donne l'arbre des motifs
+# du lexique (premiers caractères possibles) sans réécrire une grammaire des
+# regex. Seul l'index en dépend ; tests/test_clinical_matcher.py vérifie que le
+# résultat reste celui d'un re.search par motif.
+try:
+    from re import _parser as sre_parse
+except ImportError:  # Python < 3.11 (sre_parse, déprécié depuis 3.11)
+    import sre_parse
+
+# Longueur des clés de l'index du lexique
+GRAM_SIZE = 3
+
+# Motif (minuscules) -> symptôme normalisé, dans l'ordre de restitution
+SYMPTOM_LEXICON = {
+    # ══════════════════════════════════════════════════════════
+    # NEUROLOGIQUE
+    # ══════════════════════════════════════════════════════════
+    r"t[eéèê]te|c[ée]phal|migraine": "Céphalée",
+    r"vertige|tournis|[ée]tourdissement": "Vertiges",
+    r"syncope|[ée]vanoui|perte\s*de\s*connaissance": "Syncope",
+    r"convulsion|crise|[ée]pilep": "Convulsions",
+    r"confusion|d[ée]sorient": "Confusion",
+    r"paralys|faiblesse.*(bras|jambe|visage)": "Déficit neurologique",
+    r"trouble.*parole|difficult.*parler": "Trouble de la parole",
+    r"trouble.*vision|voi[rt]\s*flou|double": "Trouble visuel",
+    # ══════════════════════════════════════════════════════════
+    # CARDIOVASCULAIRE
+    # ══════════════════════════════════════════════════════════
+    r"poitrine|thorax|oppression": "Douleur thoracique",
+    r"palpitation|cœur\s*bat|tachycardie": "Palpitations",
+    r"jambe.*gonfl|œd[èe]me|enfl[ée]": "Œdème",
+    # ══════════════════════════════════════════════════════════
+    # RESPIRATOIRE
+    # ══════════════════════════════════════════════════════════
+    r"essouffl[éeè]|dyspn[ée]e|respir.*difficile": "Dyspnée",
+    r"toux": "Toux",
+    r"crachats?|expectoration": "Expectorations",
+    r"[ée]touff|suffoqu": "Détresse respiratoire",
+    # ══════════════════════════════════════════════════════════
+    # DIGESTIF
+    # ══════════════════════════════════════════════════════════
+    r"ventre|abdomen|estomac": "Douleur abdominale",
+    r"naus[ée]e|envie\s*de\s*vomir|mal\s*au\s*cœur": "Nausées",
+    r"vomi|r[ée]gurgit": "Vomissements",
+    r"diarrh[ée]e|selles?\s*liquides?": "Diarrhée",
+    r"constip|bloqu[ée]|transit": "Constipation",
+    r"sang.*selles|rectorragie": "Rectorragie",
+    r"br[uû]lure.*estomac|reflux|acidit": "Reflux gastrique",
+    r"difficult[ée].*avaler|dysphagie": "Dysphagie",
+    # ══════════════════════════════════════════════════════════
+    # URINAIRE
+    # ══════════════════════════════════════════════════════════
+    r"br[uû]l.*urin|cystite": "Brûlures mictionnelles",
+    r"sang.*urine|h[ée]maturie": "Hématurie",
+    r"envie.*fr[ée]quente|pollakiurie": "Pollakiurie",
+    r"difficult[ée].*uriner|r[ée]tention": "Dysurie",
+    # ══════════════════════════════════════════════════════════
+    # MUSCULO-SQUELETTIQUE
+    # ══════════════════════════════════════════════════════════
+    r"dos|lombaire|lumbago|sciatique": "Lombalgie",
+    r"genou": "Gonalgie",
+    r"hanche": "Coxalgie",
+    r"cheville|entorse": "Douleur cheville",
+    r"[ée]paule": "Omalgie",
+    r"nuque|cervical|torticolis": "Cervicalgie",
+    r"articulation|arthr": "Arthralgie",
+    r"fracture|cass[ée]": "Traumatisme osseux",
+    r"bras": "Douleur membre supérieur",
+    r"jambe|mollet": "Douleur membre inférieur",
+    # ══════════════════════════════════════════════════════════
+    # ORL / OPHTALMOLOGIE
+    # ══════════════════════════════════════════════════════════
+    r"gorge|angine|pharyn": "Odynophagie",
+    r"oreille|otite|acouph[èe]ne": "Otalgie",
+    r"nez.*bouch|rhume|sinusite": "Rhinite/Sinusite",
+    r"saign.*nez|[ée]pistaxis": "Épistaxis",
+    r"œil.*rouge|conjonctiv": "Conjonctivite",
+    r"œil.*douleur": "Douleur oculaire",
+    # ══════════════════════════════════════════════════════════
+    # DERMATOLOGIE
+    # ══════════════════════════════════════════════════════════
+    r"[ée]ruption|bouton|rash|plaques?": "Éruption cutanée",
+    r"d[ée]mangeaison|prurit|gratt": "Prurit",
+    r"br[uû]lure(?!.*estomac)": "Brûlure",
+    r"plaie|coupure|blessure": "Plaie",
+    r"abc[èe]s|furoncle": "Abcès",
+    # ══════════════════════════════════════════════════════════
+    # GÉNÉRAL / PSYCHIATRIQUE
+    # ══════════════════════════════════════════════════════════
+    r"fi[eéèê]vre|temp[éeè]rature|frisson": "Fièvre",
+    r"fatigue|[ée]puis[ée]|asth[ée]nie": "Asthénie",
+    r"perte.*poids|amaigri": "Amaigrissement",
+    r"sueur|transpir": "Sueurs",
+    r"insomnie|dort.*mal|sommeil": "Trouble du sommeil",
+    r"anxi[ée]t[ée]|stress|angoiss|panique": "Anxiété",
+    r"allergi|r[ée]action|urticaire": "Réaction allergique",
+    r"d[ée]prim|triste|moral": "Syndrome dépressif",
+}
+
+# Constantes : un nombre suivi de son contexte (°, bpm, %, /min...)
+VITALS_GRAMMAR = {
+    "TA": r"(\d{2,3})\s*/\s*(\d{2,3})",
+    "Temperature": r"(\d{2}[.,]?\d?)\s*(?:°|degr|temp)",
+    "FC": r"(\d{2,3})\s*(?:bpm|battement|pouls|cardiaque|fc)",
+    "SpO2": r"(\d{2,3})\s*(?:%|sat|spo|oxyg)",
+    "FR": r"(\d{1,2})\s*(?:respir|/min|fr\b)",
+    "age": r"(\d{1,3})\s*ans?",
+}
+
+# Plages plausibles : les lectures hors plage sont ignorées
+VITALS_RANGES = {
+    "Temperature": (35, 43),
+    "FC": (30, 220),
+    "SpO2": (50, 100),
+    "FR": (5, 60),
+    "age": (1, 119),
+}
+
+
+def _leading_grams(pattern: str, size: int = GRAM_SIZE) -> Optional[set]:
+    """
+    Chaînes de `size` caractères par lesquelles une occurrence du motif commence.
+
+    None si le début du motif n'est pas fait de littéraux / classes simples
+    (le motif sera alors toujours évalué).
+    """
+    try:
+        parsed = sre_parse.parse(pattern)
+    except re.error:
+        return None
+
+    branches = [parsed]
+    if len(parsed) == 1 and parsed[0][0] is sre_parse.BRANCH:
+        branches = parsed[0][1][1]
+
+    grams = set()
+    for branch in branches:
+        if len(branch) < size:
+            return None
+        prefixes = {""}
+        for op, av in branch[:size]:
+            if op is sre_parse.LITERAL:
+                chars = [chr(av)]
+            elif op is sre_parse.IN and all(o is sre_parse.LITERAL for o, _ in av):
+                chars = [chr(c) for _, c in av]
+            else:
+                return None
+            prefixes = {p + c for p in prefixes for c in chars}
+        grams |= prefixes
+    return grams
+
+
+_DIGIT = re.compile(r"\d")
+
+
+class ClinicalMatcher:
+    """Lexique des symptômes et grammaire des constantes, compilés une fois."""
+
+    def __init__(
+        self,
+        lexicon: Optional[Dict[str, str]] = None,
+        vitals: Optional[Dict[str, str]] = None,
+    ):
+        """
+        Args:
+            lexicon: Motif -> symptôme (défaut: SYMPTOM_LEXICON)
+            vitals: Constante -> motif (défaut: VITALS_GRAMMAR)
+        """
+        lexicon = lexicon or SYMPTOM_LEXICON
+        vitals = vitals or VITALS_GRAMMAR
+
+        self._symptoms = [(re.compile(p), s) for p, s in lexicon.items() if s]
+
+        # Trigramme d'entrée -> motifs candidats
+        self._index: Dict[str, set] = {}
+        self._always = set()
+        for i, (pattern, _) in enumerate(self._symptoms):
+            grams = _leading_grams(pattern.pattern)
+            if grams is None:
+                self._always.add(i)
+                continue
+            for gram in grams:
+                self._index.setdefault(gram, set()).add(i)
+        self._grams = self._index.keys()
+
+        # Groupes nommés dans un lookahead : chaque position est examinée
+        # indépendamment (« 120/80, 80 bpm » donne la TA et la FC), y compris à
+        # l'intérieur d'un nombre (« 1110 bpm » -> FC 110, comme un re.search)
+        self._vitals_groups = {}
+        alternatives = []
+        for kind, pattern in vitals.items():
+            group = f"v_{kind}"
+            self._vitals_groups[group] = (kind, re.compile(pattern).groups)
+            alternatives.append(f"(?P<{group}>{pattern})")
+        self._vitals_scan = re.compile(r"(?=" + "|".join(alternatives) + ")")
+
+    def match_symptoms(self, text: str) -> List[str]:
+        """Symptômes présents dans un texte en minuscules, dans l'ordre du lexique."""
+        present = {text[i : i + GRAM_SIZE] for i in range(len(text) - GRAM_SIZE + 1)}
+
+        candidates = set(self._always)
+        for gram in self._grams & present:
+            candidates |= self._index[gram]
+
+        symptoms = []
+        for i in sorted(candidates):
+            pattern, symptom = self._symptoms[i]
+            if symptom not in symptoms and pattern.search(text):
+                symptoms.append(symptom)
+        return symptoms
+
+    def match_vitals(self, text: str) -> Dict[str, list]:
+        """
+        Toutes les lectures de constantes, dans l'ordre du texte.
+
+        Returns:
+            {"Temperature": [38.5], "FC": [110], "TA": [(120, 80)], "age": [45], ...}
+            (lectures hors plage exclues)
+        """
+        readings: Dict[str, list] = {}
+        if not _DIGIT.search(text):
+            return readings
+
+        # Nombres ayant déjà donné une lecture (plausible ou non), par constante :
+        # « 120/80 » ne donne pas aussi « 20/80 », ni « 250 bpm » « 50 bpm »
+        read_from: Dict[str, set] = {}
+        for m in self._vitals_scan.finditer(text):
+            group = m.lastgroup
+            if group is None:
+                continue
+            kind, n_groups = self._vitals_groups[group]
+            start = m.start()
+            while start and text[start - 1].isdigit():
+                start -= 1
+            if start in read_from.get(kind, ()):
+                continue
+            index = self._vitals_scan.groupindex[group]
+            values = m.groups()[index : index + n_groups]
+
+            if kind == "TA":
+                value = (int(values[0]), int(values[1]))
+            elif kind == "Temperature":
+                value = float(values[0].replace(",", "."))
+            else:
+                value = int(values[0])
+
+            read_from.setdefault(kind, set()).add(start)
+            bounds = VITALS_RANGES.get(kind)
+            if bounds and not bounds[0] <= value <= bounds[1]:
+                continue
+            readings.setdefault(kind, []).append(value)
+
+        return readings
+
+    def match(self, text: str) -> Dict:
+        """
+        Analyse un message.
+
+        Returns:
+            {"symptoms": [...], "vitals": {constante: [lectures]}, "age": int | None}
+        """
+        lowered = text.lower()
+        vitals = self.match_vitals(lowered)
+        ages = vitals.pop("age", None)
+        return {
+            "symptoms": self.match_symptoms(lowered),
+            "vitals": vitals,
+            "age": ages[0] if ages else None,
+        }
+
+    def match_many(self, texts: Iterable[str]) -> List[Dict]:
+        """Analyse une série de messages (transcriptions hors ligne)."""
+        return [self.match(text) for text in texts]
+
+    def match_transcript(self, messages: Iterable[str]) -> Dict:
+        """
+        Fusionne l'analyse de tous les messages d'une conversation.
+
+        Première lecture retenue pour chaque constante, symptômes dédoublonnés
+        dans l'ordre d'apparition.
+        """
+        merged = {"symptoms": [], "vitals": {}, "age": None}
+        for result in self.match_many(messages):
+            for symptom in result["symptoms"]:
+                if symptom not in merged["symptoms"]:
+                    merged["symptoms"].append(symptom)
+            for kind, values in result["vitals"].items():
+                merged["vitals"].setdefault(kind, values[0])
+            if merged["age"] is None:
+                merged["age"] = result["age"]
+        return merged
+
+
+_matcher = ClinicalMatcher()
+
+
+def get_matcher() -> ClinicalMatcher:
+    """Instance partagée, compilée à l'import du module."""
+    return _matcher
@@ -2,8 +2,12 @@
 Chargement et prétraitement des documents médicaux.
 """
 
+import hashlib
+import os
 import re
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 from pathlib import Path
+from typing import Iterable, Iterator, Optional
 
 
 class DocumentLoader:
@@ -177,6 +181,15 @@ class DocumentLoader:
             dir_path: Chemin du répertoire
             extensions: Extensions à charger (ex: [".pdf", ".txt"])
         """
+        documents = []
+
+        for _, docs in self.iter_files(dir_path, extensions, workers=1):
+            documents.extend(docs)
+
+        return documents
+
+    def list_files(self, dir_path: str, extensions: list[str] = None) -> list[Path]:
+        """Liste les fichiers chargeables d'un répertoire."""
         dir_path = Path(dir_path)
 
         if not dir_path.exists():
@@ -185,17 +198,89 @@ class DocumentLoader:
         if extensions is None:
             extensions = [".pdf", ".txt", ".md", ".json", ".csv"]
 
-        documents = []
+        return [
+            file_path
+            for file_path in dir_path.iterdir()
+            if file_path.is_file() and file_path.suffix.lower() in extensions
+        ]
 
-        for file_path in dir_path.iterdir():
-            if file_path.is_file() and file_path.suffix.lower() in extensions:
-                try:
-                    docs = self.load_from_file(str(file_path))
-                    documents.extend(docs)
-                except Exception as e:
-                    print(f"Erreur lors du chargement de {file_path}: {e}")
+    def iter_files(
+        self, dir_path: str, extensions: list[str] = None, workers: Optional[int] = None
+    ) -> Iterator[tuple[Path, list[dict]]]:
+        """
+        Parse les fichiers d'un répertoire et les renvoie au fil de l'eau.
 
-        return documents
+        Args:
+            dir_path: Chemin du répertoire
+            extensions: Extensions à charger
+            workers: Nombre de processus de parsing (None = nb de CPU, 1 = séquentiel)
+
+        Yields:
+            (chemin du fichier, documents du fichier)
+        """
+        yield from self.iter_load_files(self.list_files(dir_path, extensions), workers)
+
+    def iter_load_files(
+        self, file_paths: Iterable[Path], workers: Optional[int] = None
+    ) -> Iterator[tuple[Path, list[dict]]]:
+        """
+        Parse une liste de fichiers dans un pool de processus.
+
+        Le nombre de fichiers en cours de parsing est borné (2 par worker) :
+        la mémoire reste bornée même sur un gros corpus de PDF.
+
+        Yields:
+            (chemin du fichier, documents du fichier), dans l'ordre de fin de parsing
+        """
+        workers = workers or os.cpu_count() or 1
+
+        if workers <= 1:
+            for file_path in file_paths:
+                docs = self._safe_load(file_path)
+                if docs is not None:
+                    yield Path(file_path), docs
+            return
+
+        pending = set()
+        paths = iter(file_paths)
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            while True:
+                # Garder au plus 2 fichiers en vol par worker
+                for file_path in paths:
+                    pending.add(
+                        executor.submit(
+                            _load_file_worker, str(file_path), self.chunk_size, self.chunk_overlap
+                        )
+                    )
+                    if len(pending) >= workers * 2:
+                        break
+
+                if not pending:
+                    return
+
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    file_path, docs, error = future.result()
+                    if error:
+                        print(f"Erreur lors du chargement de {file_path}: {error}")
+                        continue
+                    yield Path(file_path), docs
+
+    def iter_documents(
+        self, dir_path: str, extensions: list[str] = None, workers: Optional[int] = None
+    ) -> Iterator[dict]:
+        """Documents d'un répertoire, produits au fil du parsing."""
+        for _, docs in self.iter_files(dir_path, extensions, workers):
+            yield from docs
+
+    def _safe_load(self, file_path) -> Optional[list[dict]]:
+        """Charge un fichier, affiche l'erreur et renvoie None en cas d'échec."""
+        try:
+            return self.load_from_file(str(file_path))
+        except Exception as e:
+            print(f"Erreur lors du chargement de {file_path}: {e}")
+            return None
 
     def chunk_document(self, document: dict) -> list[dict]:
         """
@@ -263,15 +348,34 @@ class DocumentLoader:
 
         return chunks
 
+    @staticmethod
+    def fingerprint_file(file_path: str) -> str:
+        """Empreinte SHA-256 du contenu brut d'un fichier."""
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    @staticmethod
+    def chunk_id(source_key: str, text: str) -> str:
+        """
+        Identifiant stable d'un chunk, dérivé de son contenu.
+
+        Un chunk inchangé garde le même id même si d'autres chunks du fichier
+        sont modifiés, ajoutés ou supprimés.
+        """
+        payload = f"{source_key}\x00{text}".encode("utf-8")
+        return "chunk_" + hashlib.sha256(payload).hexdigest()[:24]
+
     def chunk_documents(self, documents: list[dict]) -> list[dict]:
         """Découpe plusieurs documents."""
-        all_chunks = []
+        return list(self.iter_chunks(documents))
 
+    def iter_chunks(self, documents: Iterable[dict]) -> Iterator[dict]:
+        """Découpe des documents à la volée (générateur)."""
         for doc in documents:
-            chunks = self.chunk_document(doc)
-            all_chunks.extend(chunks)
-
-        return all_chunks
+            yield from self.chunk_document(doc)
 
     def preprocess_text(self, text: str) -> str:
         """
@@ -334,6 +438,37 @@ class DocumentLoader:
 
         return documents
 
+    def iter_huggingface(
+        self, dataset_name: str, split: str = "train", text_column: str = "text"
+    ) -> Iterator[dict]:
+        """
+        Lit un dataset HuggingFace en streaming, sans le charger en mémoire.
+
+        Args:
+            dataset_name: Nom du dataset
+            split: Split à charger
+            text_column: Colonne contenant le texte
+
+        Yields:
+            {"text": ..., "metadata": {...}}
+        """
+        from datasets import load_dataset
+
+        dataset = load_dataset(dataset_name, split=split, streaming=True)
+
+        for i, item in enumerate(dataset):
+            text = item.get(text_column, "")
+            if text:
+                yield {
+                    "text": self.preprocess_text(text),
+                    "metadata": {
+                        "source": dataset_name,
+                        "index": i,
+                        "type": "huggingface",
+                        **{k: v for k, v in item.items() if k != text_column},
+                    },
+                }
+
     def load_gravity_categories(self) -> list[dict]:
         """
         Charge les catégories de gravité depuis les ressources du projet.
@@ -371,3 +506,51 @@ class DocumentLoader:
         return self.load_from_huggingface(
             dataset_name="mlabonne/medical-cases-fr", text_column="text"
         )
+
+
+def _load_file_worker(file_path: str, chunk_size: int, chunk_overlap: int) -> tuple:
+    """Parse un fichier dans un processus du pool (fonction picklable)."""
+    loader = DocumentLoader(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    try:
+        return file_path, loader.load_from_file(file_path), None
+    except Exception as e:
+        return file_path, None, str(e)
+
+
+def prepare_chunks(chunks: list[dict]) -> tuple:
+    """
+    Prépare des chunks pour l'indexation.
+
+    Returns:
+        (documents, metadatas, ids) — ids stables dérivés du contenu,
+        doublons (même source et même texte) supprimés
+    """
+    documents = []
+    metadatas = []
+    ids = []
+    seen = set()
+
+    for i, chunk in enumerate(chunks):
+        text = chunk.get("content") or chunk.get("text", "")
+        meta = chunk.get("metadata", {})
+
+        chunk_id = chunk.get("id") or DocumentLoader.chunk_id(
+            meta.get("file_key") or meta.get("source", "unknown"), text
+        )
+        if chunk_id in seen:
+            continue
+        seen.add(chunk_id)
+
+        documents.append(text)
+        # ChromaDB nécessite metadata en dict simple (pas de nested)
+        metadatas.append(
+            {
+                "source": meta.get("source", "unknown"),
+                "title": meta.get("title", "unknown"),
+                "section": meta.get("section", "unknown"),
+                "chunk_id": meta.get("chunk_id", f"chunk_{i}"),
+            }
+        )
+        ids.append(chunk_id)
+
+    return documents, metadatas, ids
@@ -0,0 +1,364 @@
+"""
+Cache disque des embeddings (adressé par contenu).
+
+Les mêmes textes (symptômes, requêtes protocoles) reviennent des milliers de
+fois par jour : on évite de refaire un forward pass du modèle pour un texte
+déjà encodé.
+
+Format sur disque (par modèle):
+- <modele>.<generation>.f32 : lignes float32 brutes de `dim` floats, en ajout
+  seul ; une sauvegarde n'écrit que les nouveaux vecteurs
+- <modele>.index.json : génération, nombre de lignes valides, clés (hash du
+  texte normalisé) -> ligne, ordre LRU ; remplacé atomiquement après l'écriture
+  (et fsync) des lignes qu'il référence
+- <modele>.lock : verrou fichier des sauvegardes
+
+Un arrêt brutal pendant une sauvegarde laisse au pire des lignes en fin de
+fichier que l'index ne référence pas (ignorées, puis tronquées). Quand les
+lignes mortes (évincées) dépassent la taille du cache, les lignes vivantes
+sont recopiées dans une nouvelle génération.
+
+Plusieurs processus (workers du service, ingestion) peuvent partager le même
+dossier : les sauvegardes sont sérialisées par le verrou et chacune fusionne
+l'index sur disque avant d'ajouter ses lignes. Sans fcntl (Windows), pas de
+verrou : le cache n'y est sûr qu'avec un seul processus.
+"""
+
+import atexit
+import hashlib
+import json
+import os
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+_ROW_DTYPE = np.float32
+
+
+def normalize_text(text: str) -> str:
+    """Normalise un texte avant hachage (unicode NFC, espaces compactés)."""
+    text = unicodedata.normalize("NFC", text or "")
+    return re.sub(r"\s+", " ", text).strip()
+
+
+class EmbeddingCache:
+    """Cache LRU persistant d'embeddings, clé = (modèle, hash du texte normalisé)."""
+
+    def __init__(
+        self,
+        cache_dir: str,
+        model_name: str,
+        dim: int,
+        max_entries: int = 50_000,
+        flush_every: int = 64,
+    ) -> None:
+        """
+        Args:
+            cache_dir: Dossier de stockage du cache
+            model_name: Nom du modèle d'embeddings (fait partie de la clé)
+            dim: Dimension des vecteurs
+            max_entries: Nombre max de vecteurs conservés (éviction LRU au-delà)
+            flush_every: Sauvegarde (nouvelles lignes + index) toutes les N insertions
+        """
+        if max_entries <= 0:
+            raise ValueError("max_entries doit être > 0")
+
+        self.model_name = model_name
+        self.dim = dim
+        self.max_entries = max_entries
+        self.flush_every = flush_every
+
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+        self._safe_name = re.sub(r"[^A-Za-z0-9_.-]", "_", model_name)
+        self.index_file = self.cache_dir / f"{self._safe_name}.index.json"
+        self.lock_file = self.cache_dir / f"{self._safe_name}.lock"
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._lock = threading.Lock()
+        self._pending = 0
+        # clé -> slot, du moins récemment utilisé au plus récent
+        self._index: OrderedDict[str, int] = OrderedDict()
+        self._free_slots: list[int] = []
+        self._vectors = np.zeros((0, dim), dtype=np.float32)
+        # État disque connu : génération, clé -> ligne, clés ajoutées depuis la sauvegarde
+        self._generation = 0
+        self._disk_rows: Dict[str, int] = {}
+        self._dirty: set = set()
+
+        self._load()
+        atexit.register(self.flush)
+
+    # ------------------------------------------------------------------
+    # Persistance
+    # ------------------------------------------------------------------
+
+    def _vectors_file(self, generation: int) -> Path:
+        return self.cache_dir / f"{self._safe_name}.{generation}.f32"
+
+    @property
+    def vectors_file(self) -> Path:
+        """Fichier des vecteurs de la génération courante."""
+        return self._vectors_file(self._generation)
+
+    @contextmanager
+    def _file_lock(self, shared: bool = False):
+        """Verrou inter-processus (partagé en lecture, exclusif en écriture)."""
+        if fcntl is None:
+            yield
+            return
+        with open(self.lock_file, "a+") as lock:
+            fcntl.flock(lock.fileno(), fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+
+    def _read_meta(self) -> Optional[dict]:
+        """Index sur disque, None si absent, illisible ou d'un autre modèle/format."""
+        if not self.index_file.exists():
+            return None
+        try:
+            with open(self.index_file, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"[WARN] Index du cache embeddings illisible ({e}), ignore")
+            return None
+        if (
+            meta.get("model_name") != self.model_name
+            or meta.get("dim") != self.dim
+            or "generation" not in meta
+        ):
+            return None
+        return meta
+
+    def _read_rows(self, generation: int, valid_rows: int, rows: list) -> np.ndarray:
+        """Lit des lignes parmi les `valid_rows` premières du fichier d'une génération."""
+        if not rows:
+            return np.zeros((0, self.dim), dtype=_ROW_DTYPE)
+        data = np.memmap(
+            self._vectors_file(generation), dtype=_ROW_DTYPE, mode="r", shape=(valid_rows, self.dim)
+        )
+        return np.array(data[rows])
+
+    def _load(self) -> None:
+        """Charge l'index et les vecteurs qu'il référence (lignes valides uniquement)."""
+        try:
+            with self._file_lock(shared=True):
+                meta = self._read_meta()
+                if meta is None:
+                    if self.index_file.exists():
+                        print("[WARN] Cache embeddings incompatible, ignore")
+                    return
+                # Les plus récentes si la taille max a été réduite
+                entries = meta["entries"][-self.max_entries:]
+                vectors = self._read_rows(
+                    meta["generation"], meta["rows"], [row for _, row in entries]
+                )
+        except Exception as e:
+            print(f"[WARN] Cache embeddings illisible ({e}), reinitialise")
+            return
+
+        self._generation = meta["generation"]
+        self._disk_rows = dict(meta["entries"])
+        self._vectors = vectors
+        self._index = OrderedDict((key, slot) for slot, (key, _) in enumerate(entries))
+        self._free_slots = []
+
+    def flush(self) -> None:
+        """
+        Ajoute les nouveaux vecteurs au fichier puis remplace l'index.
+
+        Sous verrou exclusif : l'index sur disque (éventuellement écrit par un
+        autre processus) est fusionné avant l'ajout, les lignes non référencées
+        en fin de fichier (sauvegarde interrompue) sont tronquées.
+        """
+        with self._lock:
+            if not self._dirty and self.index_file.exists():
+                return
+
+            with self._file_lock():
+                meta = self._read_meta()
+                if meta is None:
+                    generation, rows, disk_entries = self._generation, 0, []
+                else:
+                    generation, rows, disk_entries = (
+                        meta["generation"], meta["rows"], meta["entries"]
+                    )
+                if generation != self._generation or meta is None:
+                    # Autre génération (compactée ailleurs) : nos lignes ne valent plus
+                    self._generation = generation
+                    self._disk_rows = {}
+                    self._dirty = set(self._index)
+                disk_rows = dict(disk_entries)
+                for key, row in disk_rows.items():
+                    self._disk_rows.setdefault(key, row)
+
+                # Nouvelles lignes, après les lignes valides
+                new_keys = [
+                    key for key in self._index
+                    if key in self._dirty and key not in disk_rows
+                ]
+                if new_keys:
+                    block = self._vectors[[self._index[key] for key in new_keys]]
+                    with open(self.vectors_file, "ab") as f:
+                        f.truncate(rows * self.dim * block.itemsize)
+                        f.write(block.astype(_ROW_DTYPE).tobytes())
+                        f.flush()
+                        os.fsync(f.fileno())
+                    for offset, key in enumerate(new_keys):
+                        self._disk_rows[key] = rows + offset
+                    rows += len(new_keys)
+
+                # Ordre LRU : entrées des autres processus, puis les nôtres
+                ordered = [key for key, _ in disk_entries if key not in self._index]
+                ordered += [key for key in self._index if key in self._disk_rows]
+                ordered = ordered[-self.max_entries:]
+                self._disk_rows = {key: self._disk_rows[key] for key in ordered}
+
+                # Trop de lignes mortes : nouvelle génération avec les seules vivantes
+                old_file = None
+                if rows > 2 * self.max_entries:
+                    old_file = self.vectors_file
+                    live = self._read_rows(
+                        self._generation, rows, [self._disk_rows[key] for key in ordered]
+                    )
+                    self._generation += 1
+                    with open(self.vectors_file, "wb") as f:
+                        f.write(live.tobytes())
+                        f.flush()
+                        os.fsync(f.fileno())
+                    self._disk_rows = {key: row for row, key in enumerate(ordered)}
+                    rows = len(ordered)
+
+                self._write_meta(rows, [(key, self._disk_rows[key]) for key in ordered])
+                if old_file is not None:
+                    old_file.unlink(missing_ok=True)
+                # Fichier de l'ancien format (un seul .f32 réécrit en entier)
+                (self.cache_dir / f"{self._safe_name}.f32").unlink(missing_ok=True)
+
+            self._dirty.clear()
+            self._pending = 0
+
+    def _write_meta(self, rows: int, entries: list) -> None:
+        """Remplace l'index de façon atomique (fichier temporaire + rename)."""
+        meta = {
+            "model_name": self.model_name,
+            "dim": self.dim,
+            "generation": self._generation,
+            "rows": rows,
+            "entries": entries,
+        }
+        tmp = self.index_file.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        tmp.replace(self.index_file)
+
+    # ------------------------------------------------------------------
+    # Accès
+    # ------------------------------------------------------------------
+
+    def make_key(self, text: str) -> str:
+        """Clé de cache : hash SHA-256 de (modèle, texte normalisé)."""
+        payload = f"{self.model_name}\x00{normalize_text(text)}".encode("utf-8")
+        return hashlib.sha256(payload).hexdigest()
+
+    def get(self, text: str) -> Optional[list[float]]:
+        """Retourne l'embedding en cache ou None."""
+        key = self.make_key(text)
+        with self._lock:
+            slot = self._index.get(key)
+            if slot is None:
+                self.misses += 1
+                return None
+            self._index.move_to_end(key)
+            self.hits += 1
+            return self._vectors[slot].tolist()
+
+    def put(self, text: str, vector: list[float]) -> None:
+        """Ajoute (ou remplace) un embedding dans le cache."""
+        row = np.asarray(vector, dtype=np.float32)
+        if row.shape != (self.dim,):
+            raise ValueError(f"Dimension invalide: {row.shape}, attendu ({self.dim},)")
+
+        key = self.make_key(text)
+        with self._lock:
+            slot = self._index.get(key)
+            if slot is None:
+                slot = self._allocate_slot()
+            self._index[key] = slot
+            self._index.move_to_end(key)
+            self._vectors[slot] = row
+            self._dirty.add(key)
+            self._pending += 1
+            should_flush = self._pending >= self.flush_every
+
+        if should_flush:
+            self.flush()
+
+    def _allocate_slot(self) -> int:
+        """Trouve un slot libre, en évinçant l'entrée la moins récente si besoin."""
+        if len(self._index) >= self.max_entries:
+            key, slot = self._index.popitem(last=False)
+            self._dirty.discard(key)
+            self.evictions += 1
+            return slot
+
+        if self._free_slots:
+            return self._free_slots.pop()
+
+        # Agrandir la matrice par blocs pour éviter une copie à chaque insertion
+        old_size = len(self._vectors)
+        new_size = min(self.max_entries, max(64, old_size * 2))
+        grown = np.zeros((new_size, self.dim), dtype=np.float32)
+        grown[:old_size] = self._vectors
+        self._vectors = grown
+        self._free_slots = list(range(new_size - 1, old_size, -1))
+        return old_size
+
+    def clear(self) -> None:
+        """Vide le cache (mémoire et disque)."""
+        with self._lock, self._file_lock():
+            self._index.clear()
+            self._free_slots = []
+            self._vectors = np.zeros((0, self.dim), dtype=np.float32)
+            self.hits = self.misses = self.evictions = 0
+            self._pending = 0
+            self._disk_rows = {}
+            self._dirty = set()
+            self.index_file.unlink(missing_ok=True)
+            for path in self.cache_dir.glob(f"{self._safe_name}.*.f32"):
+                path.unlink(missing_ok=True)
+
+    def get_stats(self) -> dict:
+        """Compteurs du cache."""
+        total = self.hits + self.misses
+        return {
+            "model_name": self.model_name,
+            "entries": len(self._index),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / total if total else 0.0,
+            "size_bytes": int(self._vectors.nbytes),
+            "disk_entries": len(self._disk_rows),
+            "generation": self._generation,
+        }
@@ -8,8 +8,11 @@ JUSTIFIER le choix du modèle d'embedding:
 - camembert-base: Entraîné sur du français
 """
 
+import threading
 from typing import Optional
 
+from ..monitoring.tracing import span
+
 
 class EmbeddingProvider:
     """Gestion des embeddings textuels."""
@@ -25,7 +28,12 @@ class EmbeddingProvider:
     }
 
     def __init__(
-        self, model_name: str = "all-MiniLM-L6-v2", api_key: Optional[str] = None, **kwargs
+        self,
+        model_name: str = "all-MiniLM-L6-v2",
+        api_key: Optional[str] = None,
+        cache_dir: Optional[str] = None,
+        cache_size: int = 50_000,
+        **kwargs,
     ) -> None:
         """
         Initialise le provider d'embeddings.
@@ -33,6 +41,8 @@ class EmbeddingProvider:
         Args:
             model_name: Nom du modèle à utiliser
             api_key: Clé API (pour OpenAI)
+            cache_dir: Dossier du cache disque des embeddings (None = pas de cache)
+            cache_size: Nombre max de vecteurs conservés dans le cache (LRU)
 
         JUSTIFIER ton choix de modèle ici.
         """
@@ -50,22 +60,63 @@ class EmbeddingProvider:
         # 3. Récupérer les infos du modèle
         self.model_info = self.SUPPORTED_MODELS[model_name]
 
-        # 4. Charger le modèle selon son type
-        if self.model_info["type"] == "sentence-transformers":
-            # Modèle local gratuit
-            from sentence_transformers import SentenceTransformer
-
-            self.model = SentenceTransformer(model_name)
-            self.model_type = "sentence-transformers"
-
-        elif self.model_info["type"] == "openai":
-            # Modèle OpenAI (payant)
-            if not api_key:
-                raise ValueError("Une clé API OpenAI est requise pour ce modèle")
-            import openai
+        # 4. Type du modèle ; le modèle (ou client) est chargé au premier
+        # encodage : un retriever lexical ne le charge jamais
+        self.model_type = self.model_info["type"]
+        if self.model_type == "openai" and not api_key:
+            raise ValueError("Une clé API OpenAI est requise pour ce modèle")
+        self._model = None
+        self._client = None
+        self._load_lock = threading.Lock()
+
+        # 5. Cache disque optionnel (mêmes textes encodés une seule fois)
+        self.cache = None
+        if cache_dir:
+            from .embedding_cache import EmbeddingCache
+
+            self.cache = EmbeddingCache(
+                cache_dir=cache_dir,
+                model_name=model_name,
+                dim=self.model_info["dim"],
+                max_entries=cache_size,
+            )
 
-            self.client = openai.OpenAI(api_key=api_key)
-            self.model_type = "openai"
+    @property
+    def model(self):
+        """SentenceTransformer (chargé au premier accès)."""
+        if self._model is None:
+            self._load()
+        return self._model
+
+    @property
+    def client(self):
+        """Client OpenAI (créé au premier accès)."""
+        if self._client is None:
+            self._load()
+        return self._client
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._model is not None or self._client is not None
+
+    def _load(self) -> None:
+        """Charge le modèle selon son type (une seule fois, même entre threads)."""
+        with self._load_lock:
+            if self.is_loaded:
+                return
+            if self.model_type == "sentence-transformers":
+                # Modèle local gratuit
+                from sentence_transformers import SentenceTransformer
+
+                print(f"[INFO] Chargement modele embeddings: {self.model_name}")
+                self._model = SentenceTransformer(self.model_name)
+                print("[OK] Modele charge")
+
+            elif self.model_type == "openai":
+                # Modèle OpenAI (payant)
+                import openai
+
+                self._client = openai.OpenAI(api_key=self.api_key)
 
     def embed_text(self, text: str) -> list[float]:
         """
@@ -77,6 +128,22 @@ class EmbeddingProvider:
         Returns:
             Vecteur d'embedding
         """
+        with span("embedding.encode", texts=1, model=self.model_name) as s:
+            if self.cache is not None:
+                cached = self.cache.get(text)
+                if cached is not None:
+                    s.set(cache_hits=1)
+                    return cached
+
+            embedding = self._encode_one(text)
+            s.set(cache_hits=0)
+
+            if self.cache is not None:
+                self.cache.put(text, embedding)
+            return embedding
+
+    def _encode_one(self, text: str) -> list[float]:
+        """Encode un texte avec le modèle (sans cache)."""
         if self.model_type == "sentence-transformers":
             # Utiliser le modèle local
             import numpy as np
@@ -104,6 +171,29 @@ class EmbeddingProvider:
         Returns:
             Liste de vecteurs
         """
+        with span("embedding.encode", texts=len(texts), model=self.model_name) as s:
+            if self.cache is None:
+                s.set(cache_hits=0)
+                return self._encode_batch(texts)
+
+            # N'encoder que les textes absents du cache, en un seul batch
+            results: list[Optional[list[float]]] = [self.cache.get(t) for t in texts]
+            missing = [i for i, emb in enumerate(results) if emb is None]
+            s.set(cache_hits=len(texts) - len(missing))
+
+            if missing:
+                encoded = self._encode_batch([texts[i] for i in missing])
+                for i, emb in zip(missing, encoded):
+                    results[i] = emb
+                    self.cache.put(texts[i], emb)
+
+            return results
+
+    def _encode_batch(self, texts: list[str]) -> list[list[float]]:
+        """Encode plusieurs textes avec le modèle (sans cache)."""
+        if not texts:
+            return []
+
         if self.model_type == "sentence-transformers":
             # Encoder tous les textes en une seule fois
             import numpy as np
@@ -129,4 +219,12 @@ class EmbeddingProvider:
             "model_name": self.model_name,
             "dimension": self.model_info["dim"],
             "type": self.model_type,
+            "loaded": self.is_loaded,
+            "cache": self.get_cache_stats(),
         }
+
+    def get_cache_stats(self) -> Optional[dict]:
+        """Statistiques du cache (hits/misses), None si cache désactivé."""
+        if self.cache is None:
+            return None
+        return self.cache.get_stats()
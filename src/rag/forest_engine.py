@@ -0,0 +1,376 @@
+"""
+Moteur d'inférence compilé pour le Random Forest de triage.
+
+Le pipeline scikit-learn (StandardScaler + RandomForestClassifier) est aplati
+en tableaux NumPy : feature, seuil et enfants de chaque nœud (tous les arbres
+bout à bout) et distribution de classes de chaque feuille. Le parcours est
+vectorisé sur (lignes x arbres), sans scikit-learn dans la boucle : une ligne
+ou une matrice entière sont évaluées de la même façon.
+
+Les feuilles pointent sur elles-mêmes, ce qui permet un nombre fixe
+d'itérations (profondeur max de la forêt) sans masque de lignes actives.
+
+Usage:
+    engine = CompiledForest.from_sklearn(joblib.load("data/models/random_forest_v2.pkl"))
+    probas = engine.predict_proba(X)
+
+Vérification d'équivalence et benchmark:
+    python -m src.rag.forest_engine --export data/models/random_forest_v2.npz
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+MODELS_DIR = Path(__file__).parent.parent.parent / "data" / "models"
+
+
+class CompiledForest:
+    """Forêt aplatie en tableaux NumPy, même interface que predict_proba de scikit-learn."""
+
+    def __init__(
+        self,
+        feature: np.ndarray,
+        threshold: np.ndarray,
+        left: np.ndarray,
+        right: np.ndarray,
+        value: np.ndarray,
+        roots: np.ndarray,
+        classes: np.ndarray,
+        max_depth: int,
+        n_features: int,
+        mean: Optional[np.ndarray] = None,
+        scale: Optional[np.ndarray] = None,
+        block_size: int = 1024,
+    ):
+        """
+        Args:
+            feature, threshold, left, right: Nœuds de tous les arbres (indices globaux)
+            value: Distribution de classes normalisée par nœud (n_nodes, n_classes)
+            roots: Indice global de la racine de chaque arbre
+            classes: Labels des classes (ordre des colonnes de predict_proba)
+            max_depth: Profondeur max des arbres (nombre d'itérations du parcours)
+            n_features: Nombre de features attendues
+            mean, scale: Paramètres du StandardScaler (None = pas de normalisation)
+            block_size: Lignes évaluées par bloc (mémoire bornée sur les gros lots)
+        """
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.classes_ = classes
+        self.max_depth = int(max_depth)
+        self.n_features = int(n_features)
+        self.mean = mean
+        self.scale = scale
+        self.block_size = block_size
+
+        # Enfants entrelacés [droite, gauche] : enfant = children[2 * nœud + va_à_gauche]
+        self._children = np.empty(2 * len(left), dtype=np.intp)
+        self._children[0::2] = right
+        self._children[1::2] = left
+        self._feature = feature.astype(np.intp)
+        self._roots = roots.astype(np.intp)
+
+    # ------------------------------------------------------------------
+    # Export depuis scikit-learn
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def from_sklearn(cls, model) -> "CompiledForest":
+        """
+        Aplatit un RandomForestClassifier, seul ou précédé d'un StandardScaler
+        dans un Pipeline. with_mean=False / with_std=False sont respectés
+        (centrage ou réduction omis, comme dans StandardScaler.transform).
+
+        Raises:
+            ValueError: Modèle non supporté (autre transformeur, multi-sorties...)
+        """
+        mean = scale = None
+        forest = model
+
+        steps = getattr(model, "steps", None)
+        if steps is not None:
+            from sklearn.preprocessing import StandardScaler
+
+            *transforms, (_, forest) = steps
+            scaler_seen = False
+            for name, step in transforms:
+                if step is None or step == "passthrough":
+                    continue
+                if not isinstance(step, StandardScaler):
+                    raise ValueError(f"Etape de pipeline non supportee: {name}")
+                if scaler_seen:
+                    raise ValueError("Un seul StandardScaler supporte")
+                scaler_seen = True
+                # mean_ est calculé même avec with_mean=False (pour var_) mais pas appliqué
+                mean = step.mean_ if step.with_mean else None
+                scale = step.scale_ if step.with_std else None
+
+        estimators = getattr(forest, "estimators_", None)
+        if not estimators:
+            raise ValueError("Modele non entraine ou sans estimators_")
+        if getattr(forest, "n_outputs_", 1) != 1:
+            raise ValueError("Forets multi-sorties non supportees")
+
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        max_depth = 0
+        offset = 0
+
+        for estimator in estimators:
+            tree = estimator.tree_
+            n_nodes = tree.node_count
+            nodes = np.arange(offset, offset + n_nodes, dtype=np.int64)
+            is_leaf = tree.children_left == -1
+
+            # Feuilles : enfants = elles-mêmes (point fixe du parcours)
+            left = np.where(is_leaf, nodes, tree.children_left + offset)
+            right = np.where(is_leaf, nodes, tree.children_right + offset)
+
+            value = tree.value[:, 0, :].astype(np.float64)
+            total = value.sum(axis=1, keepdims=True)
+            total[total == 0] = 1.0
+
+            features.append(np.where(is_leaf, 0, tree.feature))
+            thresholds.append(np.where(is_leaf, 0.0, tree.threshold))
+            lefts.append(left)
+            rights.append(right)
+            values.append(value / total)
+            roots.append(offset)
+
+            max_depth = max(max_depth, tree.max_depth)
+            offset += n_nodes
+
+        return cls(
+            feature=np.concatenate(features).astype(np.int64),
+            threshold=np.concatenate(thresholds).astype(np.float64),
+            left=np.concatenate(lefts),
+            right=np.concatenate(rights),
+            value=np.concatenate(values),
+            roots=np.asarray(roots, dtype=np.int64),
+            classes=np.asarray(forest.classes_),
+            max_depth=max_depth,
+            n_features=forest.n_features_in_,
+            mean=None if mean is None else np.asarray(mean, dtype=np.float64),
+            scale=None if scale is None else np.asarray(scale, dtype=np.float64),
+        )
+
+    # ------------------------------------------------------------------
+    # Inférence
+    # ------------------------------------------------------------------
+
+    def predict_proba(self, X) -> np.ndarray:
+        """Probabilités (n_lignes, n_classes) pour une ligne ou une matrice."""
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[1] != self.n_features:
+            raise ValueError(f"{X.shape[1]} features recues, {self.n_features} attendues")
+
+        if len(X) <= self.block_size:
+            return self._proba_block(X)
+
+        out = np.empty((len(X), len(self.classes_)), dtype=np.float64)
+        for start in range(0, len(X), self.block_size):
+            end = start + self.block_size
+            out[start:end] = self._proba_block(X[start:end])
+        return out
+
+    def predict(self, X) -> np.ndarray:
+        """Classe la plus probable (même décision que RandomForestClassifier.predict)."""
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+    def _proba_block(self, X: np.ndarray) -> np.ndarray:
+        if self.mean is not None:
+            X = X - self.mean
+        if self.scale is not None:
+            X = X / self.scale
+        # scikit-learn évalue les arbres en float32
+        X = X.astype(np.float32)
+
+        # Indices à plat dans X : ligne * n_features + feature du nœud courant
+        flat = X.ravel()
+        row_offsets = (np.arange(len(X), dtype=np.intp) * self.n_features)[:, None]
+
+        node = np.broadcast_to(self._roots, (len(X), len(self._roots)))
+        for _ in range(self.max_depth):
+            go_left = flat.take(row_offsets + self._feature.take(node)) <= self.threshold.take(node)
+            node = self._children.take(2 * node + go_left)
+
+        return self.value.take(node, axis=0).mean(axis=1)
+
+    # ------------------------------------------------------------------
+    # Persistance
+    # ------------------------------------------------------------------
+
+    def save(self, path: str) -> None:
+        """Sauvegarde les tableaux dans un .npz (chargeable sans scikit-learn)."""
+        classes = self.classes_
+        if classes.dtype == object:  # labels str de scikit-learn
+            classes = classes.astype(str)
+
+        arrays = {
+            "feature": self.feature,
+            "threshold": self.threshold,
+            "left": self.left,
+            "right": self.right,
+            "value": self.value,
+            "roots": self.roots,
+            "classes": classes,
+            "max_depth": np.asarray(self.max_depth),
+            "n_features": np.asarray(self.n_features),
+        }
+        if self.mean is not None:
+            arrays["mean"] = self.mean
+        if self.scale is not None:
+            arrays["scale"] = self.scale
+        np.savez_compressed(path, **arrays)
+
+    @classmethod
+    def load(cls, path: str) -> "CompiledForest":
+        with np.load(path, allow_pickle=False) as data:
+            return cls(
+                feature=data["feature"],
+                threshold=data["threshold"],
+                left=data["left"],
+                right=data["right"],
+                value=data["value"],
+                roots=data["roots"],
+                classes=data["classes"],
+                max_depth=int(data["max_depth"]),
+                n_features=int(data["n_features"]),
+                mean=data["mean"] if "mean" in data else None,
+                scale=data["scale"] if "scale" in data else None,
+            )
+
+    def sample_inputs(self, n: int = 256, seed: int = 0) -> np.ndarray:
+        """
+        Lignes aléatoires couvrant les seuils de la forêt (encadrés d'une marge),
+        exprimées dans l'espace d'entrée du pipeline (avant normalisation).
+        """
+        rng = np.random.default_rng(seed)
+        internal = self.left != np.arange(len(self.left))
+        low = np.full(self.n_features, -1.0)
+        high = np.full(self.n_features, 1.0)
+        for j in range(self.n_features):
+            thresholds = self.threshold[internal & (self.feature == j)]
+            if len(thresholds):
+                low[j], high[j] = thresholds.min() - 1.0, thresholds.max() + 1.0
+
+        X = rng.uniform(low, high, size=(n, self.n_features))
+        if self.scale is not None:
+            X = X * self.scale
+        if self.mean is not None:
+            X = X + self.mean
+        return X
+
+    def get_info(self) -> dict:
+        return {
+            "n_trees": len(self.roots),
+            "n_nodes": len(self.feature),
+            "max_depth": self.max_depth,
+            "n_features": self.n_features,
+            "classes": [str(c) for c in self.classes_],
+            "memory_mb": sum(
+                a.nbytes for a in (self.feature, self.threshold, self.left, self.right, self.value)
+            ) / 1e6,
+        }
+
+
+def check_equivalence(model, engine: CompiledForest, X=None, tol: float = 1e-9) -> float:
+    """
+    Compare les sorties du moteur à celles du modèle scikit-learn.
+
+    Args:
+        X: Lignes à comparer (défaut: engine.sample_inputs())
+        tol: Écart max toléré sur les probabilités
+
+    Returns:
+        Écart max des probabilités
+
+    Raises:
+        ValueError: Écart supérieur à tol ou classes prédites différentes
+    """
+    X = engine.sample_inputs() if X is None else np.asarray(X, dtype=np.float64)
+    expected = model.predict_proba(X)
+    got = engine.predict_proba(X)
+    max_diff = float(np.abs(expected - got).max())
+    if max_diff > tol or not (model.predict(X) == engine.predict(X)).all():
+        raise ValueError(f"Sorties differentes de scikit-learn (ecart max {max_diff:.2e})")
+    return max_diff
+
+
+def _timeit(fn, repeat: int) -> float:
+    """Durée médiane d'un appel (secondes)."""
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        durations.append(time.perf_counter() - start)
+    return float(np.median(durations))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compile le Random Forest et vérifie l'équivalence avec scikit-learn"
+    )
+    parser.add_argument("--model", default=str(MODELS_DIR / "random_forest_v2.pkl"))
+    parser.add_argument("--dataset", default=str(MODELS_DIR / "triage_dataset_v2.csv"))
+    parser.add_argument("--export", default=None, help="Fichier .npz de sortie")
+    parser.add_argument("--repeat", type=int, default=50, help="Répétitions du benchmark")
+    args = parser.parse_args()
+
+    import joblib
+    import pandas as pd
+
+    model = joblib.load(args.model)
+    engine = CompiledForest.from_sklearn(model)
+    info = engine.get_info()
+    print(
+        f"[OK] Foret compilee : {info['n_trees']} arbres, {info['n_nodes']} noeuds, "
+        f"profondeur {info['max_depth']}, {info['memory_mb']:.1f} MB"
+    )
+
+    # Équivalence sur le dataset
+    df = pd.read_csv(args.dataset)
+    X = df.drop(columns=["label"], errors="ignore").to_numpy(dtype=np.float64)
+
+    got = engine.predict_proba(X)
+    try:
+        max_diff = check_equivalence(model, engine, X)
+    except ValueError as e:
+        print(f"[ERREUR] {e}")
+        sys.exit(1)
+    print(f"[INFO] {len(X)} lignes : ecart max des probabilites {max_diff:.2e}")
+
+    if args.export:
+        engine.save(args.export)
+        reloaded = CompiledForest.load(args.export)
+        if not np.array_equal(reloaded.predict_proba(X), got):
+            print("[ERREUR] Export .npz incoherent")
+            sys.exit(1)
+        print(f"[OK] Export : {args.export}")
+
+    # Latence d'un cas et débit par lot
+    row = X[:1]
+    sk_single = _timeit(lambda: model.predict_proba(row), args.repeat)
+    cf_single = _timeit(lambda: engine.predict_proba(row), args.repeat)
+    print(f"[INFO] 1 cas : scikit-learn {sk_single * 1e6:.0f} us, compile {cf_single * 1e6:.0f} us "
+          f"(x{sk_single / cf_single:.0f})")
+
+    for n in (1_000, 10_000, 100_000):
+        batch = np.resize(X, (n, X.shape[1]))
+        duration = _timeit(lambda: engine.predict_proba(batch), 3)
+        print(f"[INFO] lot de {n:>6} : {duration * 1e3:8.1f} ms ({n / duration:,.0f} cas/s)")
+
+    print("[OK] Equivalence verifiee")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""
+Ingestion - Pipeline d'indexation en flux
+
+Les documents sont parsés dans un pool de processus, découpés à la volée puis
+encodés et écrits dans la vector store par micro-batches : la mémoire reste
+bornée (quelques fichiers en vol + un batch d'embeddings), quelle que soit la
+taille du corpus.
+
+Usage:
+    python -m src.rag.ingestion data/rag_document --workers 4 --batch-size 64
+"""
+
+import argparse
+import os
+import time
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+from .document_loader import DocumentLoader
+
+ProgressCallback = Callable[[Dict], None]
+
+
+def iter_batches(items: Iterable, batch_size: int) -> Iterator[List]:
+    """Regroupe un itérable en listes de taille fixe (la dernière peut être plus courte)."""
+    if batch_size <= 0:
+        raise ValueError("batch_size doit être > 0")
+
+    iterator = iter(items)
+    while True:
+        batch = list(islice(iterator, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def ingest_chunks(
+    vector_store,
+    chunks: Iterable[Dict],
+    batch_size: int = 64,
+    progress_callback: Optional[ProgressCallback] = None,
+) -> Dict:
+    """
+    Indexe un flux de chunks par micro-batches.
+
+    Args:
+        vector_store: VectorStore ou NumpyVectorStore
+        chunks: Itérable (ou générateur) de dicts {text, metadata}
+        batch_size: Nombre de chunks encodés et écrits à la fois
+        progress_callback: Appelée après chaque batch avec les compteurs courants
+
+    Returns:
+        Statistiques {chunks, batches, elapsed, chunks_per_sec}
+    """
+    stats = {"chunks": 0, "batches": 0, "elapsed": 0.0, "chunks_per_sec": 0.0}
+    start = time.time()
+
+    # Store en mémoire (NumpyVectorStore) : une seule sauvegarde en fin d'ingestion
+    flush = getattr(vector_store, "flush", None)
+    add_kwargs = {"save": False} if flush else {}
+
+    try:
+        for batch in iter_batches(chunks, batch_size):
+            vector_store.add_documents(batch, verbose=False, **add_kwargs)
+
+            stats["chunks"] += len(batch)
+            stats["batches"] += 1
+            stats["elapsed"] = time.time() - start
+            stats["chunks_per_sec"] = (
+                stats["chunks"] / stats["elapsed"] if stats["elapsed"] else 0.0
+            )
+
+            if progress_callback:
+                progress_callback(dict(stats))
+    finally:
+        if flush:
+            flush()
+
+    stats["elapsed"] = time.time() - start
+    return stats
+
+
+def ingest_directory(
+    vector_store,
+    documents_dir: str,
+    loader: Optional[DocumentLoader] = None,
+    extensions: Optional[List[str]] = None,
+    workers: Optional[int] = None,
+    batch_size: int = 64,
+    progress_callback: Optional[ProgressCallback] = None,
+) -> Dict:
+    """
+    Parse (en parallèle), découpe et indexe tous les fichiers d'un répertoire.
+
+    Args:
+        vector_store: Store cible
+        documents_dir: Répertoire des documents
+        loader: DocumentLoader (taille de chunk) à utiliser
+        extensions: Extensions à charger
+        workers: Processus de parsing (None = nb de CPU, 1 = séquentiel)
+        batch_size: Taille des micro-batches d'embeddings
+        progress_callback: Callback de progression
+    """
+    loader = loader or DocumentLoader()
+    documents = loader.iter_documents(documents_dir, extensions, workers)
+    return ingest_chunks(vector_store, loader.iter_chunks(documents), batch_size, progress_callback)
+
+
+def ingest_huggingface(
+    vector_store,
+    dataset_name: str,
+    split: str = "train",
+    text_column: str = "text",
+    loader: Optional[DocumentLoader] = None,
+    batch_size: int = 64,
+    progress_callback: Optional[ProgressCallback] = None,
+) -> Dict:
+    """Indexe un dataset HuggingFace lu en streaming."""
+    loader = loader or DocumentLoader()
+    documents = loader.iter_huggingface(dataset_name, split, text_column)
+    return ingest_chunks(vector_store, loader.iter_chunks(documents), batch_size, progress_callback)
+
+
+def _print_progress(stats: Dict) -> None:
+    print(
+        f"[INFO] {stats['chunks']} chunks indexes "
+        f"({stats['batches']} batches, {stats['chunks_per_sec']:.1f} chunks/s)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Indexation en flux d'un corpus documentaire")
+    parser.add_argument("source", help="Répertoire de documents ou nom de dataset HuggingFace")
+    parser.add_argument("--huggingface", action="store_true", help="source est un dataset HF")
+    parser.add_argument("--split", default="train")
+    parser.add_argument("--text-column", default="text")
+    parser.add_argument("--persist-dir", default="data/vector_db")
+    parser.add_argument("--collection", default="triage_medical")
+    parser.add_argument(
+        "--backend", default=None, help="chroma ou numpy (copie réexportée après l'ingestion)"
+    )
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--chunk-size", type=int, default=800)
+    parser.add_argument("--chunk-overlap", type=int, default=150)
+    args = parser.parse_args()
+
+    from .vector_store import VectorStore, load_vector_store, register_ingested_chunks
+
+    # Écriture dans ChromaDB, la référence : la copie numpy en est dérivée
+    store = VectorStore(persist_directory=args.persist_dir, collection_name=args.collection)
+    loader = DocumentLoader(chunk_size=args.chunk_size, chunk_overlap=args.chunk_overlap)
+
+    if args.huggingface:
+        documents = loader.iter_huggingface(args.source, args.split, args.text_column)
+    else:
+        documents = loader.iter_documents(args.source, workers=args.workers)
+
+    # Ids des chunks par source, inscrits ensuite dans le manifeste d'indexation
+    chunk_ids_by_source: Dict[str, List[str]] = {}
+
+    def tracked_chunks():
+        for chunk in loader.iter_chunks(documents):
+            source = chunk["metadata"].get("source", "unknown")
+            chunk["id"] = DocumentLoader.chunk_id(
+                source, chunk.get("content") or chunk.get("text", "")
+            )
+            chunk_ids_by_source.setdefault(source, []).append(chunk["id"])
+            yield chunk
+
+    stats = ingest_chunks(
+        store, tracked_chunks(), batch_size=args.batch_size, progress_callback=_print_progress
+    )
+
+    print(
+        f"\n[OK] {stats['chunks']} chunks indexes en {stats['elapsed']:.1f}s "
+        f"({store.count()} documents au total)"
+    )
+
+    # Le corpus a changé : manifeste, index lexical et contextes de protocole à mettre à jour
+    if stats["chunks"]:
+        register_ingested_chunks(args.persist_dir, chunk_ids_by_source)
+
+        from .lexical_index import build_lexical_index
+        from .protocol_contexts import build_protocol_contexts
+        from .vector_store import RAGRetriever
+
+        build_lexical_index(store, args.persist_dir)
+        build_protocol_contexts(RAGRetriever(store), args.persist_dir)
+
+        backend = (args.backend or os.getenv("VECTOR_STORE_BACKEND", "chroma")).lower()
+        if backend == "numpy":
+            # Manifeste modifié : la copie numpy est réexportée
+            load_vector_store(
+                backend="numpy",
+                persist_directory=args.persist_dir,
+                collection_name=args.collection,
+                embedding_provider=store.embedding_model,
+            )
+
+
+if __name__ == "__main__":
+    main()
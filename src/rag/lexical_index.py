@@ -0,0 +1,352 @@
+"""
+Index lexical BM25 des chunks de la base vectorielle.
+
+Les requêtes construites par le chatbot et le predictor sont des listes de
+mots-clés ("Douleur thoracique Dyspnée", "protocole niveau ROUGE Hypoxie") :
+un index inversé les sert sans passe du modèle d'embeddings et retrouve
+les termes exacts des protocoles. Il est construit avec l'index vectoriel
+(lexical_index.json dans persist_dir, lié au manifeste d'indexation) et
+utilisé par RAGRetriever en mode "hybrid", "lexical" ou "auto".
+
+Tokenisation : minuscules, accents repliés (é -> e, œ -> oe), élisions et
+mots vides français retirés, suffixes de pluriel et de genre réduits
+("essoufflée", "essoufflement" -> "essouffl"). Les nombres sont gardés.
+
+Reconstruction manuelle:
+    python -m src.rag.lexical_index --persist-dir data/vector_db
+"""
+
+import argparse
+import json
+import math
+import re
+import time
+import unicodedata
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from ..monitoring.tracing import span
+
+INDEX_FILE = "lexical_index.json"
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_LIGATURES = str.maketrans({"œ": "oe", "æ": "ae", "Œ": "oe", "Æ": "ae"})
+
+# Mots vides (accents déjà repliés)
+STOPWORDS = frozenset(
+    """
+    a au aux avec ce ces cet cette chez dans de des du elle elles en entre est et etc eu
+    il ils je la le les leur leurs lui ma mais me meme mes moi mon ne ni nos notre nous on
+    ou par pas pour qu que quel quelle quelles quels qui sa sans se ses si son sont sur ta te
+    tes toi ton tu un une vos votre vous y ete etre avoir ai as avez avons ont suis es sommes
+    etes cela ca plus tres peu tout tous toute toutes aussi comme donc alors lors quand dont
+    """.split()
+)
+
+# Suffixes réduits, du plus long au plus court (radical d'au moins 4 lettres)
+_SUFFIXES = ("ements", "ement", "ations", "ation", "ees", "ee", "es", "e", "s", "x")
+_MIN_STEM = 4
+
+
+def fold(text: str) -> str:
+    """Minuscules sans accents ni ligatures."""
+    text = unicodedata.normalize("NFKD", (text or "").translate(_LIGATURES).lower())
+    return "".join(c for c in text if not unicodedata.combining(c))
+
+
+def stem(token: str) -> str:
+    """Réduction légère des flexions françaises (pluriel, féminin, -ement, -ation)."""
+    if token.isdigit():
+        return token
+    for suffix in _SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= _MIN_STEM:
+            return token[: -len(suffix)]
+    return token
+
+
+def tokenize(text: str) -> List[str]:
+    """Termes indexés d'un texte, dans l'ordre (doublons conservés)."""
+    return [
+        stem(token)
+        for token in _TOKEN.findall(fold(text))
+        if token not in STOPWORDS and (len(token) > 1 or token.isdigit())
+    ]
+
+
+def _matches(metadata: Dict, where: Dict) -> bool:
+    """Filtre de métadonnées : {"cle": valeur}, {"cle": {"$eq": v}}, {"cle": {"$in": [...]}}."""
+    for key, condition in where.items():
+        value = metadata.get(key)
+        if isinstance(condition, dict) and "$in" in condition:
+            if value not in condition["$in"]:
+                return False
+        elif value != (condition["$eq"] if isinstance(condition, dict) else condition):
+            return False
+    return True
+
+
+class LexicalIndex:
+    """Index inversé BM25 (terme -> documents, fréquences) sur les chunks."""
+
+    def __init__(
+        self,
+        ids: List[str],
+        documents: List[str],
+        metadatas: List[Dict],
+        postings: Dict[str, tuple],
+        doc_lengths: List[int],
+        fingerprint: str = "",
+        k1: float = 1.5,
+        b: float = 0.75,
+    ):
+        """
+        Args:
+            postings: terme -> (indices des documents, fréquences du terme)
+            doc_lengths: Nombre de termes de chaque document
+            fingerprint: Empreinte du manifeste d'indexation à la construction
+            k1, b: Paramètres BM25 (saturation de la fréquence, normalisation de longueur)
+        """
+        self.ids = ids
+        self.documents = documents
+        self.metadatas = metadatas
+        self.fingerprint = fingerprint
+        self.k1 = k1
+        self.b = b
+        self._tfs = {
+            term: (np.asarray(docs, dtype=np.int32), np.asarray(tfs, dtype=np.float32))
+            for term, (docs, tfs) in postings.items()
+        }
+        self._doc_lengths = np.asarray(doc_lengths, dtype=np.float32)
+        self._compute_weights()
+        self.queries = 0
+
+    def _compute_weights(self) -> None:
+        """Précalcule idf et poids BM25 de chaque posting : une recherche n'est plus qu'une somme."""
+        n = len(self.ids)
+        avg_length = float(self._doc_lengths.mean()) if n else 0.0
+        norm = self.k1 * (1 - self.b + self.b * self._doc_lengths / (avg_length or 1.0))
+
+        self.idf: Dict[str, float] = {}
+        self._postings: Dict[str, tuple] = {}
+        for term, (docs, tfs) in self._tfs.items():
+            df = len(docs)
+            idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+            self.idf[term] = idf
+            self._postings[term] = (docs, idf * tfs * (self.k1 + 1) / (tfs + norm[docs]))
+        # Terme absent du corpus : idf d'un terme de fréquence documentaire nulle
+        self._unknown_idf = math.log(1 + (n + 0.5) / 0.5)
+
+    # ------------------------------------------------------------------
+    # Construction / persistance
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def build(
+        cls,
+        ids: List[str],
+        documents: List[str],
+        metadatas: List[Dict],
+        fingerprint: str = "",
+        **kwargs,
+    ) -> "LexicalIndex":
+        """Tokenise les documents et construit l'index inversé."""
+        postings: Dict[str, tuple] = {}
+        doc_lengths = []
+        for i, document in enumerate(documents):
+            terms = tokenize(document)
+            doc_lengths.append(len(terms))
+            counts: Dict[str, int] = {}
+            for term in terms:
+                counts[term] = counts.get(term, 0) + 1
+            for term, tf in counts.items():
+                docs, tfs = postings.setdefault(term, ([], []))
+                docs.append(i)
+                tfs.append(tf)
+
+        return cls(
+            list(ids),
+            list(documents),
+            [dict(m or {}) for m in metadatas],
+            postings,
+            doc_lengths,
+            fingerprint,
+            **kwargs,
+        )
+
+    @classmethod
+    def from_store(cls, vector_store, fingerprint: str = "") -> "LexicalIndex":
+        """Index des chunks d'une VectorStore ou NumpyVectorStore."""
+        data = vector_store.get_documents()
+        return cls.build(data["ids"], data["documents"], data["metadatas"], fingerprint)
+
+    def save(self, persist_directory: str) -> Path:
+        path = Path(persist_directory) / INDEX_FILE
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "fingerprint": self.fingerprint,
+                    "k1": self.k1,
+                    "b": self.b,
+                    "ids": self.ids,
+                    "documents": self.documents,
+                    "metadatas": self.metadatas,
+                    "doc_lengths": self._doc_lengths.astype(int).tolist(),
+                    "postings": {
+                        term: [docs.tolist(), tfs.astype(int).tolist()]
+                        for term, (docs, tfs) in self._tfs.items()
+                    },
+                },
+                f,
+                ensure_ascii=False,
+                separators=(",", ":"),
+            )
+        return path
+
+    @classmethod
+    def load(cls, persist_directory: str) -> Optional["LexicalIndex"]:
+        """Index stocké avec la base, None si absent ou antérieur à la dernière indexation."""
+        from .protocol_contexts import index_fingerprint
+
+        path = Path(persist_directory) / INDEX_FILE
+        if not path.is_file():
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"[WARN] Index lexical illisible ({e})")
+            return None
+
+        if data.get("fingerprint") != index_fingerprint(persist_directory):
+            print("[WARN] Index lexical obsolete (index reconstruit)")
+            return None
+        return cls(
+            data["ids"],
+            data["documents"],
+            data["metadatas"],
+            data["postings"],
+            data["doc_lengths"],
+            data["fingerprint"],
+            k1=data.get("k1", 1.5),
+            b=data.get("b", 0.75),
+        )
+
+    # ------------------------------------------------------------------
+    # Recherche
+    # ------------------------------------------------------------------
+
+    def search(self, query: str, n_results: int = 5, where: Optional[Dict] = None) -> List[Dict]:
+        """
+        Recherche BM25.
+
+        Args:
+            query: Texte de recherche
+            n_results: Nombre de résultats
+            where: Filtre de métadonnées optionnel (ex: {"title": "..."})
+
+        Returns:
+            Liste de {content, metadata, id, bm25_score, coverage}, par score
+            décroissant ; coverage = part de l'idf des termes de la requête
+            présente dans le document (1.0 = tous les termes trouvés).
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        with span("lexical.search", terms=len(terms), top_k=n_results) as s:
+            self.queries += 1
+            n = len(self.ids)
+            if not terms or not n:
+                return []
+
+            scores = np.zeros(n, dtype=np.float32)
+            matched = np.zeros(n, dtype=np.float32)
+            for term in terms:
+                posting = self._postings.get(term)
+                if posting is None:
+                    continue
+                docs, weights = posting
+                scores[docs] += weights
+                matched[docs] += self.idf[term]
+            query_idf = sum(self.idf.get(term, self._unknown_idf) for term in terms)
+
+            candidates = np.flatnonzero(scores > 0)
+            if where:
+                candidates = np.array(
+                    [i for i in candidates if _matches(self.metadatas[i], where)], dtype=np.int64
+                )
+            k = min(n_results, len(candidates))
+            s.set(matches=len(candidates))
+            if k <= 0:
+                return []
+
+            top = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+            top = top[np.argsort(-scores[top], kind="stable")]
+            return [
+                {
+                    "content": self.documents[i],
+                    "metadata": self.metadatas[i],
+                    "id": self.ids[i],
+                    "bm25_score": float(scores[i]),
+                    "coverage": float(matched[i] / query_idf),
+                }
+                for i in top
+            ]
+
+    def count(self) -> int:
+        return len(self.ids)
+
+    def get_stats(self) -> Dict:
+        return {
+            "documents": self.count(),
+            "terms": len(self._postings),
+            "postings": int(sum(len(docs) for docs, _ in self._postings.values())),
+            "mean_doc_length": float(self._doc_lengths.mean()) if self.count() else 0.0,
+            "queries": self.queries,
+        }
+
+
+def build_lexical_index(vector_store, persist_directory: str) -> LexicalIndex:
+    """
+    Construit l'index lexical des chunks de vector_store et l'enregistre dans
+    persist_directory (lié à la version courante du manifeste d'indexation).
+    """
+    from .protocol_contexts import index_fingerprint
+
+    start = time.time()
+    index = LexicalIndex.from_store(vector_store, index_fingerprint(persist_directory))
+    path = index.save(persist_directory)
+    stats = index.get_stats()
+    print(
+        f"[OK] Index lexical : {path} ({stats['documents']} documents, "
+        f"{stats['terms']} termes, {time.time() - start:.1f}s)"
+    )
+    return index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Construit l'index lexical BM25 de la base")
+    parser.add_argument("--persist-dir", default="data/vector_db")
+    parser.add_argument("--collection", default="triage_medical")
+    parser.add_argument("--backend", default=None, help="chroma ou numpy")
+    parser.add_argument("--query", default=None, help="Requête de test après construction")
+    args = parser.parse_args()
+
+    from .vector_store import load_vector_store
+
+    store = load_vector_store(
+        backend=args.backend, persist_directory=args.persist_dir, collection_name=args.collection
+    )
+    index = build_lexical_index(store, args.persist_dir)
+
+    if args.query:
+        print(f"\n[QUERY] {args.query} -> {tokenize(args.query)}")
+        for result in index.search(args.query, n_results=5):
+            print(
+                f"  {result['bm25_score']:6.2f}  couverture {result['coverage']:.0%}  "
+                f"{result['metadata'].get('title', '')} - {result['metadata'].get('section', '')}"
+            )
+
+
+if __name__ == "__main__":
+    main()
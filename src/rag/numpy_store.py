@@ -0,0 +1,386 @@
+"""
+Numpy Store - Recherche exacte en mémoire (alternative à ChromaDB)
+
+La base documentaire ne fait que quelques centaines de chunks : une matrice
+float32 contiguë normalisée une fois suffit, la recherche devient un simple
+produit matrice-vecteur + argpartition, sans SQLite ni HNSW.
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+
+from .document_loader import prepare_chunks
+from .embeddings import EmbeddingProvider
+from ..monitoring.tracing import span
+
+_DEFAULT_EMBEDDING_MODEL = os.getenv(
+    "EMBEDDING_MODEL", "paraphrase-multilingual-MiniLM-L12-v2"
+)
+
+
+class NumpyVectorStore:
+    """Même interface que VectorStore (search / add_documents / get_stats), en mémoire."""
+
+    def __init__(
+        self,
+        persist_directory: Optional[str] = "data/vector_db/numpy",
+        collection_name: str = "triage_medical",
+        embedding_model: str = _DEFAULT_EMBEDDING_MODEL,
+        embedding_cache_dir: Optional[str] = None,
+        embedding_provider: Optional[EmbeddingProvider] = None,
+    ):
+        """
+        Args:
+            persist_directory: Dossier de persistance (None = mémoire uniquement)
+            collection_name: Nom de la collection
+            embedding_model: Modèle d'embeddings (ignoré si embedding_provider fourni)
+            embedding_cache_dir: Dossier du cache disque des embeddings
+            embedding_provider: EmbeddingProvider déjà chargé à réutiliser
+        """
+        self.collection_name = collection_name
+        self.persist_directory = Path(persist_directory) if persist_directory else None
+
+        # Modèle d'embeddings chargé au premier encodage (jamais en mode lexical)
+        if embedding_provider is None:
+            embedding_provider = EmbeddingProvider(
+                model_name=embedding_model, cache_dir=embedding_cache_dir
+            )
+        self.embedding_model = embedding_provider
+
+        self._dim = self.embedding_model.get_dimension()
+        self._matrix = np.zeros((0, self._dim), dtype=np.float32)
+        self.ids: List[str] = []
+        self.documents: List[str] = []
+        self.metadatas: List[Dict] = []
+        self._masks: Dict[tuple, np.ndarray] = {}
+        # Lots ajoutés sans sauvegarde (add_documents(save=False)), fusionnés à l'usage
+        self._pending: List[np.ndarray] = []
+        # Empreinte du manifeste d'indexation au moment de l'export depuis ChromaDB
+        self.fingerprint = ""
+
+        if self.persist_directory and self._index_dir.exists():
+            self._load()
+            print(f"[OK] Index numpy '{collection_name}' charge ({self.count()} documents)")
+
+    # ------------------------------------------------------------------
+    # Construction / persistance
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def from_chroma(
+        cls, vector_store, persist_directory: Optional[str] = None, fingerprint: str = ""
+    ) -> "NumpyVectorStore":
+        """
+        Construit l'index en mémoire depuis une VectorStore ChromaDB existante,
+        sans recalculer les embeddings.
+
+        Args:
+            fingerprint: Empreinte du manifeste d'indexation, stockée avec la copie
+                pour détecter une réindexation de ChromaDB
+        """
+        store = cls(
+            persist_directory=persist_directory,
+            collection_name=vector_store.collection_name,
+            embedding_provider=vector_store.embedding_model,
+        )
+
+        data = vector_store.collection.get(include=["embeddings", "documents", "metadatas"])
+        store._set_data(
+            ids=list(data["ids"]),
+            documents=list(data["documents"]),
+            metadatas=[dict(m or {}) for m in data["metadatas"]],
+            embeddings=np.asarray(data["embeddings"], dtype=np.float32),
+        )
+        store.fingerprint = fingerprint
+        store._save()
+        print(f"[OK] Index numpy construit depuis ChromaDB ({store.count()} documents)")
+        return store
+
+    @property
+    def _index_dir(self) -> Path:
+        return self.persist_directory / self.collection_name
+
+    def _load(self) -> None:
+        """Charge la matrice et les documents depuis le disque."""
+        matrix = np.load(self._index_dir / "embeddings.npy")
+        with open(self._index_dir / "documents.json", "r", encoding="utf-8") as f:
+            data = json.load(f)
+
+        self.ids = data["ids"]
+        self.documents = data["documents"]
+        self.metadatas = data["metadatas"]
+        self.fingerprint = data.get("fingerprint", "")
+        self._matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+        self._build_masks()
+
+    def _save(self) -> None:
+        """Sauvegarde la matrice et les documents (si persistance activée)."""
+        if not self.persist_directory:
+            return
+        self._consolidate()
+
+        self._index_dir.mkdir(parents=True, exist_ok=True)
+        np.save(self._index_dir / "embeddings.npy", self._matrix)
+        with open(self._index_dir / "documents.json", "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "ids": self.ids,
+                    "documents": self.documents,
+                    "metadatas": self.metadatas,
+                    "fingerprint": self.fingerprint,
+                },
+                f,
+                ensure_ascii=False,
+            )
+
+    def _set_data(
+        self, ids: List[str], documents: List[str], metadatas: List[Dict], embeddings: np.ndarray
+    ) -> None:
+        """Remplace tout le contenu de l'index."""
+        self.ids = ids
+        self.documents = documents
+        self.metadatas = metadatas
+        self._matrix = self._normalize(embeddings)
+        self._pending = []
+        self._build_masks()
+
+    def _normalize(self, vectors) -> np.ndarray:
+        """Normalise les lignes en L2 (une seule fois, à l'indexation)."""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.size == 0:
+            return np.zeros((0, self._dim), dtype=np.float32)
+        if vectors.ndim == 1:
+            vectors = vectors[None, :]
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return np.ascontiguousarray(vectors / norms, dtype=np.float32)
+
+    def _build_masks(self) -> None:
+        """Précalcule un masque booléen par couple (clé, valeur) de métadonnées."""
+        masks: Dict[tuple, np.ndarray] = {}
+        n = len(self.metadatas)
+        for i, metadata in enumerate(self.metadatas):
+            for key, value in metadata.items():
+                if isinstance(value, (list, dict)):
+                    continue
+                mask = masks.get((key, value))
+                if mask is None:
+                    mask = masks[(key, value)] = np.zeros(n, dtype=bool)
+                mask[i] = True
+        self._masks = masks
+
+    def _consolidate(self) -> None:
+        """Fusionne les lots en attente dans la matrice et recalcule les masques."""
+        if not self._pending:
+            return
+        self._matrix = np.ascontiguousarray(np.vstack([self._matrix, *self._pending]))
+        self._pending = []
+        self._build_masks()
+
+    def flush(self) -> None:
+        """Fusionne les lots ajoutés avec save=False et sauvegarde l'index une fois."""
+        self._consolidate()
+        self._save()
+
+    # ------------------------------------------------------------------
+    # Interface VectorStore
+    # ------------------------------------------------------------------
+
+    def add_documents(
+        self, chunks: List[Dict], verbose: bool = True, save: bool = True
+    ) -> None:
+        """
+        Ajoute des documents (chunks) à l'index.
+
+        Args:
+            chunks: Liste de dicts {content, metadata}
+            verbose: Afficher la progression (désactivé par le pipeline d'ingestion)
+            save: Fusionner et sauvegarder immédiatement. Avec False, le lot est mis
+                en attente jusqu'au flush() (une seule écriture pour toute une ingestion)
+        """
+        if not chunks:
+            if verbose:
+                print("[WARN] Aucun chunk a ajouter")
+            return
+
+        if verbose:
+            print(f"\n[INFO] Indexation de {len(chunks)} chunks...")
+
+        documents, metadatas, ids = prepare_chunks(chunks)
+
+        # Upsert : les ids déjà présents sont remplacés
+        existing = set(self.ids)
+        self.delete_documents([i for i in ids if i in existing], save=False)
+
+        if verbose:
+            print("[INFO] Generation des embeddings...")
+        embeddings = self._normalize(self.embedding_model.embed_batch(documents))
+
+        self.ids.extend(ids)
+        self.documents.extend(documents)
+        self.metadatas.extend(metadatas)
+        self._pending.append(embeddings)
+        if save:
+            self.flush()
+
+        if verbose:
+            print(f"[OK] {len(chunks)} chunks indexes")
+            print(f"[INFO] Total index : {self.count()} documents")
+
+    def search(
+        self, query: str, n_results: int = 5, filter_metadata: Optional[Dict] = None
+    ) -> List[Dict]:
+        """
+        Recherche exacte par similarité cosinus.
+
+        Args:
+            query: Question ou texte de recherche
+            n_results: Nombre de résultats à retourner
+            filter_metadata: Filtres optionnels (ex: {"title": "..."})
+
+        Returns:
+            Liste de résultats avec scores
+        """
+        with span("vector.search", backend="numpy", queries=1, top_k=n_results):
+            query_vector = self._normalize(self.embedding_model.embed_text(query))[0]
+            self._consolidate()
+            scores = self._matrix @ query_vector
+            return self._top_k(scores, n_results, filter_metadata)
+
+    def search_many(
+        self,
+        queries: List[str],
+        n_results: int = 5,
+        filters: Optional[Union[Dict, List[Optional[Dict]]]] = None,
+    ) -> List[List[Dict]]:
+        """Recherche pour plusieurs requêtes : un embed_batch + un produit matriciel."""
+        if not queries:
+            return []
+
+        if isinstance(filters, list):
+            if len(filters) != len(queries):
+                raise ValueError("filters doit contenir un filtre par requête")
+            per_query_filters = filters
+        else:
+            per_query_filters = [filters] * len(queries)
+
+        with span("vector.search", backend="numpy", queries=len(queries), top_k=n_results):
+            query_matrix = self._normalize(self.embedding_model.embed_batch(list(queries)))
+            self._consolidate()
+            all_scores = query_matrix @ self._matrix.T
+
+            return [
+                self._top_k(scores, n_results, where)
+                for scores, where in zip(all_scores, per_query_filters)
+            ]
+
+    def _top_k(self, scores: np.ndarray, n_results: int, where: Optional[Dict]) -> List[Dict]:
+        """Sélectionne les k meilleurs scores (argpartition puis tri des k)."""
+        if where:
+            scores = np.where(self._mask(where), scores, -np.inf)
+            available = int(np.isfinite(scores).sum())
+        else:
+            available = len(scores)
+
+        k = min(n_results, available)
+        if k <= 0:
+            return []
+
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+
+        # Distance L2 au carré entre vecteurs unitaires (même convention que Chroma)
+        return [
+            {
+                "content": self.documents[i],
+                "metadata": self.metadatas[i],
+                "distance": float(2.0 - 2.0 * scores[i]),
+                "id": self.ids[i],
+            }
+            for i in top
+        ]
+
+    def _mask(self, where: Dict) -> np.ndarray:
+        """
+        Masque booléen d'un filtre de métadonnées.
+
+        Supporte le sous-ensemble de la syntaxe Chroma utilisé dans le projet :
+        {"cle": valeur}, {"cle": {"$eq": v}}, {"cle": {"$in": [...]}}, $and, $or.
+        """
+        n = len(self.ids)
+        mask = np.ones(n, dtype=bool)
+
+        for key, condition in where.items():
+            if key == "$and":
+                for sub in condition:
+                    mask &= self._mask(sub)
+            elif key == "$or":
+                sub_mask = np.zeros(n, dtype=bool)
+                for sub in condition:
+                    sub_mask |= self._mask(sub)
+                mask &= sub_mask
+            elif isinstance(condition, dict) and "$in" in condition:
+                sub_mask = np.zeros(n, dtype=bool)
+                for value in condition["$in"]:
+                    sub_mask |= self._masks.get((key, value), np.zeros(n, dtype=bool))
+                mask &= sub_mask
+            else:
+                value = condition["$eq"] if isinstance(condition, dict) else condition
+                mask &= self._masks.get((key, value), np.zeros(n, dtype=bool))
+
+        return mask
+
+    def get_all_ids(self) -> List[str]:
+        """Liste les ids de tous les documents indexés."""
+        return list(self.ids)
+
+    def get_documents(self) -> Dict[str, List]:
+        """Tous les chunks indexés : {ids, documents, metadatas}."""
+        return {
+            "ids": list(self.ids),
+            "documents": list(self.documents),
+            "metadatas": list(self.metadatas),
+        }
+
+    def delete_documents(self, ids: List[str], save: bool = True) -> None:
+        """Supprime des documents par id."""
+        to_delete = set(ids)
+        if not to_delete:
+            return
+        self._consolidate()
+
+        keep = [i for i, doc_id in enumerate(self.ids) if doc_id not in to_delete]
+        self.ids = [self.ids[i] for i in keep]
+        self.documents = [self.documents[i] for i in keep]
+        self.metadatas = [self.metadatas[i] for i in keep]
+        self._matrix = np.ascontiguousarray(self._matrix[keep])
+        self._build_masks()
+        if save:
+            self._save()
+
+    def count(self) -> int:
+        """Nombre de documents indexés."""
+        return len(self.ids)
+
+    def clear_collection(self) -> None:
+        """Vide complètement l'index."""
+        print(f"[INFO] Suppression index '{self.collection_name}'...")
+        self._set_data([], [], [], np.zeros((0, self._dim), dtype=np.float32))
+        self._save()
+        print("[OK] Index reinitialise")
+
+    def get_stats(self) -> Dict:
+        """Retourne des statistiques sur l'index."""
+        self._consolidate()
+        return {
+            "total_documents": self.count(),
+            "collection_name": self.collection_name,
+            "persist_directory": str(self.persist_directory) if self.persist_directory else None,
+            "backend": "numpy",
+            "matrix_bytes": int(self._matrix.nbytes),
+            "embedding_cache": self.embedding_model.get_cache_stats(),
+        }
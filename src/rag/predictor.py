@@ -2,28 +2,56 @@
 Predictor ML + RAG - Random Forest + Documents médicaux
 """
 
-import joblib
 import numpy as np
 import time
 from pathlib import Path
 from typing import Dict, List
 
+from ..monitoring.metrics_tracker import get_tracker
+from ..monitoring.tracing import current_span, span
+from .forest_engine import CompiledForest, check_equivalence
+from .protocol_contexts import ProtocolContexts, clean_protocol_context
+
+DEFAULT_VECTOR_DB = Path(__file__).parent.parent.parent / "data" / "vector_db"
+
 
 class MLTriagePredictor:
     """Prédit avec Random Forest + enrichissement RAG."""
 
-    def __init__(self, model_path: str = None, rag_retriever=None):
+    def __init__(self, model_path: str = None, rag_retriever=None, protocol_contexts=None):
+        """
+        Args:
+            model_path: Pipeline scikit-learn (défaut: data/models/random_forest_v2.pkl)
+            rag_retriever: Retriever RAG optionnel
+            protocol_contexts: ProtocolContexts ou dossier de l'index où les lire
+                (défaut: data/vector_db si le RAG est actif)
+        """
         # Modèle ML
         if model_path is None:
             model_path = Path(__file__).parent.parent.parent / "data" / "models" / "random_forest_v2.pkl"
 
         try:
+            import joblib
+
             self.model = joblib.load(model_path)
             print("[OK] Modele ML charge")
         except Exception as e:
             print(f"[ERREUR] Modele: {e}")
             self.model = None
 
+        # Moteur compilé (tableaux NumPy) pour la latence d'un cas / petits lots
+        self.engine = None
+        if self.model is not None:
+            try:
+                engine = CompiledForest.from_sklearn(self.model)
+                # Contrôle unique au chargement : le moteur n'est utilisé que s'il
+                # reproduit scikit-learn sur un échantillon couvrant ses seuils
+                check_equivalence(self.model, engine)
+                self.engine = engine
+                print("[OK] Moteur d'inference compile")
+            except Exception as e:
+                print(f"[WARN] Moteur compile indisponible ({e}), inference scikit-learn")
+
         # RAG
         self.rag = rag_retriever
         if self.rag:
@@ -31,6 +59,15 @@ class MLTriagePredictor:
         else:
             print("[WARN] RAG desactive")
 
+        # Contextes précalculés à l'indexation (recherche en direct pour les autres)
+        if protocol_contexts is None and self.rag:
+            protocol_contexts = DEFAULT_VECTOR_DB
+        if protocol_contexts is not None and not isinstance(protocol_contexts, ProtocolContexts):
+            protocol_contexts = ProtocolContexts.load(str(protocol_contexts))
+        self.protocol_contexts = protocol_contexts
+        if self.protocol_contexts:
+            print(f"[OK] {len(self.protocol_contexts.contexts)} contextes de protocole precalcules")
+
         self.severity_levels = {
             "ROUGE": {"label": "🔴 URGENCE VITALE", "action": "APPELER LE 15", "color": "#FF0000"},
             "JAUNE": {"label": "🟡 URGENCE", "action": "Urgences dans l'heure", "color": "#FFD700"},
@@ -38,41 +75,147 @@ class MLTriagePredictor:
             "GRIS": {"label": "⚪ PAS D'URGENCE", "action": "RDV médecin", "color": "#808080"},
         }
 
+    # Ordre des classes quand le modèle a été entraîné sur des labels encodés
+    CLASSES = ["GRIS", "JAUNE", "ROUGE", "VERT"]
+
+    # Au-delà, scikit-learn (boucles C multi-thread) est plus rapide que le moteur compilé
+    ENGINE_MAX_ROWS = 1024
+
     def predict(self, chatbot_summary: Dict) -> Dict:
         """Prédiction ML + RAG."""
         start = time.time()
 
-        patient = chatbot_summary.get("patient_info", {})
-        vitals = chatbot_summary.get("vitals", {})
-        symptoms = chatbot_summary.get("symptoms", [])
+        with span("predict", rows=1) as s:
+            result, patient, from_model = self._predict_rows([chatbot_summary])[0]
+            s.set(severity=result["severity_level"], from_model=from_model)
+
+        # Track
+        if from_model:
+            self._track(result, patient, time.time() - start)
 
-        # ML prediction
-        features = self._prep_features(patient, vitals, symptoms)
+        return result
 
-        if not self.model or not features:
-            return self._fallback(symptoms, vitals)
+    def predict_batch(self, summaries: List[Dict], track: bool = True) -> List[Dict]:
+        """
+        Prédiction ML + RAG pour un lot de résumés.
 
-        try:
-            pred = self.model.predict([features])[0]
-            probas = self.model.predict_proba([features])[0]
+        Une seule matrice de features et un seul appel à predict_proba pour tout
+        le lot ; les requêtes RAG identiques ne sont exécutées qu'une fois et le
+        suivi est écrit en une fois.
 
-            classes = ["GRIS", "JAUNE", "ROUGE", "VERT"]
-            severity = classes[pred] if isinstance(pred, (int, np.integer)) else pred
+        Args:
+            summaries: Liste de résumés chatbot (patient_info, vitals, symptoms)
+            track: Enregistrer les prédictions dans le MetricsTracker
 
-            proba_dict = {classes[i]: float(probas[i]) for i in range(4)}
-            confidence = float(max(probas))
+        Returns:
+            Liste de résultats, dans l'ordre des résumés
+        """
+        if not summaries:
+            return []
 
-        except:
-            return self._fallback(symptoms, vitals)
+        start = time.time()
+        with span("predict", rows=len(summaries)):
+            rows = self._predict_rows(summaries)
 
-        # Red flags
-        flags = self._red_flags(vitals, symptoms)
+        if track:
+            self._track_batch(
+                [(result, patient) for result, patient, from_model in rows if from_model],
+                time.time() - start,
+            )
 
-        # RAG enrichment
-        rag_data = self._rag_enrich(severity, symptoms, flags)
+        return [result for result, _, _ in rows]
+
+    def _predict_rows(self, summaries: List[Dict]) -> List[tuple]:
+        """Cœur commun à predict et predict_batch : (résultat, patient, issu du modèle)."""
+        parsed = []
+        for summary in summaries:
+            patient = summary.get("patient_info", {})
+            vitals = summary.get("vitals", {})
+            symptoms = summary.get("symptoms", [])
+            features = self._prep_features(patient, vitals, symptoms)
+            parsed.append((patient, vitals, symptoms, features))
+
+        # ML prediction : une seule matrice pour les lignes exploitables
+        scorable = [i for i, row in enumerate(parsed) if self.model and row[3]]
+        scores = {}
+        if scorable:
+            try:
+                labels, probas = self._score([parsed[i][3] for i in scorable])
+                scores = dict(zip(scorable, zip(labels, probas)))
+            except Exception:
+                scores = {}
+
+        # Red flags puis RAG (requêtes dédupliquées sur le lot)
+        flags_by_row = {i: self._red_flags(parsed[i][1], parsed[i][2]) for i in scores}
+        with span("predict.rag", requests=len(scores)):
+            rag_by_row = self._rag_enrich_many(
+                {i: (scores[i][0], parsed[i][2], flags_by_row[i]) for i in scores}
+            )
 
-        # Result
-        result = {
+        rows = []
+        for i, (patient, vitals, symptoms, features) in enumerate(parsed):
+            if i not in scores:
+                rows.append((self._fallback(symptoms, vitals), patient, False))
+                continue
+
+            severity, proba_dict = scores[i]
+            result = self._build_result(
+                severity, proba_dict, flags_by_row[i], features, symptoms, rag_by_row.get(i)
+            )
+            rows.append((result, patient, True))
+
+        return rows
+
+    def _score(self, feature_rows: List[List[float]]) -> tuple:
+        """
+        Un seul predict_proba sur la matrice ; la classe est l'argmax des probabilités
+        (même décision que model.predict pour un RandomForest). Moteur compilé
+        jusqu'à ENGINE_MAX_ROWS lignes, scikit-learn au-delà ou en cas d'erreur.
+
+        Returns:
+            (liste des sévérités, liste de dicts {classe: probabilité})
+        """
+        X = np.asarray(feature_rows, dtype=float)
+
+        scorer = self.model
+        if self.engine is not None and len(X) <= self.ENGINE_MAX_ROWS:
+            scorer = self.engine
+        with span("predict.score", rows=len(X)) as s:
+            try:
+                probas = scorer.predict_proba(X)
+            except Exception:
+                if scorer is self.model:
+                    raise
+                scorer = self.model
+                probas = scorer.predict_proba(X)
+            s.set(engine="compiled" if scorer is self.engine else "sklearn")
+
+        model_classes = getattr(scorer, "classes_", None)
+        if model_classes is None:
+            model_classes = self.CLASSES
+        labels = [
+            self.CLASSES[c] if isinstance(c, (int, np.integer)) else str(c)
+            for c in model_classes
+        ]
+
+        best = np.argmax(probas, axis=1)
+        severities = [labels[j] for j in best]
+        proba_dicts = [
+            {labels[j]: float(row[j]) for j in range(len(labels))} for row in probas
+        ]
+        return severities, proba_dicts
+
+    def _build_result(
+        self,
+        severity: str,
+        proba_dict: Dict,
+        flags: List[str],
+        features: List[float],
+        symptoms: List[str],
+        rag_data: Dict,
+    ) -> Dict:
+        """Assemble le résultat d'une prédiction ML."""
+        return {
             "severity_level": severity,
             "label": self.severity_levels[severity]["label"],
             "action": self.severity_levels[severity]["action"],
@@ -80,7 +223,7 @@ class MLTriagePredictor:
             "red_flags": flags,
             "justification": self._justify(severity, flags, features, symptoms, rag_data),
             "probabilities": proba_dict,
-            "confidence": confidence,
+            "confidence": float(max(proba_dict.values())),
             "features_used": {
                 "FC": features[0],
                 "FR": features[1],
@@ -94,42 +237,118 @@ class MLTriagePredictor:
             "rag_sources": rag_data.get("sources", []) if rag_data else [],
         }
 
-        # Track
-        self._track(result, patient, time.time() - start)
+    def _rag_query(self, severity: str, symptoms: List[str], flags: List[str]) -> str:
+        """Query RAG ciblée."""
+        q_parts = [f"protocole niveau {severity}"]
 
-        return result
+        if symptoms:
+            q_parts.append(", ".join(symptoms[:2]))
 
-    def _rag_enrich(self, severity: str, symptoms: List[str], flags: List[str]) -> Dict:
-        """RAG enrichissement."""
-        if not self.rag:
+        if flags:
+            q_parts.append(flags[0])
+
+        return " ".join(q_parts)
+
+    def _symptom_category(self, symptoms: List[str]) -> str:
+        """Catégorie (SYMPTOMES_CLES) des deux premiers symptômes : "" sans symptôme, None si aucune."""
+        if not symptoms:
+            return ""
+        for name, present in zip(self.SYMPTOMES_CLES, self._encode_symptomes(symptoms[:2])):
+            if present:
+                return name
+        return None
+
+    def _precomputed(self, severity: str, symptoms: List[str], flags: List[str]) -> Dict:
+        """Contexte précalculé de la combinaison, None si inconnue."""
+        if not self.protocol_contexts:
+            return None
+        context = self.protocol_contexts.get(severity, self._symptom_category(symptoms), flags)
+        if context is None:
             return None
+        return {"context": context, "sources": [f"Protocoles {severity}"]}
+
+    def _rag_enrich_many(self, requests: Dict) -> Dict:
+        """
+        RAG pour un lot : {ligne: (severity, symptoms, flags)} -> {ligne: rag_data}.
+
+        Les combinaisons précalculées sont lues dans la table ; pour les autres,
+        les requêtes identiques (fréquentes sur un lot de cas) ne sont
+        exécutées qu'une seule fois.
+        """
+        if not requests:
+            return {}
+
+        done = {}
+        for i, request in requests.items():
+            precomputed = self._precomputed(*request)
+            if precomputed is not None:
+                done[i] = precomputed
+        requests = {i: req for i, req in requests.items() if i not in done}
+        current_span().set(precomputed=len(done), live=len(requests))
+
+        if not self.rag or not requests:
+            return done
+
+        if len(requests) == 1:
+            i, (severity, symptoms, flags) = next(iter(requests.items()))
+            done[i] = self._rag_live(severity, symptoms, flags)
+            return done
+
+        queries = {i: (self._rag_query(*req), req[0]) for i, req in requests.items()}
+        unique = list(dict.fromkeys(queries.values()))
 
         try:
-            # Query ciblée
-            q_parts = [f"protocole niveau {severity}"]
+            start = time.time()
+            with span("rag.retrieve", queries=len(unique), top_k=3):
+                if hasattr(self.rag, "retrieve_context_many"):
+                    contexts = self.rag.retrieve_context_many([q for q, _ in unique], top_k=3)
+                else:
+                    contexts = [self.rag.retrieve_context(q, top_k=3) for q, _ in unique]
 
-            if symptoms:
-                q_parts.append(", ".join(symptoms[:2]))
+            try:
+                get_tracker().track_latency(
+                    "RAG", "retrieve_many", time.time() - start, {"queries": len(unique)}
+                )
+            except Exception:
+                pass
+        except Exception as e:
+            print(f"Erreur RAG: {e}")
+            return done
+
+        enriched = {
+            (query, severity): {
+                "context": self._clean_rag_context(context, severity),
+                "sources": [f"Protocoles {severity}"],
+            }
+            for (query, severity), context in zip(unique, contexts)
+        }
+        done.update({i: enriched[key] for i, key in queries.items()})
+        return done
 
-            if flags:
-                q_parts.append(flags[0])
+    def _rag_enrich(self, severity: str, symptoms: List[str], flags: List[str]) -> Dict:
+        """RAG enrichissement (contexte précalculé, sinon recherche en direct)."""
+        precomputed = self._precomputed(severity, symptoms, flags)
+        if precomputed is not None:
+            return precomputed
+        return self._rag_live(severity, symptoms, flags)
+
+    def _rag_live(self, severity: str, symptoms: List[str], flags: List[str]) -> Dict:
+        """Recherche RAG en direct (combinaison non précalculée)."""
+        if not self.rag:
+            return None
 
-            query = " ".join(q_parts)
+        try:
+            query = self._rag_query(severity, symptoms, flags)
 
             # Retrieve
             start = time.time()
-            context = self.rag.retrieve_context(query, top_k=3)
+            with span("rag.retrieve", queries=1, top_k=3):
+                context = self.rag.retrieve_context(query, top_k=3)
 
             # Track RAG latency
             try:
-                import sys
-                from pathlib import Path
-
-                sys.path.insert(0, str(Path(__file__).parent.parent))
-                from src.monitoring.metrics_tracker import get_tracker
-
                 get_tracker().track_latency("RAG", "retrieve", time.time() - start)
-            except:
+            except Exception:
                 pass
 
             # Nettoyer et extraire contenu pertinent
@@ -142,48 +361,7 @@ class MLTriagePredictor:
 
     def _clean_rag_context(self, context: str, severity: str) -> str:
         """Nettoie contexte RAG pour garder contenu pertinent."""
-        # Enlever les tags [Source X: ...]
-        import re
-
-        context = re.sub(r"\[Source \d+:.*?\]", "", context)
-
-        # Garder lignes avec contenu (pas juste titres emoji)
-        lines = context.split("\n")
-        content_lines = []
-
-        for line in lines:
-            line = line.strip()
-            # Ignorer lignes vides ou juste emojis/titres
-            if not line:
-                continue
-            if line.startswith("#"):
-                continue
-            # Garder lignes avec contenu substantiel
-            if (
-                len(line) > 20
-                or line.startswith("-")
-                or line.startswith("✅")
-                or line.startswith("•")
-            ):
-                content_lines.append(line)
-
-        # Limiter à ~400 chars de contenu utile
-        result = "\n".join(content_lines[:15])
-
-        if len(result) > 400:
-            result = result[:400] + "..."
-
-        # Si trop court, ajouter message générique
-        if len(result) < 50:
-            defaults = {
-                "ROUGE": "Urgence vitale: appeler SMUR, surveillance continue, ne pas attendre.",
-                "JAUNE": "Urgence: consultation dans l'heure, surveiller constantes, réévaluer rapidement.",
-                "VERT": "Non urgent: consultation dans 24-48h, surveillance domicile possible.",
-                "GRIS": "Pas d'urgence: RDV médecin traitant, conseils généraux.",
-            }
-            result = defaults.get(severity, "Protocole standard applicable.")
-
-        return result
+        return clean_protocol_context(context, severity)
 
     # Ordre fixe des 10 symptômes binaires — doit correspondre au dataset v2
     SYMPTOMES_CLES = [
@@ -339,12 +517,6 @@ class MLTriagePredictor:
     def _track(self, result: Dict, patient: Dict, duration: float):
         """Track."""
         try:
-            import sys
-            from pathlib import Path
-
-            sys.path.insert(0, str(Path(__file__).parent.parent))
-            from src.monitoring.metrics_tracker import get_tracker
-
             t = get_tracker()
 
             t.track_prediction(
@@ -357,7 +529,34 @@ class MLTriagePredictor:
             )
 
             t.track_latency("Predictor_ML_RAG", "predict", duration)
-        except:
+        except Exception:
+            pass
+
+    def _track_batch(self, rows: List[tuple], duration: float):
+        """Track un lot en une seule écriture."""
+        if not rows:
+            return
+        try:
+            t = get_tracker()
+
+            t.track_predictions(
+                [
+                    {
+                        "severity": result["severity_level"],
+                        "age": patient.get("age", 0),
+                        "sex": patient.get("sex", "?")[0] if patient.get("sex") else "?",
+                        "symptoms": [],
+                        "red_flags": result["red_flags"],
+                        "confidence": result["confidence"],
+                    }
+                    for result, patient in rows
+                ]
+            )
+
+            t.track_latency(
+                "Predictor_ML_RAG", "predict_batch", duration, {"batch_size": len(rows)}
+            )
+        except Exception:
             pass
 
     def predict_with_probabilities(self, chatbot_summary: Dict) -> Dict:
@@ -0,0 +1,220 @@
+"""
+Contextes de protocole précalculés pour l'enrichissement RAG des prédictions.
+
+La requête RAG du predictor ne dépend que de (niveau de gravité, catégorie
+du symptôme principal, type du premier drapeau rouge) : un espace de
+quelques centaines de combinaisons sur un corpus statique. Elles sont
+toutes recherchées et nettoyées à la construction de l'index, puis
+stockées à côté de celui-ci (protocol_contexts.json). À la prédiction, une
+combinaison connue est un simple accès dictionnaire ; les autres passent
+par la recherche en direct.
+
+Reconstruction manuelle:
+    python -m src.rag.protocol_contexts --persist-dir data/vector_db
+"""
+
+import argparse
+import hashlib
+import json
+import re
+import time
+from itertools import product
+from pathlib import Path
+from typing import Dict, List, Optional
+
+CONTEXTS_FILE = "protocol_contexts.json"
+
+SEVERITIES = ("ROUGE", "JAUNE", "VERT", "GRIS")
+
+# Types de drapeaux produits par MLTriagePredictor._red_flags (valeur mesurée retirée)
+FLAG_KINDS = (
+    "Tachycardie",
+    "Bradycardie",
+    "Hypoxie",
+    "Fièvre élevée",
+    "Hypothermie",
+    "Hypertension",
+    "Hypotension",
+    "Tachypnée",
+    "Bradypnée",
+    "Douleur thoracique",
+    "Détresse respiratoire",
+)
+
+DEFAULT_CONTEXTS = {
+    "ROUGE": "Urgence vitale: appeler SMUR, surveillance continue, ne pas attendre.",
+    "JAUNE": "Urgence: consultation dans l'heure, surveiller constantes, réévaluer rapidement.",
+    "VERT": "Non urgent: consultation dans 24-48h, surveillance domicile possible.",
+    "GRIS": "Pas d'urgence: RDV médecin traitant, conseils généraux.",
+}
+
+_SOURCE_TAG = re.compile(r"\[Source \d+:.*?\]")
+_FLAG_VALUE = re.compile(r"\s*\(.*\)$")
+
+
+def flag_kind(flag: str) -> str:
+    """'Tachycardie (130 bpm)' -> 'Tachycardie'."""
+    return _FLAG_VALUE.sub("", flag)
+
+
+def protocol_query(severity: str, category: str, kind: str) -> str:
+    """Requête d'une combinaison (même forme que MLTriagePredictor._rag_query)."""
+    return " ".join(part for part in (f"protocole niveau {severity}", category, kind) if part)
+
+
+def clean_protocol_context(context: str, severity: str) -> str:
+    """Nettoie un contexte RAG : sans tags de source ni titres, ~400 caractères utiles."""
+    context = _SOURCE_TAG.sub("", context)
+
+    # Garder lignes avec contenu (pas juste titres emoji)
+    content_lines = []
+    for line in context.split("\n"):
+        line = line.strip()
+        # Ignorer lignes vides ou juste emojis/titres
+        if not line or line.startswith("#"):
+            continue
+        # Garder lignes avec contenu substantiel
+        if len(line) > 20 or line.startswith(("-", "✅", "•")):
+            content_lines.append(line)
+
+    # Limiter à ~400 chars de contenu utile
+    result = "\n".join(content_lines[:15])
+    if len(result) > 400:
+        result = result[:400] + "..."
+
+    # Si trop court, message générique
+    if len(result) < 50:
+        result = DEFAULT_CONTEXTS.get(severity, "Protocole standard applicable.")
+    return result
+
+
+def index_fingerprint(persist_directory: str) -> str:
+    """Empreinte du manifeste d'indexation (change à chaque reconstruction de l'index)."""
+    manifest = Path(persist_directory) / "index_manifest.json"
+    if not manifest.is_file():
+        return "absent"
+    return hashlib.sha256(manifest.read_bytes()).hexdigest()[:16]
+
+
+class ProtocolContexts:
+    """Table (gravité, catégorie, type de drapeau) -> contexte nettoyé."""
+
+    def __init__(self, contexts: Dict[str, str], fingerprint: str = ""):
+        self.contexts = contexts
+        self.fingerprint = fingerprint
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(severity: str, category: str, kind: str) -> str:
+        return f"{severity}|{category}|{kind}"
+
+    def get(self, severity: str, category: Optional[str], flags: List[str]) -> Optional[str]:
+        """
+        Contexte précalculé, None si la combinaison n'a pas été précalculée.
+
+        Args:
+            category: Catégorie du symptôme principal ("" sans symptôme, None si inconnue)
+            flags: Drapeaux rouges (seul le type du premier compte)
+        """
+        context = None
+        if category is not None:
+            kind = flag_kind(flags[0]) if flags else ""
+            context = self.contexts.get(self.key(severity, category, kind))
+
+        if context is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return context
+
+    def save(self, persist_directory: str) -> Path:
+        path = Path(persist_directory) / CONTEXTS_FILE
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(
+                {"fingerprint": self.fingerprint, "contexts": self.contexts},
+                f,
+                indent=2,
+                ensure_ascii=False,
+            )
+        return path
+
+    @classmethod
+    def load(cls, persist_directory: str) -> Optional["ProtocolContexts"]:
+        """Table stockée avec l'index, None si absente ou antérieure à la dernière indexation."""
+        path = Path(persist_directory) / CONTEXTS_FILE
+        if not path.is_file():
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"[WARN] Contextes de protocole illisibles ({e})")
+            return None
+
+        if data.get("fingerprint") != index_fingerprint(persist_directory):
+            print("[WARN] Contextes de protocole obsoletes (index reconstruit), recherche en direct")
+            return None
+        return cls(data.get("contexts", {}), data.get("fingerprint", ""))
+
+    def get_stats(self) -> Dict:
+        total = self.hits + self.misses
+        return {
+            "combinations": len(self.contexts),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+def build_protocol_contexts(retriever, persist_directory: str, top_k: int = 3) -> ProtocolContexts:
+    """
+    Recherche et nettoie le contexte de toutes les combinaisons, puis l'enregistre
+    dans persist_directory.
+
+    Args:
+        retriever: RAGRetriever sur l'index construit
+        persist_directory: Dossier de l'index (emplacement du fichier)
+        top_k: Extraits par requête (comme le predictor)
+    """
+    from .predictor import MLTriagePredictor
+
+    categories = [""] + list(MLTriagePredictor.SYMPTOMES_CLES)
+    combinations = list(product(SEVERITIES, categories, ("",) + FLAG_KINDS))
+    queries = [protocol_query(*combo) for combo in combinations]
+
+    print(f"[INFO] Precalcul de {len(combinations)} contextes de protocole...")
+    start = time.time()
+    if hasattr(retriever, "retrieve_context_many"):
+        raw_contexts = retriever.retrieve_context_many(queries, top_k=top_k)
+    else:
+        raw_contexts = [retriever.retrieve_context(q, top_k=top_k) for q in queries]
+
+    contexts = {
+        ProtocolContexts.key(*combo): clean_protocol_context(raw, combo[0])
+        for combo, raw in zip(combinations, raw_contexts)
+    }
+    table = ProtocolContexts(contexts, index_fingerprint(persist_directory))
+    path = table.save(persist_directory)
+    print(f"[OK] Contextes de protocole : {path} ({time.time() - start:.1f}s)")
+    return table
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Précalcule les contextes de protocole du predictor")
+    parser.add_argument("--persist-dir", default="data/vector_db")
+    parser.add_argument("--collection", default="triage_medical")
+    parser.add_argument("--backend", default=None, help="chroma ou numpy")
+    args = parser.parse_args()
+
+    from .vector_store import RAGRetriever, load_vector_store
+
+    store = load_vector_store(
+        backend=args.backend, persist_directory=args.persist_dir, collection_name=args.collection
+    )
+    build_protocol_contexts(RAGRetriever(store), args.persist_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+"""
+Stockage externe des sessions de chat (TriageChatbotAPI).
+
+L'état d'une conversation (TriageChatbotAPI.export_state) est sérialisé en
+JSON compact compressé zlib, avec une date d'expiration glissante : chaque
+écriture repousse l'échéance de `ttl` secondes. Le chatbot peut ainsi être
+rechargé à chaque tour par n'importe quel worker.
+
+Backends:
+- "memory" : dictionnaire du processus (tests, worker unique)
+- "sqlite" : fichier SQLite partagé par les workers d'une même machine
+
+Usage:
+    store = create_session_store()                 # SESSION_STORE, SESSION_TTL
+    bot.load_state(store.get(session_id))
+    bot.chat(message)
+    store.put(session_id, bot.export_state())
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional
+
+STORE_BACKENDS = ("memory", "sqlite")
+
+DEFAULT_TTL = 3600.0
+DEFAULT_SQLITE_PATH = "data/sessions/sessions.sqlite"
+
+
+def _json_default(value):
+    """Scalaires NumPy (scores RAG) -> types Python."""
+    if hasattr(value, "item"):
+        return value.item()
+    raise TypeError(f"Type non sérialisable: {type(value).__name__}")
+
+
+def serialize_session(state: Dict) -> bytes:
+    """État de session -> JSON compact compressé."""
+    payload = json.dumps(state, ensure_ascii=False, separators=(",", ":"), default=_json_default)
+    return zlib.compress(payload.encode("utf-8"), 6)
+
+
+def deserialize_session(blob: bytes) -> Dict:
+    return json.loads(zlib.decompress(blob).decode("utf-8"))
+
+
+class SessionStore(ABC):
+    """Interface commune des backends de sessions."""
+
+    def __init__(self, ttl: Optional[float] = None):
+        """
+        Args:
+            ttl: Inactivité max d'une session en secondes (défaut: 3600)
+        """
+        self.ttl = ttl if ttl is not None else DEFAULT_TTL
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.bytes_written = 0
+
+    def get(self, session_id: str) -> Optional[Dict]:
+        """État de la session, None si inconnue ou expirée."""
+        blob = self._get(session_id, time.time())
+        if blob is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return deserialize_session(blob)
+
+    def put(self, session_id: str, state: Dict) -> None:
+        """Enregistre l'état et repousse l'expiration de la session."""
+        blob = serialize_session(state)
+        self._put(session_id, blob, time.time() + self.ttl)
+        self.writes += 1
+        self.bytes_written += len(blob)
+
+    @abstractmethod
+    def _get(self, session_id: str, now: float) -> Optional[bytes]:
+        pass
+
+    @abstractmethod
+    def _put(self, session_id: str, blob: bytes, expires_at: float) -> None:
+        pass
+
+    @abstractmethod
+    def delete(self, session_id: str) -> bool:
+        """Supprime la session, False si elle n'existait pas."""
+        pass
+
+    @abstractmethod
+    def purge_expired(self) -> int:
+        """Supprime les sessions expirées, retourne leur nombre."""
+        pass
+
+    @abstractmethod
+    def count(self) -> int:
+        pass
+
+    def get_stats(self) -> Dict:
+        total = self.hits + self.misses
+        return {
+            "backend": self.backend,
+            "sessions": self.count(),
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "writes": self.writes,
+            "mean_bytes": self.bytes_written / self.writes if self.writes else 0.0,
+        }
+
+
+class MemorySessionStore(SessionStore):
+    """Sessions en mémoire du processus, les moins récemment écrites évincées au-delà de max_sessions."""
+
+    backend = "memory"
+
+    def __init__(self, ttl: Optional[float] = None, max_sessions: int = 10_000):
+        super().__init__(ttl)
+        self.max_sessions = max_sessions
+        # session_id -> (blob, expires_at), dans l'ordre des écritures
+        self._sessions: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, session_id: str, now: float) -> Optional[bytes]:
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return None
+            if entry[1] < now:
+                del self._sessions[session_id]
+                return None
+            return entry[0]
+
+    def _put(self, session_id: str, blob: bytes, expires_at: float) -> None:
+        with self._lock:
+            self._sessions[session_id] = (blob, expires_at)
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def purge_expired(self) -> int:
+        now = time.time()
+        with self._lock:
+            # Ordre des écritures = ordre des expirations (TTL fixe)
+            expired = 0
+            while self._sessions and next(iter(self._sessions.values()))[1] < now:
+                self._sessions.popitem(last=False)
+                expired += 1
+            return expired
+
+    def count(self) -> int:
+        with self._lock:
+            return len(self._sessions)
+
+
+class SQLiteSessionStore(SessionStore):
+    """Sessions dans un fichier SQLite (WAL), partagé entre processus."""
+
+    backend = "sqlite"
+
+    def __init__(
+        self,
+        path: str = DEFAULT_SQLITE_PATH,
+        ttl: Optional[float] = None,
+        purge_every: int = 256,
+    ):
+        """
+        Args:
+            path: Fichier SQLite
+            ttl: Inactivité max d'une session en secondes
+            purge_every: Purge des sessions expirées toutes les N écritures
+        """
+        super().__init__(ttl)
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.purge_every = purge_every
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=10)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS sessions (
+                session_id TEXT PRIMARY KEY,
+                data BLOB NOT NULL,
+                expires_at REAL NOT NULL
+            )"""
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_sessions_expires ON sessions(expires_at)"
+        )
+        self._conn.commit()
+
+    def _get(self, session_id: str, now: float) -> Optional[bytes]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM sessions WHERE session_id = ? AND expires_at >= ?",
+                (session_id, now),
+            ).fetchone()
+        return row[0] if row else None
+
+    def _put(self, session_id: str, blob: bytes, expires_at: float) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sessions (session_id, data, expires_at) VALUES (?, ?, ?)",
+                (session_id, blob, expires_at),
+            )
+            self._conn.commit()
+        if self.purge_every and (self.writes + 1) % self.purge_every == 0:
+            self.purge_expired()
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+            self._conn.commit()
+            return cursor.rowcount > 0
+
+    def purge_expired(self) -> int:
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM sessions WHERE expires_at < ?", (time.time(),))
+            self._conn.commit()
+            return cursor.rowcount
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM sessions WHERE expires_at >= ?", (time.time(),)
+            ).fetchone()[0]
+
+    def get_stats(self) -> Dict:
+        return {**super().get_stats(), "path": str(self.path)}
+
+
+def create_session_store(
+    backend: Optional[str] = None, path: Optional[str] = None, ttl: Optional[float] = None
+) -> SessionStore:
+    """
+    Store configuré par SESSION_STORE ("memory" par défaut), SESSION_STORE_PATH
+    et SESSION_TTL.
+    """
+    backend = (backend or os.getenv("SESSION_STORE") or "memory").lower()
+    if ttl is None and os.getenv("SESSION_TTL"):
+        ttl = float(os.getenv("SESSION_TTL"))
+
+    if backend == "memory":
+        return MemorySessionStore(ttl=ttl)
+    if backend == "sqlite":
+        return SQLiteSessionStore(path or os.getenv("SESSION_STORE_PATH", DEFAULT_SQLITE_PATH), ttl=ttl)
+    raise ValueError(f"Backend de sessions inconnu: {backend}. Disponibles: {STORE_BACKENDS}")
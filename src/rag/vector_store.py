@@ -1,15 +1,16 @@
 """
 Vector Store - Gestion de la base vectorielle ChromaDB
+
+chromadb, le chargeur de documents et l'ingestion sont importés à l'usage :
+un appelant qui n'a besoin que de RAGRetriever ne les charge pas.
 """
 
 import os
-import chromadb
-from chromadb.config import Settings
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Union
 from .embeddings import EmbeddingProvider
+from ..monitoring.tracing import span
 from pathlib import Path
 import json
-from .document_loader import DocumentLoader
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -17,6 +18,8 @@ load_dotenv()
 _DEFAULT_EMBEDDING_MODEL = os.getenv(
     "EMBEDDING_MODEL", "paraphrase-multilingual-MiniLM-L12-v2"
 )
+# Cache disque des embeddings (désactivé si vide)
+_DEFAULT_EMBEDDING_CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR") or None
 
 
 class VectorStore:
@@ -27,26 +30,36 @@ class VectorStore:
         persist_directory: str = "data/vector_db",
         collection_name: str = "triage_medical",
         embedding_model: str = _DEFAULT_EMBEDDING_MODEL,
+        embedding_cache_dir: Optional[str] = _DEFAULT_EMBEDDING_CACHE_DIR,
+        embedding_provider: Optional[EmbeddingProvider] = None,
     ):
         """
         Args:
             persist_directory: Dossier de persistance ChromaDB
             collection_name: Nom de la collection
             embedding_model: Modèle d'embeddings (français supporté)
+            embedding_cache_dir: Dossier du cache disque des embeddings (None = désactivé)
+            embedding_provider: EmbeddingProvider déjà chargé à réutiliser
         """
         self.persist_directory = Path(persist_directory)
         self.persist_directory.mkdir(parents=True, exist_ok=True)
 
+        import chromadb
+        from chromadb.config import Settings
+
         # Initialiser ChromaDB avec persistance
         self.client = chromadb.PersistentClient(
             path=str(self.persist_directory),
             settings=Settings(anonymized_telemetry=False, allow_reset=True),
         )
 
-        # Charger le modele d'embeddings via EmbeddingProvider
-        print(f"[INFO] Chargement modele embeddings: {embedding_model}")
-        self.embedding_model = EmbeddingProvider(model_name=embedding_model)
-        print("[OK] Modele charge")
+        # Modele d'embeddings via EmbeddingProvider, charge au premier encodage
+        # (jamais en mode lexical)
+        if embedding_provider is None:
+            embedding_provider = EmbeddingProvider(
+                model_name=embedding_model, cache_dir=embedding_cache_dir
+            )
+        self.embedding_model = embedding_provider
 
         # Créer ou récupérer collection
         self.collection_name = collection_name
@@ -70,49 +83,41 @@ class VectorStore:
 
         return collection
 
-    def add_documents(self, chunks: List[Dict]) -> None:
+    def add_documents(self, chunks: List[Dict], verbose: bool = True) -> None:
         """
         Ajoute des documents (chunks) à la collection.
 
         Args:
             chunks: Liste de dicts {content, metadata}
+            verbose: Afficher la progression (désactivé par le pipeline d'ingestion)
         """
         if not chunks:
-            print("[WARN] Aucun chunk a ajouter")
+            if verbose:
+                print("[WARN] Aucun chunk a ajouter")
             return
 
-        print(f"\n[INFO] Indexation de {len(chunks)} chunks...")
+        if verbose:
+            print(f"\n[INFO] Indexation de {len(chunks)} chunks...")
 
-        # Préparer les données
-        documents = []
-        metadatas = []
-        ids = []
+        from .document_loader import prepare_chunks
 
-        for i, chunk in enumerate(chunks):
-            documents.append(chunk.get("content") or chunk.get("text", ""))
-
-            # ChromaDB nécessite metadata en dict simple (pas de nested)
-            metadata = {
-                "source": chunk["metadata"].get("source", "unknown"),
-                "title": chunk["metadata"].get("title", "unknown"),
-                "section": chunk["metadata"].get("section", "unknown"),
-                "chunk_id": chunk["metadata"].get("chunk_id", f"chunk_{i}"),
-            }
-            metadatas.append(metadata)
-            ids.append(f"doc_{i}")
+        documents, metadatas, ids = prepare_chunks(chunks)
 
         # Generer embeddings
-        print("[INFO] Generation des embeddings...")
+        if verbose:
+            print("[INFO] Generation des embeddings...")
         embeddings = self.embedding_model.embed_batch(documents)
 
-        # Ajouter a ChromaDB
-        print("[INFO] Ajout a ChromaDB...")
-        self.collection.add(
+        # Ajouter a ChromaDB (upsert : ids stables dérivés du contenu)
+        if verbose:
+            print("[INFO] Ajout a ChromaDB...")
+        self.collection.upsert(
             embeddings=embeddings, documents=documents, metadatas=metadatas, ids=ids
         )
 
-        print(f"[OK] {len(chunks)} chunks indexes")
-        print(f"[INFO] Total collection : {self.collection.count()} documents")
+        if verbose:
+            print(f"[OK] {len(chunks)} chunks indexes")
+            print(f"[INFO] Total collection : {self.collection.count()} documents")
 
     def search(
         self, query: str, n_results: int = 5, filter_metadata: Optional[Dict] = None
@@ -128,28 +133,102 @@ class VectorStore:
         Returns:
             Liste de résultats avec scores
         """
-        # Générer embedding de la query
-        query_embedding = self.embedding_model.embed_text(query)
+        with span("vector.search", backend="chroma", queries=1, top_k=n_results):
+            # Générer embedding de la query
+            query_embedding = self.embedding_model.embed_text(query)
 
-        # Rechercher
-        results = self.collection.query(
-            query_embeddings=[query_embedding], n_results=n_results, where=filter_metadata
-        )
+            # Rechercher
+            results = self.collection.query(
+                query_embeddings=[query_embedding], n_results=n_results, where=filter_metadata
+            )
+
+            return self._format_results(results, 0)
+
+    def search_many(
+        self,
+        queries: List[str],
+        n_results: int = 5,
+        filters: Optional[Union[Dict, List[Optional[Dict]]]] = None,
+    ) -> List[List[Dict]]:
+        """
+        Recherche sémantique pour plusieurs requêtes à la fois.
+
+        Toutes les requêtes sont encodées en un seul embed_batch, puis envoyées
+        dans un seul collection.query (une requête par filtre distinct).
 
-        # Formater résultats
+        Args:
+            queries: Liste de requêtes
+            n_results: Nombre de résultats par requête
+            filters: Filtre commun à toutes les requêtes, ou liste de filtres
+                (un par requête)
+
+        Returns:
+            Liste de résultats par requête, dans l'ordre des requêtes
+        """
+        if not queries:
+            return []
+
+        if isinstance(filters, list):
+            if len(filters) != len(queries):
+                raise ValueError("filters doit contenir un filtre par requête")
+            per_query_filters = filters
+        else:
+            per_query_filters = [filters] * len(queries)
+
+        with span("vector.search", backend="chroma", queries=len(queries), top_k=n_results):
+            query_embeddings = self.embedding_model.embed_batch(list(queries))
+
+            # Chroma n'accepte qu'un filtre par appel : regrouper par filtre identique
+            groups: Dict[str, List[int]] = {}
+            for i, where in enumerate(per_query_filters):
+                groups.setdefault(json.dumps(where, sort_keys=True), []).append(i)
+
+            all_results: List[List[Dict]] = [[] for _ in queries]
+            for indices in groups.values():
+                results = self.collection.query(
+                    query_embeddings=[query_embeddings[i] for i in indices],
+                    n_results=n_results,
+                    where=per_query_filters[indices[0]],
+                )
+                for pos, i in enumerate(indices):
+                    all_results[i] = self._format_results(results, pos)
+
+            return all_results
+
+    @staticmethod
+    def _format_results(results: Dict, query_index: int) -> List[Dict]:
+        """Formate les résultats ChromaDB d'une requête."""
         formatted_results = []
-        for i in range(len(results["documents"][0])):
+        for i in range(len(results["documents"][query_index])):
             formatted_results.append(
                 {
-                    "content": results["documents"][0][i],
-                    "metadata": results["metadatas"][0][i],
-                    "distance": results["distances"][0][i],
-                    "id": results["ids"][0][i],
+                    "content": results["documents"][query_index][i],
+                    "metadata": results["metadatas"][query_index][i],
+                    "distance": results["distances"][query_index][i],
+                    "id": results["ids"][query_index][i],
                 }
             )
 
         return formatted_results
 
+    def get_all_ids(self) -> List[str]:
+        """Liste les ids de tous les documents indexés."""
+        return list(self.collection.get(include=[])["ids"])
+
+    def get_documents(self) -> Dict[str, List]:
+        """Tous les chunks indexés : {ids, documents, metadatas}."""
+        data = self.collection.get(include=["documents", "metadatas"])
+        return {
+            "ids": list(data["ids"]),
+            "documents": list(data["documents"]),
+            "metadatas": [dict(m or {}) for m in data["metadatas"]],
+        }
+
+    def delete_documents(self, ids: List[str]) -> None:
+        """Supprime des documents par id."""
+        if ids:
+            self.collection.delete(ids=list(ids))
+
     def clear_collection(self) -> None:
         """Vide completement la collection."""
         print(f"[INFO] Suppression collection '{self.collection_name}'...")
@@ -165,18 +244,82 @@ class VectorStore:
             "total_documents": count,
             "collection_name": self.collection_name,
             "persist_directory": str(self.persist_directory),
+            "backend": "chroma",
+            "embedding_cache": self.embedding_model.get_cache_stats(),
         }
 
+    def count(self) -> int:
+        """Nombre de documents indexés."""
+        return self.collection.count()
+
+
+RETRIEVAL_MODES = ("dense", "hybrid", "lexical", "auto")
+
+# Constante de la fusion par rangs réciproques (valeur usuelle)
+RRF_K = 60
+
 
 class RAGRetriever:
-    """Retriever pour récupérer contexte pertinent."""
+    """
+    Retriever pour récupérer contexte pertinent.
+
+    Modes (RAG_RETRIEVAL_MODE) :
+    - "dense" : recherche par embeddings seule (défaut)
+    - "hybrid" : embeddings + BM25 (LexicalIndex), fusion par rangs réciproques
+    - "lexical" : BM25 seul, le modèle d'embeddings n'est jamais chargé
+      (EmbeddingProvider le charge au premier encodage)
+    - "auto" : BM25 seul quand les termes de la requête sont tous (ou presque)
+      retrouvés dans le meilleur chunk, hybride sinon
+    """
 
-    def __init__(self, vector_store: VectorStore):
+    def __init__(
+        self,
+        vector_store: VectorStore,
+        mode: Optional[str] = None,
+        lexical_index=None,
+        lexical_threshold: Optional[float] = None,
+    ):
         """
         Args:
             vector_store: Instance de VectorStore
+            mode: "dense", "hybrid", "lexical" ou "auto" (défaut: RAG_RETRIEVAL_MODE, sinon dense)
+            lexical_index: LexicalIndex à utiliser (défaut: celui stocké avec la base,
+                sinon construit en mémoire depuis vector_store)
+            lexical_threshold: Couverture BM25 minimale pour servir une requête sans
+                embeddings en mode auto (défaut: RAG_LEXICAL_THRESHOLD, sinon 0.8)
         """
         self.vector_store = vector_store
+        self.mode = (mode or os.getenv("RAG_RETRIEVAL_MODE", "dense")).lower()
+        if self.mode not in RETRIEVAL_MODES:
+            raise ValueError(
+                f"Mode '{self.mode}' non supporté. Disponibles: {list(RETRIEVAL_MODES)}"
+            )
+        if lexical_threshold is None:
+            lexical_threshold = float(os.getenv("RAG_LEXICAL_THRESHOLD", "0.8"))
+        self.lexical_threshold = lexical_threshold
+
+        self.lexical_index = lexical_index
+        if self.mode != "dense" and self.lexical_index is None:
+            self.lexical_index = self._load_lexical_index()
+
+        # Requêtes servies par BM25 seul / passées par le modèle d'embeddings
+        self.lexical_only = 0
+        self.dense_queries = 0
+
+    def _load_lexical_index(self):
+        """Index lexical stocké avec la base, sinon construit depuis ses chunks."""
+        from .lexical_index import LexicalIndex
+
+        persist_directory = getattr(self.vector_store, "persist_directory", None)
+        if persist_directory:
+            # Backend numpy : index stocké dans le dossier parent (celui de ChromaDB)
+            for directory in (Path(persist_directory), Path(persist_directory).parent):
+                index = LexicalIndex.load(str(directory))
+                if index is not None:
+                    return index
+
+        print("[INFO] Index lexical absent : construction en memoire")
+        return LexicalIndex.from_store(self.vector_store)
 
     def retrieve_context(
         self, query: str, top_k: int = 3, filter_by_document: Optional[str] = None
@@ -198,10 +341,97 @@ class RAGRetriever:
             where_filter = {"title": filter_by_document}
 
         # Rechercher
-        results = self.vector_store.search(
-            query=query, n_results=top_k, filter_metadata=where_filter
-        )
+        results = self._search_many([query], top_k, where_filter)[0]
+
+        return self._format_context(results)
+
+    def retrieve_context_many(
+        self, queries: List[str], top_k: int = 3, filter_by_document: Optional[str] = None
+    ) -> List[str]:
+        """
+        Récupère le contexte pour plusieurs queries en un seul passage.
 
+        Args:
+            queries: Liste de questions
+            top_k: Nombre de chunks à récupérer par query
+            filter_by_document: Filtrer par document spécifique
+
+        Returns:
+            Liste de contextes formatés, dans l'ordre des queries
+        """
+        where_filter = {"title": filter_by_document} if filter_by_document else None
+
+        all_results = self._search_many(queries, top_k, where_filter)
+
+        return [self._format_context(results) for results in all_results]
+
+    def _search_many(
+        self, queries: List[str], top_k: int, where: Optional[Dict] = None
+    ) -> List[List[Dict]]:
+        """Résultats de chaque requête selon le mode (embeddings encodés en un seul lot)."""
+        if not queries:
+            return []
+        if self.mode == "dense":
+            self.dense_queries += len(queries)
+            return self._dense_search(queries, top_k, where)
+
+        # Candidats plus nombreux que top_k pour que la fusion ait de quoi départager
+        candidates = top_k if self.mode == "lexical" else max(top_k * 4, 10)
+        lexical = [self.lexical_index.search(q, n_results=candidates, where=where) for q in queries]
+        if self.mode == "lexical":
+            self.lexical_only += len(queries)
+            return lexical
+
+        all_results: List[Optional[List[Dict]]] = [None] * len(queries)
+        pending = []
+        for i, hits in enumerate(lexical):
+            if self.mode == "auto" and self._strong_match(hits, top_k):
+                all_results[i] = hits[:top_k]
+                self.lexical_only += 1
+            else:
+                pending.append(i)
+
+        if pending:
+            self.dense_queries += len(pending)
+            dense = self._dense_search([queries[i] for i in pending], candidates, where)
+            for i, dense_hits in zip(pending, dense):
+                all_results[i] = self._fuse(dense_hits, lexical[i], top_k)
+
+        return all_results
+
+    def _dense_search(
+        self, queries: List[str], n_results: int, where: Optional[Dict]
+    ) -> List[List[Dict]]:
+        if len(queries) == 1:
+            return [
+                self.vector_store.search(
+                    query=queries[0], n_results=n_results, filter_metadata=where
+                )
+            ]
+        return self.vector_store.search_many(queries=queries, n_results=n_results, filters=where)
+
+    def _strong_match(self, hits: List[Dict], top_k: int) -> bool:
+        """Assez de chunks trouvés et le meilleur couvre les termes de la requête."""
+        return len(hits) >= top_k and hits[0]["coverage"] >= self.lexical_threshold
+
+    @staticmethod
+    def _fuse(dense: List[Dict], lexical: List[Dict], top_k: int) -> List[Dict]:
+        """Fusion par rangs réciproques : score = somme des 1 / (RRF_K + rang)."""
+        fused: Dict[str, Dict] = {}
+        for results in (dense, lexical):
+            for rank, result in enumerate(results, 1):
+                entry = fused.get(result["id"])
+                if entry is None:
+                    entry = fused[result["id"]] = {**result, "rrf_score": 0.0}
+                else:
+                    entry.update({k: v for k, v in result.items() if k not in entry})
+                entry["rrf_score"] += 1.0 / (RRF_K + rank)
+
+        return sorted(fused.values(), key=lambda r: r["rrf_score"], reverse=True)[:top_k]
+
+    @staticmethod
+    def _format_context(results: List[Dict]) -> str:
+        """Formate une liste de résultats en contexte pour le LLM."""
         if not results:
             return "Aucun contexte trouvé."
 
@@ -223,57 +453,268 @@ class RAGRetriever:
         Returns:
             Liste de {content, metadata, score}
         """
-        results = self.vector_store.search(query, n_results=top_k)
+        results = self._search_many([query], top_k)[0]
 
-        # Convertir distance en score (plus proche = meilleur)
+        # Score 0-1 (1 = parfait) selon la recherche qui a produit les résultats
         for result in results:
-            # Distance L2 : plus petit = meilleur
-            # Convertir en score 0-1 (1 = parfait)
-            result["relevance_score"] = 1 / (1 + result["distance"])
+            if "rrf_score" in result:
+                # Premier rang des deux classements = 1
+                result["relevance_score"] = result["rrf_score"] * (RRF_K + 1) / 2
+            elif "coverage" in result:
+                result["relevance_score"] = result["coverage"]
+            else:
+                # Distance L2 : plus petit = meilleur
+                result["relevance_score"] = 1 / (1 + result["distance"])
 
         return results
 
+    def get_stats(self) -> Dict:
+        return {
+            "mode": self.mode,
+            "lexical_threshold": self.lexical_threshold,
+            "lexical_only": self.lexical_only,
+            "dense_queries": self.dense_queries,
+            "lexical_index": self.lexical_index.get_stats() if self.lexical_index else None,
+        }
+
+
+def load_vector_store(
+    backend: Optional[str] = None,
+    persist_directory: str = "data/vector_db",
+    collection_name: str = "triage_medical",
+    **kwargs,
+):
+    """
+    Charge la base vectorielle avec le backend demandé.
+
+    Args:
+        backend: "chroma" (défaut) ou "numpy" (recherche exacte en mémoire).
+            Par défaut : variable d'environnement VECTOR_STORE_BACKEND.
+        persist_directory: Dossier de persistance ChromaDB
+        collection_name: Nom de la collection
+        **kwargs: Paramètres transmis au constructeur (embedding_model, ...)
+
+    Returns:
+        VectorStore ou NumpyVectorStore (même interface search / add_documents / get_stats)
+    """
+    backend = (backend or os.getenv("VECTOR_STORE_BACKEND", "chroma")).lower()
+
+    if backend == "chroma":
+        return VectorStore(
+            persist_directory=persist_directory, collection_name=collection_name, **kwargs
+        )
+
+    if backend == "numpy":
+        from .numpy_store import NumpyVectorStore
+        from .protocol_contexts import index_fingerprint
+
+        # La copie numpy est liée à une version du manifeste d'indexation
+        fingerprint = index_fingerprint(persist_directory)
+        numpy_dir = Path(persist_directory) / "numpy"
+        if (numpy_dir / collection_name).exists():
+            store = NumpyVectorStore(
+                persist_directory=str(numpy_dir), collection_name=collection_name, **kwargs
+            )
+            if store.fingerprint == fingerprint:
+                return store
+            print("[INFO] Index numpy obsolete (index reconstruit) : re-export depuis ChromaDB")
+            kwargs = {**kwargs, "embedding_provider": store.embedding_model}
+
+        # Première utilisation ou réindexation : export depuis ChromaDB (sans ré-encoder)
+        chroma_store = VectorStore(
+            persist_directory=persist_directory, collection_name=collection_name, **kwargs
+        )
+        return NumpyVectorStore.from_chroma(
+            chroma_store, persist_directory=str(numpy_dir), fingerprint=fingerprint
+        )
+
+    raise ValueError(f"Backend '{backend}' non supporté. Disponibles: ['chroma', 'numpy']")
+
 
 def build_vector_store(
     documents_dir: str = "data/rag_document",
     persist_dir: str = "data/vector_db",
     force_rebuild: bool = False,
+    workers: Optional[int] = None,
+    batch_size: int = 64,
+    protocol_contexts: bool = True,
+    lexical_index: bool = True,
 ) -> VectorStore:
     """
-    Construit la vector store complète.
+    Construit ou met à jour la vector store de façon incrémentale.
+
+    Chaque fichier source est identifié par l'empreinte de son contenu
+    (manifeste `index_manifest.json` dans persist_dir) : seuls les fichiers
+    nouveaux ou modifiés sont relus, et seuls leurs chunks nouveaux sont
+    encodés. Les chunks des fichiers supprimés ou modifiés sont retirés ;
+    ceux ajoutés hors manifeste (src.rag.ingestion) ne sont pas touchés.
+
+    Les fichiers modifiés sont parsés dans un pool de processus et leurs
+    chunks indexés par micro-batches au fil du parsing.
 
     Args:
         documents_dir: Dossier des documents markdown
         persist_dir: Dossier de persistance ChromaDB
-        force_rebuild: Si True, reconstruit même si existe
+        force_rebuild: Si True, vide la collection et réindexe tout
+        workers: Processus de parsing (None = nb de CPU, 1 = séquentiel)
+        batch_size: Taille des micro-batches d'embeddings
+        protocol_contexts: Précalculer les contextes de protocole du predictor
+            (protocol_contexts.json) si l'index a changé
+        lexical_index: Construire l'index BM25 des chunks (lexical_index.json)
+            si l'index a changé
 
     Returns:
         VectorStore initialisée
     """
+    from .document_loader import DocumentLoader
+    from .ingestion import ingest_chunks
 
     vector_store = VectorStore(persist_directory=persist_dir)
+    manifest_path = Path(persist_dir) / "index_manifest.json"
 
-    # Si deja des documents et pas force_rebuild, ne rien faire
-    if vector_store.collection.count() > 0 and not force_rebuild:
-        print("[OK] Vector store deja initialisee")
-        stats = vector_store.get_stats()
-        print(f"[INFO] {stats['total_documents']} documents indexes")
-        return vector_store
-
-    # Sinon, charger et indexer
     if force_rebuild:
         vector_store.clear_collection()
+        manifest = {}
+    else:
+        manifest = _load_manifest(manifest_path)
 
-    print("\n[INFO] Chargement des documents...")
+    print("\n[INFO] Analyse des documents...")
     loader = DocumentLoader(chunk_size=800, chunk_overlap=150)
-    documents = loader.load_from_directory(documents_dir)
-    chunks = loader.chunk_documents(documents)
+    docs_dir = Path(documents_dir)
+
+    existing_ids = set(vector_store.get_all_ids())
+    expected_ids = set()
+    new_manifest = {}
+    changed = {}
+
+    for file_path in sorted(loader.list_files(documents_dir)):
+        file_key = file_path.relative_to(docs_dir).as_posix()
+        file_hash = DocumentLoader.fingerprint_file(str(file_path))
+        entry = manifest.get(file_key)
+
+        # Fichier inchangé et déjà indexé : rien à relire
+        if entry and entry["file_hash"] == file_hash and set(entry["chunk_ids"]) <= existing_ids:
+            new_manifest[file_key] = entry
+            expected_ids.update(entry["chunk_ids"])
+            continue
+
+        changed[file_path] = (file_key, file_hash)
+
+    print(
+        f"[INFO] {len(new_manifest)} fichier(s) inchange(s), "
+        f"{len(changed)} fichier(s) a (re)lire"
+    )
+
+    # Sources indexées par `python -m src.rag.ingestion` : conservées telles quelles
+    for key, entry in manifest.items():
+        if entry.get("origin") == "ingestion":
+            new_manifest[key] = entry
+            expected_ids.update(entry["chunk_ids"])
+
+    def new_chunks():
+        for file_path, documents in loader.iter_load_files(list(changed), workers):
+            file_key, file_hash = changed[file_path]
+            chunks = loader.chunk_documents(documents)
+            for chunk in chunks:
+                chunk["metadata"]["file_key"] = file_key
+                chunk["id"] = DocumentLoader.chunk_id(file_key, chunk["text"])
+
+            chunk_ids = list(dict.fromkeys(chunk["id"] for chunk in chunks))
+            new_manifest[file_key] = {"file_hash": file_hash, "chunk_ids": chunk_ids}
+            expected_ids.update(chunk_ids)
+            yield from (chunk for chunk in chunks if chunk["id"] not in existing_ids)
+
+    if changed:
+        print("\n[INFO] Indexation dans ChromaDB...")
+        stats = ingest_chunks(
+            vector_store,
+            new_chunks(),
+            batch_size=batch_size,
+            progress_callback=lambda s: print(f"[INFO] {s['chunks']} chunks indexes..."),
+        )
+        print(f"[OK] {stats['chunks']} chunk(s) indexe(s) en {stats['elapsed']:.1f}s")
+
+    # Chunks obsolètes : fichiers supprimés, passages modifiés, anciens ids positionnels.
+    # Un chunk à id de contenu absent du manifeste (ajouté hors de cette fonction)
+    # ne lui appartient pas et est conservé.
+    owned_ids = {chunk_id for entry in manifest.values() for chunk_id in entry["chunk_ids"]}
+    stale_ids = {
+        chunk_id
+        for chunk_id in existing_ids - expected_ids
+        if chunk_id in owned_ids or not chunk_id.startswith("chunk_")
+    }
+    if stale_ids:
+        print(f"[INFO] Suppression de {len(stale_ids)} chunk(s) obsolete(s)")
+        vector_store.delete_documents(sorted(stale_ids))
+
+    _save_manifest(manifest_path, new_manifest)
+
+    # Index lexical BM25, lié à cette version de l'index (avant les contextes,
+    # qui peuvent être recherchés en mode hybride)
+    if lexical_index:
+        from .lexical_index import LexicalIndex, build_lexical_index
+
+        if changed or stale_ids or LexicalIndex.load(persist_dir) is None:
+            build_lexical_index(vector_store, persist_dir)
+
+    # Contextes de protocole du predictor, liés à cette version de l'index
+    if protocol_contexts:
+        from .protocol_contexts import ProtocolContexts, build_protocol_contexts
+
+        if changed or stale_ids or ProtocolContexts.load(persist_dir) is None:
+            try:
+                build_protocol_contexts(RAGRetriever(vector_store), persist_dir)
+            except Exception as e:
+                print(f"[WARN] Contextes de protocole non precalcules ({e})")
+
+    print(f"\n[OK] Vector store prete ! ({vector_store.count()} documents)")
+    return vector_store
 
-    print("\n[INFO] Indexation dans ChromaDB...")
-    vector_store.add_documents(chunks)
 
-    print("\n[OK] Vector store prete !")
-    return vector_store
+def register_ingested_chunks(persist_dir: str, chunk_ids_by_source: Dict[str, List[str]]) -> None:
+    """
+    Inscrit dans le manifeste d'indexation les chunks indexés hors de
+    build_vector_store (src.rag.ingestion), pour qu'il ne les supprime pas et
+    que les index dérivés (lexical, contextes, copie numpy) soient reconstruits.
+
+    Args:
+        persist_dir: Dossier de l'index (emplacement du manifeste)
+        chunk_ids_by_source: Source (fichier ou dataset) -> ids des chunks indexés
+    """
+    from .document_loader import DocumentLoader
+
+    manifest_path = Path(persist_dir) / "index_manifest.json"
+    manifest = _load_manifest(manifest_path)
+    for source, chunk_ids in chunk_ids_by_source.items():
+        key = f"ingestion:{source}"
+        # Ingestion additive (upsert) : les ids déjà inscrits restent dans la collection
+        previous = manifest.get(key, {}).get("chunk_ids", [])
+        manifest[key] = {
+            "file_hash": (
+                DocumentLoader.fingerprint_file(source) if Path(source).is_file() else None
+            ),
+            "chunk_ids": list(dict.fromkeys(previous + list(chunk_ids))),
+            "origin": "ingestion",
+        }
+    _save_manifest(manifest_path, manifest)
+
+
+def _load_manifest(manifest_path: Path) -> Dict:
+    """Charge le manifeste d'indexation (empreintes des fichiers sources)."""
+    if not manifest_path.exists():
+        return {}
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+def _save_manifest(manifest_path: Path, manifest: Dict) -> None:
+    """Sauvegarde le manifeste d'indexation."""
+    manifest_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
 
 
 if __name__ == "__main__":
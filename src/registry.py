@@ -0,0 +1,382 @@
+"""
+Registre des modèles et index, partagé par tout le processus.
+
+Chaque modèle d'embeddings, base vectorielle et modèle ML est chargé une
+seule fois par processus, identifié par (type, nom, version), puis partagé
+en lecture seule entre toutes les sessions (Streamlit, service, batchs).
+La version des ressources sur disque dérive du fichier (mtime + taille du
+modèle, du manifeste de l'index) : un modèle ré-entraîné ou un index
+reconstruit par build_vector_store est rechargé au prochain accès.
+
+Usage:
+    registry = get_registry()
+    registry.warm_up(background=True)        # au démarrage du serveur
+    predictor = registry.predictor()          # handle partagé
+    print(registry.memory_report())
+"""
+
+import os
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+ROOT_DIR = Path(__file__).parent.parent
+DEFAULT_VECTOR_DB = ROOT_DIR / "data" / "vector_db"
+DEFAULT_MODEL_PATH = ROOT_DIR / "data" / "models" / "random_forest_v2.pkl"
+
+# Composants chargés par warm_up() par défaut (surchargeable par REGISTRY_WARMUP)
+WARMUP_COMPONENTS = ("embeddings", "vector_store", "predictor")
+
+
+def _file_version(path: Path) -> str:
+    """Version d'une ressource disque : mtime + taille du fichier."""
+    path = Path(path)
+    if not path.is_file():
+        return "absent"
+    stat = path.stat()
+    return f"{int(stat.st_mtime)}-{stat.st_size}"
+
+
+def _rss_mb() -> Optional[float]:
+    """Mémoire résidente du processus (MB), None si indisponible."""
+    try:
+        import psutil
+
+        return psutil.Process().memory_info().rss / 1e6
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _estimate_mb(obj, _seen: Optional[set] = None, _depth: int = 0) -> float:
+    """
+    Taille estimée des tableaux détenus par un objet (MB) : paramètres torch,
+    tableaux NumPy, arbres scikit-learn. Parcours borné des attributs.
+    """
+    seen = _seen if _seen is not None else set()
+    if id(obj) in seen or _depth > 10 or obj is None:
+        return 0.0
+    seen.add(id(obj))
+
+    # Modules torch (SentenceTransformer)
+    if hasattr(obj, "parameters") and hasattr(obj, "buffers"):
+        try:
+            tensors = list(obj.parameters()) + list(obj.buffers())
+            return sum(t.numel() * t.element_size() for t in tensors) / 1e6
+        except Exception:
+            pass
+
+    nbytes = getattr(obj, "nbytes", None)
+    if isinstance(nbytes, int):
+        return nbytes / 1e6
+
+    # Arbres scikit-learn (tree_ est une extension Cython sans __dict__)
+    if type(obj).__name__ == "Tree" and hasattr(obj, "__getstate__"):
+        state = obj.__getstate__()
+        return sum(getattr(v, "nbytes", 0) for v in state.values()) / 1e6
+
+    if isinstance(obj, dict):
+        children = obj.values()
+    elif isinstance(obj, (list, tuple)):
+        children = obj
+    elif hasattr(obj, "__dict__") and not isinstance(obj, type):
+        children = vars(obj).values()
+    else:
+        return 0.0
+
+    return sum(_estimate_mb(child, seen, _depth + 1) for child in children)
+
+
+class ModelRegistry:
+    """Chargement unique et partage thread-safe des modèles et index."""
+
+    def __init__(self):
+        self._entries: Dict[Tuple[str, str, str], Dict] = {}
+        self._key_locks: Dict[Tuple[str, str, str], threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._warmup_thread: Optional[threading.Thread] = None
+
+    # ------------------------------------------------------------------
+    # Cœur
+    # ------------------------------------------------------------------
+
+    def get_or_load(self, kind: str, name: str, version: str, loader: Callable[[], object]):
+        """
+        Retourne l'objet (kind, name, version), en le chargeant au premier accès.
+
+        Un verrou par clé : deux sessions demandant le même modèle attendent
+        un seul chargement, deux modèles différents se chargent en parallèle.
+        Les versions précédentes du même (kind, name) sont libérées.
+        """
+        key = (kind, name, version)
+        entry = self._entries.get(key)
+        if entry is not None:
+            entry["hits"] += 1
+            return entry["object"]
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry["hits"] += 1
+                return entry["object"]
+
+            rss_before = _rss_mb()
+            start = time.time()
+            obj = loader()
+            load_seconds = time.time() - start
+            rss_after = _rss_mb()
+
+            entry = {
+                "object": obj,
+                "kind": kind,
+                "name": name,
+                "version": version,
+                "loaded_at": datetime.now().isoformat(),
+                "load_seconds": load_seconds,
+                "rss_delta_mb": (
+                    rss_after - rss_before if rss_before is not None and rss_after is not None else None
+                ),
+                "hits": 0,
+            }
+
+            with self._lock:
+                stale = [k for k in self._entries if k[:2] == (kind, name) and k != key]
+                for old in stale:
+                    del self._entries[old]
+                    self._key_locks.pop(old, None)
+                self._entries[key] = entry
+
+            print(f"[OK] Registre : {kind} '{name}' charge en {load_seconds:.1f}s")
+            return obj
+
+    def evict(self, kind: Optional[str] = None, name: Optional[str] = None) -> int:
+        """Oublie les entrées correspondantes (toutes si aucun filtre), retourne leur nombre."""
+        with self._lock:
+            keys = [
+                k for k in self._entries
+                if (kind is None or k[0] == kind) and (name is None or k[1] == name)
+            ]
+            for key in keys:
+                del self._entries[key]
+                self._key_locks.pop(key, None)
+        return len(keys)
+
+    def is_loaded(self, kind: str, name: Optional[str] = None) -> bool:
+        return any(k[0] == kind and (name is None or k[1] == name) for k in list(self._entries))
+
+    # ------------------------------------------------------------------
+    # Ressources du projet
+    # ------------------------------------------------------------------
+
+    def embedding_provider(self, model_name: Optional[str] = None, cache_dir: Optional[str] = None):
+        """EmbeddingProvider partagé (un SentenceTransformer par modèle)."""
+        from src.rag.embeddings import EmbeddingProvider
+
+        model_name = model_name or os.getenv(
+            "EMBEDDING_MODEL", "paraphrase-multilingual-MiniLM-L12-v2"
+        )
+        cache_dir = cache_dir or os.getenv("EMBEDDING_CACHE_DIR") or None
+
+        return self.get_or_load(
+            "embeddings",
+            model_name,
+            "1",
+            lambda: EmbeddingProvider(model_name=model_name, cache_dir=cache_dir),
+        )
+
+    def _vector_store_key(
+        self,
+        persist_directory: Optional[str],
+        collection_name: str,
+        backend: Optional[str],
+    ) -> Tuple[str, str, str, str]:
+        """(backend, dossier, nom, version) d'une base vectorielle."""
+        persist_directory = str(persist_directory or DEFAULT_VECTOR_DB)
+        backend = (backend or os.getenv("VECTOR_STORE_BACKEND", "chroma")).lower()
+        # Le manifeste n'est réécrit que par build_vector_store (pas par les lectures)
+        version = _file_version(Path(persist_directory) / "index_manifest.json")
+        return backend, persist_directory, f"{backend}:{persist_directory}:{collection_name}", version
+
+    def vector_store(
+        self,
+        persist_directory: Optional[str] = None,
+        collection_name: str = "triage_medical",
+        backend: Optional[str] = None,
+        embedding_model: Optional[str] = None,
+    ):
+        """Base vectorielle partagée, rechargée si l'index a été reconstruit."""
+        from src.rag.vector_store import load_vector_store
+
+        backend, persist_directory, name, version = self._vector_store_key(
+            persist_directory, collection_name, backend
+        )
+
+        def load():
+            return load_vector_store(
+                backend=backend,
+                persist_directory=persist_directory,
+                collection_name=collection_name,
+                embedding_provider=self.embedding_provider(embedding_model),
+            )
+
+        return self.get_or_load("vector_store", name, version, load)
+
+    def retriever(
+        self,
+        persist_directory: Optional[str] = None,
+        collection_name: str = "triage_medical",
+        backend: Optional[str] = None,
+        embedding_model: Optional[str] = None,
+    ):
+        """RAGRetriever partagé sur la base vectorielle du registre."""
+        from src.rag.vector_store import RAGRetriever
+
+        store = self.vector_store(persist_directory, collection_name, backend, embedding_model)
+        _, _, name, version = self._vector_store_key(persist_directory, collection_name, backend)
+        return self.get_or_load(
+            "retriever", name, version, lambda: RAGRetriever(vector_store=store)
+        )
+
+    def predictor(self, model_path: Optional[str] = None, with_rag: bool = True):
+        """
+        MLTriagePredictor partagé (forêt chargée et compilée une fois).
+
+        Si with_rag et que la base vectorielle ne peut être chargée, retourne le
+        predictor sans RAG.
+        """
+        from src.rag.predictor import MLTriagePredictor
+
+        model_path = Path(model_path or DEFAULT_MODEL_PATH)
+        version = _file_version(model_path)
+
+        retriever = None
+        if with_rag:
+            try:
+                retriever = self.retriever()
+                version += "+" + self._vector_store_key(None, "triage_medical", None)[3]
+            except Exception as e:
+                print(f"[WARN] Registre : RAG indisponible ({e})")
+
+        name = f"{model_path}:{'rag' if retriever else 'ml'}"
+        return self.get_or_load(
+            "predictor",
+            name,
+            version,
+            lambda: MLTriagePredictor(model_path=str(model_path), rag_retriever=retriever),
+        )
+
+    # ------------------------------------------------------------------
+    # Démarrage et supervision
+    # ------------------------------------------------------------------
+
+    def warm_up(
+        self, components: Optional[Iterable[str]] = None, background: bool = False
+    ) -> Dict[str, float]:
+        """
+        Charge les composants avant la première requête.
+
+        Args:
+            components: Parmi "embeddings", "vector_store", "predictor"
+                (défaut: REGISTRY_WARMUP ou WARMUP_COMPONENTS)
+            background: Charger dans un thread (les accès concurrents attendent
+                le chargement en cours au lieu de le dupliquer)
+
+        Returns:
+            {composant: durée en secondes} (vide si background)
+        """
+        if components is None:
+            env = os.getenv("REGISTRY_WARMUP")
+            components = env.split(",") if env else WARMUP_COMPONENTS
+        components = [c.strip() for c in components if c.strip()]
+
+        if background:
+            with self._lock:
+                if self._warmup_thread is None or not self._warmup_thread.is_alive():
+                    self._warmup_thread = threading.Thread(
+                        target=self.warm_up, args=(components,), daemon=True
+                    )
+                    self._warmup_thread.start()
+            return {}
+
+        loaders = {
+            "embeddings": self.embedding_provider,
+            "vector_store": self.vector_store,
+            "predictor": self.predictor,
+        }
+        timings = {}
+        for component in components:
+            loader = loaders.get(component)
+            if loader is None:
+                print(f"[WARN] Registre : composant inconnu '{component}'")
+                continue
+            start = time.time()
+            try:
+                loader()
+            except Exception as e:
+                print(f"[WARN] Registre : echec du prechargement de {component} ({e})")
+                continue
+            timings[component] = time.time() - start
+        return timings
+
+    def memory_report(self) -> List[Dict]:
+        """
+        Une ligne par modèle résident : identité, chargement et mémoire.
+
+        Un tableau partagé n'est compté qu'une fois : le parcours ne descend pas
+        dans les autres entrées (le modèle d'embeddings d'une base vectorielle
+        est compté dans l'entrée "embeddings") et garde les objets déjà vus des
+        entrées précédentes, dans l'ordre de chargement.
+        """
+        entries = list(self._entries.items())
+        seen = {id(entry["object"]) for _, entry in entries}
+        report = []
+        for (kind, name, version), entry in entries:
+            seen.discard(id(entry["object"]))
+            estimated_mb = _estimate_mb(entry["object"], seen)
+            report.append(
+                {
+                    "kind": kind,
+                    "name": name,
+                    "version": version,
+                    "loaded_at": entry["loaded_at"],
+                    "load_seconds": round(entry["load_seconds"], 3),
+                    "estimated_mb": round(estimated_mb, 1),
+                    "rss_delta_mb": (
+                        round(entry["rss_delta_mb"], 1) if entry["rss_delta_mb"] is not None else None
+                    ),
+                    "hits": entry["hits"],
+                }
+            )
+        return report
+
+    def get_stats(self) -> Dict:
+        report = self.memory_report()
+        return {
+            "resident": len(report),
+            "estimated_mb": round(sum(r["estimated_mb"] for r in report), 1),
+            "process_rss_mb": _rss_mb(),
+            "warming_up": bool(self._warmup_thread and self._warmup_thread.is_alive()),
+        }
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> ModelRegistry:
+    """Récupère le registre global du processus."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = ModelRegistry()
+    return _registry
@@ -0,0 +1,7 @@
+"""
+Service HTTP de triage (ASGI). FastAPI et uvicorn ne sont importés que par
+src.service.api : `import src.service` ne charge aucune dépendance.
+
+Lancement:
+    python -m src.service.api --workers 4 --port 8000 --timeout 30 --session-store sqlite
+"""
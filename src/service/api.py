@@ -0,0 +1,328 @@
+"""
+API HTTP de triage (FastAPI, ASGI).
+
+Expose les tours de chat (TriageChatbotAPI), les prédictions
+(MLTriagePredictor), la recherche RAG (RAGRetriever) et les métriques, sans
+passer par Streamlit. Chaque worker uvicorn est un processus : modèles et
+index y sont chargés une fois au démarrage par le registre, puis partagés
+par toutes les requêtes. Les traitements (modèles, LLM) tournent dans le
+pool de threads du worker, sous un délai max par requête (504 au-delà ; le
+calcul en cours se termine en arrière-plan).
+
+Les conversations sont rechargées depuis un SessionStore à chaque requête
+(SESSION_STORE=sqlite : sessions partagées par les workers et conservées
+au redémarrage).
+
+Endpoints:
+    GET    /health                      état du worker
+    POST   /sessions                    nouvelle conversation
+    GET    /sessions/{id}               données collectées
+    DELETE /sessions/{id}
+    POST   /sessions/{id}/chat          tour de chat ({"message", "stream"})
+    POST   /sessions/{id}/predict       prédiction sur la conversation
+    POST   /predict                     prédiction sur un résumé patient
+    POST   /predict/batch               prédictions sur un lot de résumés
+    POST   /retrieve                    contexte RAG ({"query", "top_k"})
+    GET    /metrics                     métriques du worker
+
+Lancement:
+    python -m src.service.api --workers 4 --port 8000 --timeout 30 --session-store sqlite
+    uvicorn src.service.api:create_app --factory --workers 4
+"""
+
+import argparse
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional
+
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from starlette.concurrency import run_in_threadpool
+
+from ..monitoring.metrics_tracker import get_tracker
+from ..registry import get_registry
+from .sessions import ChatSessions
+
+DEFAULT_TIMEOUT = 30.0
+
+
+class ChatRequest(BaseModel):
+    message: str = Field(..., min_length=1, max_length=2000)
+    stream: bool = False
+
+
+class PatientSummary(BaseModel):
+    patient_info: Dict = Field(default_factory=dict)
+    symptoms: List[str] = Field(default_factory=list)
+    vitals: Dict[str, float] = Field(default_factory=dict)
+
+
+class BatchPredictRequest(BaseModel):
+    patients: List[PatientSummary] = Field(..., min_length=1, max_length=1000)
+
+
+class RetrieveRequest(BaseModel):
+    query: str = Field(..., min_length=1, max_length=2000)
+    top_k: int = Field(default=3, ge=1, le=20)
+
+
+def create_app(timeout: Optional[float] = None) -> FastAPI:
+    """
+    Application du worker (fabrique pour `uvicorn --factory`).
+
+    Args:
+        timeout: Délai max d'une requête en secondes (défaut: SERVICE_TIMEOUT, sinon 30)
+    """
+    timeout = timeout or float(os.getenv("SERVICE_TIMEOUT", DEFAULT_TIMEOUT))
+    registry = get_registry()
+    state = {"rag": False, "ready": False}
+
+    def load_models() -> None:
+        registry.warm_up()
+        try:
+            registry.retriever()
+            state["rag"] = True
+        except Exception as e:
+            print(f"[WARN] Service : RAG indisponible ({e})")
+        state["ready"] = True
+
+    def retriever():
+        return registry.retriever() if state["rag"] else None
+
+    def predictor():
+        return registry.predictor(with_rag=state["rag"])
+
+    def new_chatbot():
+        from ..rag.chatbot import TriageChatbotAPI
+
+        return TriageChatbotAPI(retriever=retriever())
+
+    sessions = ChatSessions(new_chatbot)
+
+    async def run(func, *args):
+        """Exécute func dans le pool de threads, sous le délai de la requête."""
+        try:
+            return await asyncio.wait_for(run_in_threadpool(func, *args), timeout)
+        except asyncio.TimeoutError:
+            raise HTTPException(status_code=504, detail=f"Delai depasse ({timeout:g}s)")
+
+    async def acquire(session_id: str):
+        """
+        (verrou, chatbot) de la session pour la requête : une requête à la fois
+        par conversation dans le worker, chatbot rechargé depuis le store.
+        """
+        lock = sessions.lock(session_id)
+        try:
+            await asyncio.wait_for(lock.acquire(), timeout)
+        except asyncio.TimeoutError:
+            raise HTTPException(status_code=409, detail="Session occupee par une autre requete")
+        try:
+            bot = await run(sessions.open, session_id)
+        except BaseException:
+            lock.release()
+            raise
+        if bot is None:
+            lock.release()
+            raise HTTPException(status_code=404, detail="Session inconnue ou expiree")
+        return lock, bot
+
+    async def finish(session_id: str, lock: asyncio.Lock, bot, save: bool = True) -> None:
+        """Réécrit l'état de la session, rend le chatbot au pool et libère la session."""
+        try:
+            if save:
+                await run_in_threadpool(sessions.save, session_id, bot)
+            sessions.release(bot)
+        finally:
+            lock.release()
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        start = time.time()
+        await run_in_threadpool(load_models)
+        print(f"[OK] Service pret (worker {os.getpid()}, {time.time() - start:.1f}s)")
+        yield
+
+    app = FastAPI(title="Triage des urgences", version="1.0.0", lifespan=lifespan)
+    app.state.sessions = sessions
+
+    @app.get("/health")
+    async def health():
+        return {
+            "status": "ok" if state["ready"] else "starting",
+            "worker": os.getpid(),
+            "rag": state["rag"],
+            "timeout_s": timeout,
+        }
+
+    # ------------------------------------------------------------------
+    # Chat
+    # ------------------------------------------------------------------
+
+    @app.post("/sessions", status_code=201)
+    async def create_session():
+        session_id, greeting = await run(sessions.create)
+        return {"session_id": session_id, "message": greeting}
+
+    @app.get("/sessions/{session_id}")
+    async def get_session(session_id: str):
+        lock, bot = await acquire(session_id)
+        try:
+            return {
+                "session_id": session_id,
+                "summary": bot.get_summary(),
+                "question_count": bot.data.get("question_count", 0),
+                "ready_for_prediction": bool(bot.is_ready_for_prediction()),
+            }
+        finally:
+            await finish(session_id, lock, bot, save=False)
+
+    @app.delete("/sessions/{session_id}", status_code=204)
+    async def delete_session(session_id: str):
+        if not await run(sessions.delete, session_id):
+            raise HTTPException(status_code=404, detail="Session inconnue ou expiree")
+
+    @app.post("/sessions/{session_id}/chat")
+    async def chat(session_id: str, request: ChatRequest):
+        lock, bot = await acquire(session_id)
+
+        # En cas d'échec ou de délai dépassé, l'état n'est pas réécrit et le
+        # chatbot n'est pas rendu au pool (son thread peut encore l'utiliser)
+        if not request.stream:
+            try:
+                response = await run(bot.chat, request.message)
+                ready = bool(bot.is_ready_for_prediction())
+            except BaseException:
+                lock.release()
+                raise
+            await finish(session_id, lock, bot)
+            return {"session_id": session_id, "response": response, "ready_for_prediction": ready}
+
+        # Streaming : le délai s'applique au premier fragment, le verrou dure tout le flux
+        fragments = bot.chat_stream(request.message)
+        try:
+            first = await run(next, fragments, "")
+        except BaseException:
+            lock.release()
+            raise
+
+        async def body():
+            try:
+                yield first
+                while True:
+                    fragment = await run_in_threadpool(next, fragments, None)
+                    if fragment is None:
+                        break
+                    yield fragment
+            finally:
+                try:
+                    # Client parti : la réponse partielle est gardée dans l'historique
+                    await run_in_threadpool(fragments.close)
+                except ValueError:
+                    # Flux encore en cours dans un thread : état abandonné
+                    lock.release()
+                else:
+                    await finish(session_id, lock, bot)
+
+        return StreamingResponse(
+            body(),
+            media_type="text/plain; charset=utf-8",
+            headers={"X-Session-Id": session_id},
+        )
+
+    @app.post("/sessions/{session_id}/predict")
+    async def predict_session(session_id: str):
+        lock, bot = await acquire(session_id)
+        try:
+            if not bot.is_ready_for_prediction():
+                raise HTTPException(
+                    status_code=409,
+                    detail="Donnees incompletes (age, sexe, symptomes et 5 constantes requis)",
+                )
+            summary = bot.get_summary()
+        finally:
+            await finish(session_id, lock, bot, save=False)
+        return await run(lambda: predictor().predict(summary))
+
+    # ------------------------------------------------------------------
+    # Prédiction, recherche, métriques
+    # ------------------------------------------------------------------
+
+    @app.post("/predict")
+    async def predict(request: PatientSummary):
+        summary = request.model_dump()
+        return await run(lambda: predictor().predict(summary))
+
+    @app.post("/predict/batch")
+    async def predict_batch(request: BatchPredictRequest):
+        summaries = [patient.model_dump() for patient in request.patients]
+        return {"predictions": await run(lambda: predictor().predict_batch(summaries))}
+
+    @app.post("/retrieve")
+    async def retrieve(request: RetrieveRequest):
+        if not state["rag"]:
+            raise HTTPException(status_code=503, detail="RAG indisponible sur ce worker")
+        context = await run(lambda: retriever().retrieve_context(request.query, request.top_k))
+        return {"query": request.query, "top_k": request.top_k, "context": context}
+
+    @app.get("/metrics")
+    async def metrics():
+        def collect():
+            tracker = get_tracker()
+            return {
+                "worker": os.getpid(),
+                "sessions": sessions.get_stats(),
+                "api": tracker.get_api_stats(),
+                "latency": tracker.get_latency_stats(),
+                "predictions": tracker.get_prediction_stats(),
+                "registry": registry.get_stats(),
+                "models": registry.memory_report(),
+            }
+
+        return await run(collect)
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Service HTTP de triage")
+    parser.add_argument("--host", default=os.getenv("SERVICE_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("SERVICE_PORT", "8000")))
+    parser.add_argument(
+        "--workers", type=int, default=int(os.getenv("SERVICE_WORKERS", "1")),
+        help="Processus workers (modèles chargés dans chacun)",
+    )
+    parser.add_argument(
+        "--timeout", type=float, default=float(os.getenv("SERVICE_TIMEOUT", DEFAULT_TIMEOUT)),
+        help="Délai max d'une requête (s)",
+    )
+    parser.add_argument(
+        "--session-store", choices=("memory", "sqlite"),
+        default=os.getenv("SESSION_STORE", "memory"), help="Stockage des sessions de chat",
+    )
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+
+    import uvicorn
+
+    if args.workers > 1 and args.session_store == "memory":
+        print("[WARN] Sessions en memoire propres a chaque worker : --session-store sqlite "
+              "pour les partager")
+
+    # Transmis aux workers (processus fils) par l'environnement
+    os.environ["SERVICE_TIMEOUT"] = str(args.timeout)
+    os.environ["SESSION_STORE"] = args.session_store
+    uvicorn.run(
+        "src.service.api:create_app",
+        factory=True,
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        log_level=args.log_level,
+    )
+
+
+if __name__ == "__main__":
+    main()
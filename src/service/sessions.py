@@ -0,0 +1,116 @@
+"""
+Sessions de chat du service HTTP, stockées hors du worker.
+
+L'état de chaque conversation vit dans un SessionStore
+(src.rag.session_store) : à chaque requête, un chatbot libre du worker
+recharge l'état, traite le tour, puis l'état est réécrit. Avec le backend
+SQLite, n'importe quel worker sert n'importe quelle session et les
+sessions survivent à un redémarrage. Dans un worker, un verrou par session
+sérialise les requêtes d'une même conversation ; entre workers, la
+dernière écriture l'emporte (un client envoie ses tours l'un après l'autre).
+"""
+
+import asyncio
+import threading
+import uuid
+import weakref
+from typing import Callable, Dict, List, Optional, Tuple
+
+from ..rag.session_store import SessionStore, create_session_store
+
+
+class ChatSessions:
+    """Accès aux sessions du store et chatbots réutilisables du worker."""
+
+    def __init__(
+        self,
+        factory: Callable[[], object],
+        store: Optional[SessionStore] = None,
+        pool_size: int = 32,
+        prefetch_wait: float = 2.0,
+    ):
+        """
+        Args:
+            factory: Crée un chatbot (appelé quand aucun n'est libre)
+            store: Stockage des sessions (défaut: create_session_store())
+            pool_size: Chatbots libres gardés par le worker
+            prefetch_wait: Attente max (s) de la recherche RAG anticipée d'un
+                tour avant d'enregistrer l'état (sinon refaite au tour suivant)
+        """
+        self.factory = factory
+        self.store = store or create_session_store()
+        self.pool_size = pool_size
+        self.prefetch_wait = prefetch_wait
+        self._idle: List = []
+        self._lock = threading.Lock()
+        # Verrou gardé tant qu'une requête le détient ou l'attend
+        self._session_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = (
+            weakref.WeakValueDictionary()
+        )
+        self.created = 0
+        self.chatbots = 0
+
+    def _checkout(self):
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+            self.chatbots += 1
+        return self.factory()
+
+    def release(self, chatbot) -> None:
+        """Rend un chatbot au pool (son état sera remplacé à la prochaine requête)."""
+        with self._lock:
+            if len(self._idle) < self.pool_size:
+                self._idle.append(chatbot)
+
+    def lock(self, session_id: str) -> asyncio.Lock:
+        """Verrou de la session dans ce worker (appelé depuis la boucle d'événements)."""
+        lock = self._session_locks.get(session_id)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._session_locks[session_id] = lock
+        return lock
+
+    def create(self) -> Tuple[str, str]:
+        """Nouvelle session : (identifiant, message d'accueil)."""
+        session_id = uuid.uuid4().hex
+        chatbot = self._checkout()
+        try:
+            chatbot.reset()
+            greeting = chatbot.start()
+            self.store.put(session_id, chatbot.export_state())
+        finally:
+            self.release(chatbot)
+        self.created += 1
+        return session_id, greeting
+
+    def open(self, session_id: str):
+        """Chatbot chargé avec l'état de la session, None si inconnue ou expirée."""
+        state = self.store.get(session_id)
+        if state is None:
+            return None
+        chatbot = self._checkout()
+        chatbot.load_state(state)
+        return chatbot
+
+    def save(self, session_id: str, chatbot) -> None:
+        """
+        Enregistre l'état de la session. Une recherche RAG lancée pendant le tour
+        (nouveaux symptômes, réponse sans LLM) est attendue pour être enregistrée
+        avec l'état : le tour suivant la retrouve et le chatbot revient au pool
+        sans recherche en cours.
+        """
+        self.store.put(session_id, chatbot.export_state(wait=self.prefetch_wait))
+
+    def delete(self, session_id: str) -> bool:
+        return self.store.delete(session_id)
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            idle = len(self._idle)
+        return {
+            "created": self.created,
+            "chatbots": self.chatbots,
+            "idle_chatbots": idle,
+            "store": self.store.get_stats(),
+        }
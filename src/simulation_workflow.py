@@ -16,8 +16,9 @@ from src.models.conversation import ConversationHistory
 class SimulationWorkflow:
     """Workflow : conversation intelligente + extraction ML."""
 
-    def __init__(self, llm_provider: BaseLLMProvider, max_turns: int = 10):
+    def __init__(self, llm_provider: BaseLLMProvider, max_turns: int = 10, verbose: bool = True):
         self.llm = llm_provider
+        self.verbose = verbose  # False pour les générations en parallèle (pas de stdout partagé)
         self.max_turns = max(max_turns, 8)  # Minimum 8 questions
         self.patient_generator = PatientGenerator(llm_provider)
         self.analyzer = ConversationAnalyzer(llm_provider)
@@ -35,11 +36,11 @@ class SimulationWorkflow:
         else:
             self.pathology = pathology
 
-        print(f"🎲 Pathologie : {self.pathology}\n")
+        self._print(f"🎲 Pathologie : {self.pathology}\n")
 
         # 2. Patient (AVEC constantes)
         self.original_patient = self.patient_generator.generate_from_description(self.pathology)
-        print(
+        self._print(
             f"👤 {self.original_patient.prenom} {self.original_patient.nom}, {self.original_patient.age} ans\n"
         )
 
@@ -49,19 +50,19 @@ class SimulationWorkflow:
         self.conversation = ConversationHistory()
 
         # 4. Plainte initiale
-        print("💬 Conversation :")
-        print("-" * 60)
+        self._print("💬 Conversation :")
+        self._print("-" * 60)
         initial = patient_sim.get_initial_complaint()
         self.conversation.add_assistant_message(initial)
-        print(f"🤒 {initial}\n")
+        self._print(f"🤒 {initial}\n")
 
         # 5. Questions INTELLIGENTES et PERTINENTES
         turn = 0
         basic_info_collected = {"age": False, "sexe": False}
 
         while turn < self.max_turns:
-            # Analyser ce qu'on a déjà
-            self.extracted_patient = self.analyzer.extract_patient_info(self.conversation)
+            # Analyser ce qu'on a déjà (seulement les nouveaux messages)
+            self.extracted_patient = self.analyzer.extract_incremental(self.conversation)
 
             # ⭐ LOGIQUE DE QUESTIONS AMÉLIORÉE
             question = None
@@ -91,12 +92,12 @@ class SimulationWorkflow:
 
             # Poser la question
             self.conversation.add_user_message(question)
-            print(f"👨‍⚕️ {question}")
+            self._print(f"👨‍⚕️ {question}")
 
             # Réponse patient
             response = patient_sim.respond(question)
             self.conversation.add_assistant_message(response)
-            print(f"🤒 {response}\n")
+            self._print(f"🤒 {response}\n")
 
             turn += 1
 
@@ -104,31 +105,31 @@ class SimulationWorkflow:
             if turn >= 6:  # Minimum 6 questions
                 completeness = self.analyzer.get_completeness_score(self.extracted_patient)
                 if completeness["score"] > 0.7:  # 70% d'infos
-                    print("[OK] Informations suffisantes collectees.")
+                    self._print("[OK] Informations suffisantes collectees.")
                     break
 
         # 6. L'infirmier MESURE les constantes
-        print("\n[INFO] L'infirmier mesure les constantes vitales...")
-        print(f"   FC : {self.original_patient.constantes.fc} bpm")
-        print(f"   FR : {self.original_patient.constantes.fr} /min")
-        print(f"   SpO2 : {self.original_patient.constantes.spo2}%")
-        print(
+        self._print("\n[INFO] L'infirmier mesure les constantes vitales...")
+        self._print(f"   FC : {self.original_patient.constantes.fc} bpm")
+        self._print(f"   FR : {self.original_patient.constantes.fr} /min")
+        self._print(f"   SpO2 : {self.original_patient.constantes.spo2}%")
+        self._print(
             f"   TA : {self.original_patient.constantes.ta_systolique}/{self.original_patient.constantes.ta_diastolique} mmHg"
         )
-        print(f"   Temp : {self.original_patient.constantes.temperature}°C")
+        self._print(f"   Temp : {self.original_patient.constantes.temperature}°C")
 
         # 7. Extraction finale
-        print("\n" + "=" * 60)
-        print("[EXTRACTION]")
-        print("=" * 60)
+        self._print("\n" + "=" * 60)
+        self._print("[EXTRACTION]")
+        self._print("=" * 60)
         self.extracted_patient = self.analyzer.extract_patient_info(self.conversation)
         completeness = self.analyzer.get_completeness_score(self.extracted_patient)
 
-        print(f"[OK] Completude : {completeness['score']*100:.0f}%")
+        self._print(f"[OK] Completude : {completeness['score']*100:.0f}%")
         if completeness["missing"]:
-            print(f"   Infos manquantes : {', '.join(completeness['missing'])}")
+            self._print(f"   Infos manquantes : {', '.join(completeness['missing'])}")
         else:
-            print("   Toutes les infos collectées !")
+            self._print("   Toutes les infos collectées !")
 
         return {
             "pathology": self.pathology,
@@ -138,6 +139,11 @@ class SimulationWorkflow:
             "completeness": completeness,
         }
 
+    def _print(self, *args, **kwargs):
+        """print conditionné par verbose."""
+        if self.verbose:
+            print(*args, **kwargs)
+
     def _generate_random_pathology(self) -> str:
         """Génère pathologie propre."""
         prompt = """Génère UNE SEULE pathologie aléatoire réaliste pour les urgences.
@@ -250,3 +256,4 @@ Une ligne seulement :"""
         self.original_patient = None
         self.extracted_patient = None
         self.pathology = None
+        self.analyzer.reset()
@@ -0,0 +1,100 @@
+"""Matcher clinique : index des trigrammes et lecture des constantes comparés aux re.search d'origine."""
+
+import random
+import re
+
+import pytest
+
+from src.rag.clinical_matcher import SYMPTOM_LEXICON, VITALS_GRAMMAR, VITALS_RANGES, get_matcher
+
+# Fragments des motifs du lexique, mêlés à du bruit pour couvrir les débuts de motifs
+_SYMPTOM_PIECES = [
+    "tête", "céphalée", "migraine", "vertige", "syncope", "crise", "confusion",
+    "faiblesse du bras", "trouble de la parole", "voit flou", "poitrine", "oppression",
+    "cœur bat", "jambe gonflée", "œdème", "essoufflé", "dyspnée", "toux", "crachat",
+    "étouffe", "ventre", "nausée", "envie de vomir", "vomi", "diarrhée", "bloqué",
+    "sang dans les selles", "brûlure à l'estomac", "brûle en urinant", "hématurie",
+    "dos", "genou", "hanche", "épaule", "nuque", "fracture", "bras", "mollet",
+    "gorge", "oreille", "nez bouché", "saigne du nez", "œil rouge", "œil douleur",
+    "bouton", "démangeaison", "brûlure", "plaie", "abcès", "fièvre", "frisson",
+    "fatigue", "épuisé", "perte de poids", "sueur", "dort mal", "stress", "allergie",
+    "triste", "double", "transit", "réaction", "urticaire", "tét", "fiè", "bra",
+]
+_NOISE = "abcdeéèfghijklmnopqrstuvwxyzœ .,'-"
+
+_VITALS_PIECES = [
+    "1", "2", "3", "4", "5", "9", "0", "12", "38,5", "98", "110", " ", "/", " / ",
+    "°", "degr", "temp", "bpm", "pouls", "fc", "%", "sat", "spo", "oxyg", "respir",
+    "/min", "fr ", "ans", "an", "a", ".", ",",
+]
+
+
+def _random_texts(pieces, n, seed):
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(n):
+        parts = []
+        for _ in range(rng.randint(1, 8)):
+            if rng.random() < 0.3:
+                parts.append("".join(rng.choice(_NOISE) for _ in range(rng.randint(1, 4))))
+            else:
+                parts.append(rng.choice(pieces))
+        texts.append("".join(parts))
+    return texts
+
+
+def _baseline_symptoms(text):
+    """Ancienne extraction : un re.search par motif du lexique."""
+    symptoms = []
+    for pattern, symptom in SYMPTOM_LEXICON.items():
+        if symptom and symptom not in symptoms and re.search(pattern, text):
+            symptoms.append(symptom)
+    return symptoms
+
+
+def _baseline_vital(kind, text):
+    """Ancienne extraction : premier re.search, ignoré s'il est hors plage."""
+    m = re.search(VITALS_GRAMMAR[kind], text)
+    if not m:
+        return None
+    if kind == "TA":
+        return int(m.group(1)), int(m.group(2))
+    value = float(m.group(1).replace(",", ".")) if kind == "Temperature" else int(m.group(1))
+    bounds = VITALS_RANGES.get(kind)
+    if bounds and not bounds[0] <= value <= bounds[1]:
+        return None
+    return value
+
+
+def test_trigram_prefilter_matches_one_search_per_pattern():
+    matcher = get_matcher()
+    for text in _random_texts(_SYMPTOM_PIECES, 5000, seed=0):
+        assert matcher.match_symptoms(text) == _baseline_symptoms(text), text
+
+
+def test_first_vital_reading_keeps_every_baseline_reading():
+    matcher = get_matcher()
+    for text in _random_texts(_VITALS_PIECES, 5000, seed=1):
+        readings = matcher.match_vitals(text)
+        for kind in VITALS_GRAMMAR:
+            expected = _baseline_vital(kind, text)
+            if expected is not None:
+                assert readings.get(kind, [None])[0] == expected, (kind, text)
+
+
+@pytest.mark.parametrize(
+    "text, kind, expected",
+    [
+        # Première lecture hors plage : l'ancienne extraction abandonnait
+        ("sat 30% au doigt, 95% sat au contrôle", "SpO2", [95]),
+        ("15° dehors mais 38,5° ce matin", "Temperature", [38.5]),
+        # Lecture à l'intérieur d'un nombre (comme re.search)
+        ("1110 bpm", "FC", [110]),
+        # Un nombre hors plage ne donne pas de lecture par sa fin
+        ("250 bpm", "FC", None),
+        ("120/80, 80 bpm", "TA", [(120, 80)]),
+        ("120/80, 80 bpm", "FC", [80]),
+    ],
+)
+def test_vitals_readings(text, kind, expected):
+    assert get_matcher().match_vitals(text).get(kind) == expected
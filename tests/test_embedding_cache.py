@@ -0,0 +1,98 @@
+"""Persistance du cache d'embeddings : ajout seul, reprise après crash, processus concurrents."""
+
+import multiprocessing
+
+import numpy as np
+import pytest
+
+from src.rag.embedding_cache import EmbeddingCache
+
+DIM = 8
+
+
+def _vector(i: int) -> list:
+    return (np.arange(DIM, dtype=np.float32) + i).tolist()
+
+
+def _fill(cache_dir: str, start: int, count: int) -> None:
+    cache = EmbeddingCache(cache_dir, "modele", DIM, max_entries=10_000, flush_every=16)
+    for i in range(start, start + count):
+        cache.put(f"texte {i}", _vector(i))
+    cache.flush()
+
+
+def _reload(cache_dir, **kwargs) -> EmbeddingCache:
+    return EmbeddingCache(str(cache_dir), "modele", DIM, **kwargs)
+
+
+def test_flush_appends_only_new_rows(tmp_path):
+    cache = _reload(tmp_path, flush_every=1000)
+    for i in range(100):
+        cache.put(f"texte {i}", _vector(i))
+    cache.flush()
+    size = cache.vectors_file.stat().st_size
+
+    cache.put("texte 100", _vector(100))
+    cache.flush()
+
+    assert cache.vectors_file.stat().st_size == size + DIM * 4
+    reloaded = _reload(tmp_path)
+    assert reloaded.get("texte 100") == _vector(100)
+    assert reloaded.get("texte 3") == _vector(3)
+
+
+def test_interrupted_write_is_ignored_then_truncated(tmp_path):
+    cache = _reload(tmp_path)
+    for i in range(10):
+        cache.put(f"texte {i}", _vector(i))
+    cache.flush()
+    size = cache.vectors_file.stat().st_size
+
+    # Lignes écrites mais index jamais remplacé (arrêt brutal), dernière ligne partielle
+    with open(cache.vectors_file, "ab") as f:
+        f.write(np.ones(DIM * 3 - 2, dtype=np.float32).tobytes())
+
+    reloaded = _reload(tmp_path)
+    assert reloaded.get_stats()["entries"] == 10
+    assert reloaded.get("texte 9") == _vector(9)
+
+    reloaded.put("texte 10", _vector(10))
+    reloaded.flush()
+    assert reloaded.vectors_file.stat().st_size == size + DIM * 4
+    assert _reload(tmp_path).get("texte 10") == _vector(10)
+
+
+def test_eviction_compacts_into_new_generation(tmp_path):
+    cache = _reload(tmp_path, max_entries=50, flush_every=10)
+    for i in range(500):
+        cache.put(f"texte {i}", _vector(i))
+    cache.flush()
+
+    assert cache.get_stats()["generation"] > 0
+    assert len(list(tmp_path.glob("modele.*.f32"))) == 1
+    assert cache.vectors_file.stat().st_size <= (2 * 50 + 10) * DIM * 4
+
+    reloaded = _reload(tmp_path, max_entries=50)
+    assert reloaded.get_stats()["entries"] == 50
+    assert reloaded.get("texte 499") == _vector(499)
+    assert reloaded.get("texte 10") is None
+
+
+@pytest.mark.skipif(
+    "fork" not in multiprocessing.get_all_start_methods(), reason="fork indisponible"
+)
+def test_concurrent_processes_merge_their_entries(tmp_path):
+    context = multiprocessing.get_context("fork")
+    workers = [
+        context.Process(target=_fill, args=(str(tmp_path), start, 300)) for start in (0, 300, 600)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(30)
+        assert worker.exitcode == 0
+
+    reloaded = _reload(tmp_path, max_entries=10_000)
+    assert reloaded.get_stats()["entries"] == 900
+    for i in (0, 299, 300, 599, 600, 899):
+        assert reloaded.get(f"texte {i}") == _vector(i)
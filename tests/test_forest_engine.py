@@ -0,0 +1,134 @@
+"""Équivalence du moteur compilé (CompiledForest) avec scikit-learn."""
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+pytest.importorskip("sklearn")
+
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import MinMaxScaler, StandardScaler
+
+from src.rag.forest_engine import CompiledForest, check_equivalence
+
+MODELS_DIR = Path(__file__).parent.parent / "data" / "models"
+DATASET = MODELS_DIR / "triage_dataset_v2.csv"
+MODEL = MODELS_DIR / "random_forest_v2.pkl"
+
+LABELS = np.array(["GRIS", "JAUNE", "ROUGE", "VERT"])
+
+
+def _forest():
+    return RandomForestClassifier(n_estimators=25, max_depth=8, random_state=0)
+
+
+@pytest.fixture(scope="module")
+def synthetic():
+    """Features d'échelles et de centres très différents (constantes vitales, âge...)."""
+    rng = np.random.default_rng(0)
+    X = rng.normal(loc=[80, 16, 96, 120, 70, 37], scale=[20, 4, 3, 20, 10, 1], size=(400, 6))
+    y = LABELS[(X[:, 0] > 100).astype(int) + 2 * (X[:, 2] < 94).astype(int)]
+    return X, y
+
+
+@pytest.mark.parametrize(
+    "scaler",
+    [
+        StandardScaler(),
+        StandardScaler(with_mean=False),
+        StandardScaler(with_std=False),
+        StandardScaler(with_mean=False, with_std=False),
+        "passthrough",
+        None,
+    ],
+    ids=["standard", "no-mean", "no-std", "identity", "passthrough", "forest-only"],
+)
+def test_pipeline_variants_match_sklearn(synthetic, scaler):
+    X, y = synthetic
+    model = _forest() if scaler is None else Pipeline([("scaler", scaler), ("rf", _forest())])
+    model.fit(X, y)
+
+    engine = CompiledForest.from_sklearn(model)
+
+    np.testing.assert_allclose(engine.predict_proba(X), model.predict_proba(X), atol=1e-12)
+    assert (engine.predict(X) == model.predict(X)).all()
+    # Échantillon couvrant tous les seuils, hors des données d'entraînement
+    assert check_equivalence(model, engine) <= 1e-9
+
+
+def test_unsupported_step_rejected(synthetic):
+    X, y = synthetic
+    model = Pipeline([("scaler", MinMaxScaler()), ("rf", _forest())]).fit(X, y)
+
+    with pytest.raises(ValueError, match="non supportee"):
+        CompiledForest.from_sklearn(model)
+
+
+def test_check_equivalence_detects_mismatch(synthetic):
+    X, y = synthetic
+    model = Pipeline([("scaler", StandardScaler()), ("rf", _forest())]).fit(X, y)
+    engine = CompiledForest.from_sklearn(model)
+    engine.mean = None  # normalisation incomplète
+
+    with pytest.raises(ValueError, match="differentes"):
+        check_equivalence(model, engine)
+
+
+def test_save_load_roundtrip(synthetic, tmp_path):
+    X, y = synthetic
+    model = Pipeline([("scaler", StandardScaler(with_mean=False)), ("rf", _forest())]).fit(X, y)
+    engine = CompiledForest.from_sklearn(model)
+
+    path = tmp_path / "forest.npz"
+    engine.save(str(path))
+    reloaded = CompiledForest.load(str(path))
+
+    np.testing.assert_array_equal(reloaded.predict_proba(X), engine.predict_proba(X))
+    assert list(reloaded.classes_) == list(engine.classes_)
+
+
+@pytest.mark.skipif(not DATASET.exists(), reason="triage_dataset_v2.csv absent")
+def test_triage_dataset_equivalence():
+    """Modèle de production s'il est présent, sinon même pipeline entraîné sur le dataset."""
+    pd = pytest.importorskip("pandas")
+
+    df = pd.read_csv(DATASET)
+    X = df.drop(columns=["label"]).to_numpy(dtype=np.float64)
+
+    if MODEL.exists():
+        import joblib
+
+        model = joblib.load(MODEL)
+    else:
+        model = Pipeline([("scaler", StandardScaler()), ("rf", _forest())])
+        model.fit(X, df["label"].to_numpy())
+
+    engine = CompiledForest.from_sklearn(model)
+
+    assert check_equivalence(model, engine, X) <= 1e-9
+    assert check_equivalence(model, engine) <= 1e-9
+
+
+def test_predictor_rejects_non_equivalent_engine(synthetic, tmp_path, monkeypatch):
+    joblib = pytest.importorskip("joblib")
+    from src.rag import predictor as predictor_module
+
+    X, y = synthetic
+    model = Pipeline([("scaler", StandardScaler()), ("rf", _forest())]).fit(X, y)
+    path = tmp_path / "model.pkl"
+    joblib.dump(model, path)
+
+    assert predictor_module.MLTriagePredictor(model_path=str(path)).engine is not None
+
+    compile_forest = CompiledForest.from_sklearn
+
+    def broken(sk_model):
+        engine = compile_forest(sk_model)
+        engine.scale = None
+        return engine
+
+    monkeypatch.setattr(predictor_module.CompiledForest, "from_sklearn", staticmethod(broken))
+    predictor = predictor_module.MLTriagePredictor(model_path=str(path))
+    assert predictor.model is not None and predictor.engine is None
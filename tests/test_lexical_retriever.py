@@ -0,0 +1,45 @@
+"""Mode lexical du RAGRetriever : aucun chargement du modèle d'embeddings."""
+
+import sys
+
+import pytest
+
+from src.rag.embeddings import EmbeddingProvider
+from src.rag.lexical_index import LexicalIndex
+from src.rag.numpy_store import NumpyVectorStore
+from src.rag.vector_store import RAGRetriever
+
+DOCUMENTS = [
+    "Douleur thoracique avec dyspnée : niveau ROUGE, ECG immédiat.",
+    "Fièvre modérée sans signe de gravité : niveau VERT.",
+    "Hypoxie (SpO2 < 90%) : oxygénothérapie, niveau ROUGE.",
+]
+
+
+@pytest.fixture
+def retriever(monkeypatch):
+    # Tout import de sentence_transformers échoue : le modèle ne doit pas être chargé
+    monkeypatch.setitem(sys.modules, "sentence_transformers", None)
+    store = NumpyVectorStore(persist_directory=None)
+    index = LexicalIndex.build(
+        [f"chunk_{i}" for i in range(len(DOCUMENTS))],
+        DOCUMENTS,
+        [{"source": f"doc{i}.md"} for i in range(len(DOCUMENTS))],
+    )
+    return RAGRetriever(store, mode="lexical", lexical_index=index)
+
+
+def test_lexical_mode_never_loads_embedding_model(retriever):
+    results = retriever.retrieve_with_scores("douleur thoracique dyspnee", top_k=2)
+    assert results[0]["id"] == "chunk_0"
+    assert results[0]["relevance_score"] == pytest.approx(1.0)
+    assert not retriever.vector_store.embedding_model.is_loaded
+
+
+def test_embedding_model_loaded_on_first_encode(monkeypatch):
+    monkeypatch.setitem(sys.modules, "sentence_transformers", None)
+    provider = EmbeddingProvider("all-MiniLM-L6-v2")
+    assert not provider.is_loaded
+    assert provider.get_dimension() == 384
+    with pytest.raises(ImportError):
+        provider.embed_text("douleur")
@@ -0,0 +1,92 @@
+"""Instantané des agrégats de monitoring : plusieurs trackers, rattrapage après arrêt brutal, mode json."""
+
+import json
+
+import pytest
+
+from src.monitoring.metrics_tracker import MetricsTracker
+
+
+def _count(tracker: MetricsTracker, component: str = "RAG") -> int:
+    return tracker.get_latency_stats().get(component, {}).get("count", 0)
+
+
+def _track(tracker: MetricsTracker, n: int, component: str = "RAG"):
+    for i in range(n):
+        tracker.track_latency(component, "retrieve", 0.01 * (i + 1))
+
+
+def test_two_jsonl_trackers_share_data_dir(tmp_path):
+    first = MetricsTracker(str(tmp_path), storage="jsonl")
+    second = MetricsTracker(str(tmp_path), storage="jsonl")
+    _track(first, 5)
+    _track(second, 3)
+    first.close()
+    second.close()
+
+    lines = (tmp_path / "latencies.jsonl").read_text(encoding="utf-8").splitlines()
+    assert len(lines) == 8
+    fresh = MetricsTracker(str(tmp_path), storage="jsonl")
+    assert _count(fresh) == 8
+    fresh.close()
+
+
+def test_events_after_last_snapshot_are_caught_up(tmp_path):
+    tracker = MetricsTracker(str(tmp_path), storage="jsonl")
+    _track(tracker, 4)
+    tracker.close()
+
+    # Événements écrits par un processus arrêté avant son instantané
+    events = [
+        {"timestamp": "2026-01-01T00:00:00", "component": "RAG", "operation": "retrieve",
+         "duration": 0.5, "metadata": {}}
+    ] * 2
+    with open(tmp_path / "latencies.jsonl", "a", encoding="utf-8") as f:
+        f.write("".join(json.dumps(e) + "\n" for e in events))
+        f.write('{"timestamp": "2026-01-01T00:00:01", "comp')  # ligne en cours d'écriture
+
+    reloaded = MetricsTracker(str(tmp_path), storage="jsonl")
+    assert _count(reloaded) == 6
+    reloaded.close()
+    snapshot = json.loads((tmp_path / "aggregates.json").read_text(encoding="utf-8"))
+    assert snapshot["offsets"]["latencies"] < (tmp_path / "latencies.jsonl").stat().st_size
+
+
+def test_truncated_file_triggers_rebuild(tmp_path):
+    tracker = MetricsTracker(str(tmp_path), storage="jsonl")
+    _track(tracker, 5)
+    tracker.close()
+    lines = (tmp_path / "latencies.jsonl").read_text(encoding="utf-8").splitlines(keepends=True)
+    (tmp_path / "latencies.jsonl").write_text("".join(lines[:2]), encoding="utf-8")
+
+    reloaded = MetricsTracker(str(tmp_path), storage="jsonl")
+    assert _count(reloaded) == 2
+    reloaded.close()
+
+
+def test_json_mode_writes_snapshot_on_flush_only(tmp_path):
+    tracker = MetricsTracker(str(tmp_path), storage="json")
+    initial = (tmp_path / "aggregates.json").read_text(encoding="utf-8")
+    _track(tracker, 3)
+    assert (tmp_path / "aggregates.json").read_text(encoding="utf-8") == initial
+    assert len(json.loads((tmp_path / "latencies.json").read_text(encoding="utf-8"))) == 3
+
+    tracker.close()
+    snapshot = json.loads((tmp_path / "aggregates.json").read_text(encoding="utf-8"))
+    assert snapshot["offsets"]["latencies"] == 3
+
+    reloaded = MetricsTracker(str(tmp_path), storage="json")
+    assert _count(reloaded) == 3
+    _track(reloaded, 2)
+    reloaded.close()  # sans instantané, les 2 événements seraient rattrapés au chargement
+    assert _count(MetricsTracker(str(tmp_path), storage="json")) == 5
+
+
+@pytest.mark.parametrize("storage", ["json", "jsonl"])
+def test_reset_clears_snapshot(tmp_path, storage):
+    tracker = MetricsTracker(str(tmp_path), storage=storage)
+    _track(tracker, 3)
+    tracker.reset()
+    _track(tracker, 1)
+    tracker.close()
+    assert _count(MetricsTracker(str(tmp_path), storage=storage)) == 1
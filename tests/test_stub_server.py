@@ -0,0 +1,118 @@
+"""Chemin asynchrone du provider Mistral contre le serveur stub : retries, Retry-After, timeouts, concurrence."""
+
+import asyncio
+import time
+
+import pytest
+
+from src.llm.mistral_provider import MistralAPIError, MistralProvider
+from src.llm.stub_server import StubMistralServer
+
+MESSAGES = [{"role": "user", "content": "Douleur thoracique"}]
+
+
+@pytest.fixture
+def server():
+    with StubMistralServer() as stub:
+        yield stub
+
+
+def _provider(server, **kwargs) -> MistralProvider:
+    kwargs.setdefault("backoff_base", 0.01)
+    kwargs.setdefault("timeout", 5.0)
+    return MistralProvider(api_key="test", base_url=server.url, **kwargs)
+
+
+def _run(provider: MistralProvider, *coroutines):
+    """Exécute les appels dans une boucle dédiée puis ferme le client httpx."""
+
+    async def main():
+        try:
+            return await asyncio.gather(*coroutines)
+        finally:
+            await provider.aclose()
+
+    return asyncio.run(main())
+
+
+def test_agenerate_returns_stub_answer(server):
+    provider = _provider(server)
+    (answer,) = _run(provider, provider.agenerate(MESSAGES))
+    assert answer == "[stub] Douleur thoracique"
+    assert server.requests == 1
+
+
+def test_retries_429_then_succeeds(server):
+    server.fail_next(1, status=429)
+    provider = _provider(server)
+    (answer,) = _run(provider, provider.agenerate(MESSAGES))
+    assert answer == "[stub] Douleur thoracique"
+    assert server.requests == 2
+
+
+@pytest.mark.parametrize("status", [500, 502, 503, 504])
+def test_retries_server_errors(server, status):
+    server.fail_next(2, status=status)
+    provider = _provider(server)
+    (result,) = _run(provider, provider.agenerate_with_metadata(MESSAGES))
+    assert result["response"] == "[stub] Douleur thoracique"
+    assert result["output_tokens"] > 0
+    assert server.requests == 3
+
+
+def test_honors_retry_after(server):
+    server.fail_next(1, status=429, retry_after=0.4)
+    provider = _provider(server, backoff_base=0.001)
+    start = time.perf_counter()
+    _run(provider, provider.agenerate(MESSAGES))
+    assert time.perf_counter() - start >= 0.4
+    assert server.requests == 2
+
+
+def test_retry_after_capped_by_backoff_max(server):
+    server.fail_next(1, status=429, retry_after=30)
+    provider = _provider(server, backoff_max=0.1)
+    start = time.perf_counter()
+    _run(provider, provider.agenerate(MESSAGES))
+    assert time.perf_counter() - start < 5
+    assert server.requests == 2
+
+
+def test_gives_up_after_max_retries(server):
+    server.fail_next(5, status=503)
+    provider = _provider(server, max_retries=2)
+    with pytest.raises(MistralAPIError) as excinfo:
+        _run(provider, provider.agenerate(MESSAGES))
+    assert excinfo.value.status_code == 503
+    assert server.requests == 3
+
+
+def test_client_error_is_not_retried(server):
+    server.fail_next(1, status=400)
+    provider = _provider(server)
+    with pytest.raises(MistralAPIError) as excinfo:
+        _run(provider, provider.agenerate(MESSAGES))
+    assert excinfo.value.status_code == 400
+    assert server.requests == 1
+
+
+def test_timeout_is_retried_then_raised(server):
+    server.latency = 1.0
+    provider = _provider(server, timeout=0.2, max_retries=1)
+    start = time.perf_counter()
+    with pytest.raises(MistralAPIError, match="Timeout"):
+        _run(provider, provider.agenerate(MESSAGES))
+    assert time.perf_counter() - start < 1.5
+    assert server.requests == 2
+
+
+def test_semaphore_limits_requests_in_flight(server):
+    server.latency = 0.1
+    provider = _provider(server, max_concurrency=3)
+    answers = _run(
+        provider,
+        *[provider.agenerate([{"role": "user", "content": f"patient {i}"}]) for i in range(12)],
+    )
+    assert answers == [f"[stub] patient {i}" for i in range(12)]
+    assert server.requests == 12
+    assert server.max_in_flight == 3
@@ -0,0 +1,50 @@
+"""Écriture des traces : spans terminés après leur racine (threads de préchargement)."""
+
+import threading
+
+from src.monitoring import tracing
+from src.monitoring.tracing import Tracer, load_spans, set_tracer, span, wrap_context
+
+
+def _turn_with_late_prefetch():
+    """Un tour dont le span du thread de préchargement se termine après la racine."""
+    release = threading.Event()
+
+    def prefetch():
+        with span("rag.retrieve"):
+            release.wait(5)
+
+    with span("chat.turn"):
+        thread = threading.Thread(target=wrap_context(prefetch))
+        thread.start()
+    release.set()
+    thread.join()
+
+
+def test_late_child_span_written_immediately(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    tracer = Tracer(str(path), enabled=True)
+    previous = set_tracer(tracer)
+    try:
+        for _ in range(5):
+            _turn_with_late_prefetch()
+    finally:
+        set_tracer(previous)
+
+    assert tracer.spans_written == 10
+    assert not tracer._pending
+    spans = load_spans(str(path))
+    roots = {s["span_id"]: s["trace_id"] for s in spans if s["name"] == "chat.turn"}
+    children = [s for s in spans if s["name"] == "rag.retrieve"]
+    assert len(roots) == len(children) == 5
+    assert all(roots[s["parent_id"]] == s["trace_id"] for s in children)
+
+
+def test_finished_traces_are_bounded(tmp_path, monkeypatch):
+    monkeypatch.setattr(tracing, "FINISHED_TRACES_MAX", 3)
+    tracer = Tracer(str(tmp_path / "traces.jsonl"), enabled=True)
+    for _ in range(10):
+        with tracer.span("chat.turn"):
+            pass
+    assert len(tracer._finished) == 3
+    assert tracer.spans_written == 10